@@ -0,0 +1,175 @@
+import heapq
+from array import array
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Order
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Заказы с этими статусами не учитываются в аналитике продаж
+EXCLUDED_STATUSES = ("cancelled",)
+
+
+def order_date(order: Order) -> str:
+    """Дата заказа (YYYY-MM-DD) без разбора времени"""
+    return (order.created_at or "")[:10]
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _add_quantity(column: array, product_id: int, quantity: float) -> None:
+    """Прибавление к ячейке product_id колонки с дополнением колонки нулями"""
+    if product_id >= len(column):
+        column.frombytes(bytes(column.itemsize * (product_id + 1 - len(column))))
+    column[product_id] += quantity
+
+
+def _sum_columns(columns: Iterable[array]) -> Dict[int, float]:
+    """Поэлементная сумма колонок товаров: product_id -> количество (без нулевых)"""
+    columns = [column for column in columns if column]
+    if not columns:
+        return {}
+    if np is not None:
+        total = np.zeros(max(len(column) for column in columns))
+        for column in columns:
+            total[:len(column)] += np.frombuffer(column, dtype=np.float64)
+        product_ids = np.flatnonzero(total)
+        return dict(zip(product_ids.tolist(), total[product_ids].tolist()))
+
+    total = [0.0] * max(len(column) for column in columns)
+    for column in columns:
+        for product_id, quantity in enumerate(column):
+            total[product_id] += quantity
+    return {product_id: quantity for product_id, quantity in enumerate(total) if quantity}
+
+
+class SalesAggregates:
+    """
+    Накопительные показатели продаж, которые обновляются при создании заказа
+    и смене его статуса, а не пересчитываются при каждом открытии аналитики:
+    сумма и количество заказов каждого покупателя и количество каждого
+    товара за все время, по дням и по месяцам.
+
+    Показатели хранятся в колонках (array): у покупателей - колонки id,
+    суммы и количества заказов, у товаров - колонка количеств с индексом
+    product_id на все время, на каждый день и на каждый месяц. Суммы по
+    периодам - поэлементное сложение колонок (через NumPy, если он
+    установлен), без обхода заказов и словарей.
+
+    Количество товаров за любой период складывается из месячных колонок
+    для целых месяцев и дневных - для неполных месяцев на краях периода,
+    то есть не более чем из ~60 дневных колонок и по одной на каждый месяц.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        # Покупатели: строка колонок на каждого покупателя
+        self.customer_rows = {}  # user_id -> номер строки
+        self.customer_id = array('q')
+        self.customer_total = array('d')  # сумма заказов
+        self.customer_count = array('q')  # количество заказов
+        # Товары: колонки количеств с индексом product_id
+        self.products = array('d')  # за все время
+        self.product_days = {}  # "YYYY-MM-DD" -> колонка
+        self.product_months = {}  # "YYYY-MM" -> колонка
+
+    def rebuild(self, orders: Iterable[Order]) -> None:
+        """Пересчет по истории заказов (после загрузки или восстановления данных)"""
+        self.clear()
+        for order in orders:
+            self.add_order(order)
+
+    def add_order(self, order: Order) -> None:
+        self._apply(order, 1)
+
+    def change_status(self, order: Order, old_status: str) -> None:
+        """Учет смены статуса: отмененный заказ исключается из показателей и наоборот"""
+        was_counted = old_status not in EXCLUDED_STATUSES
+        is_counted = order.status not in EXCLUDED_STATUSES
+        if was_counted and not is_counted:
+            self._apply(order, -1, check_status=False)
+        elif is_counted and not was_counted:
+            self._apply(order, 1)
+
+    def _apply(self, order: Order, sign: int, check_status: bool = True) -> None:
+        if check_status and order.status in EXCLUDED_STATUSES:
+            return
+
+        row = self.customer_rows.get(order.user_id)
+        if row is None:
+            row = self.customer_rows[order.user_id] = len(self.customer_id)
+            self.customer_id.append(order.user_id)
+            self.customer_total.append(0.0)
+            self.customer_count.append(0)
+        self.customer_total[row] += sign * order.total
+        self.customer_count[row] += sign
+
+        day = order_date(order)
+        columns = (self.products,
+                   self.product_days.setdefault(day, array('d')),
+                   self.product_months.setdefault(day[:7], array('d')))
+        for item in order.items:
+            if item.product_id < 0:
+                continue
+            for column in columns:
+                _add_quantity(column, item.product_id, sign * item.quantity)
+
+    def customer_stats(self) -> Dict[int, Tuple[float, int]]:
+        """Сумма и количество заказов каждого покупателя: user_id -> (total, count)"""
+        return {user_id: (total, count)
+                for user_id, total, count in zip(self.customer_id, self.customer_total, self.customer_count)
+                if count > 0}
+
+    def top_customers(self, by_amount: bool = True, limit: int = 5) -> List[Tuple[int, float]]:
+        """Покупатели с наибольшей суммой (by_amount) или количеством заказов"""
+        values = self.customer_total if by_amount else self.customer_count
+        rows = (row for row, count in enumerate(self.customer_count) if count > 0)
+        return [(self.customer_id[row], values[row])
+                for row in heapq.nlargest(limit, rows, key=lambda row: (values[row], -self.customer_id[row]))]
+
+    def product_quantities(self, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> Dict[int, float]:
+        """Количество каждого товара в заказах с start_date по end_date включительно (YYYY-MM-DD)"""
+        if start_date is None and end_date is None:
+            return _sum_columns([self.products])
+
+        months = [month for month in self.product_months if len(month) == 7]
+        if not months:
+            return {}
+        try:
+            current = date.fromisoformat(start_date) if start_date else date.fromisoformat(min(months) + "-01")
+            last = date.fromisoformat(end_date) if end_date else _next_month(
+                date.fromisoformat(max(months) + "-01")) - timedelta(days=1)
+        except ValueError:
+            return {}
+
+        columns = []
+        while current <= last:
+            month_end = _next_month(current) - timedelta(days=1)
+            if current.day == 1 and month_end <= last:
+                columns.append(self.product_months.get(current.strftime("%Y-%m")))
+                current = month_end + timedelta(days=1)
+            else:
+                columns.append(self.product_days.get(current.isoformat()))
+                current += timedelta(days=1)
+        return _sum_columns(column for column in columns if column is not None)
+
+    def quantities_by_month_of_year(self) -> Dict[int, Dict[int, float]]:
+        """Количество каждого товара по месяцам года: month -> {product_id: количество}"""
+        by_month = {}
+        for key, column in self.product_months.items():
+            try:
+                month = int(key[5:7])
+            except ValueError:
+                continue
+            by_month.setdefault(month, []).append(column)
+        result = {month: _sum_columns(columns) for month, columns in by_month.items()}
+        return {month: products for month, products in result.items() if products}
@@ -0,0 +1,262 @@
+"""
+Отчет по аналитике без запуска бота.
+
+Читает заказы из каталога данных или из резервной копии потоково и
+складывает их в накопительные суммы продаж (analytics.SalesAggregates), как
+бот при загрузке, поэтому память зависит от количества покупателей, товаров
+и дней с заказами, а не от количества заказов. Выводит те же показатели, что
+экран аналитики (utils.generate_analytics, топ покупателей и популярные
+товары за периоды), в формате JSON или CSV.
+
+Использование:
+    python analytics_report.py [источник] [--format json|csv] [--output файл]
+                               [--limit N] [--date YYYY-MM-DD]
+
+Источник - каталог данных (по умолчанию data), имя резервной копии
+из data/backups, каталог экспорта или путь к файлу orders.json.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+from datetime import datetime, time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import codec
+import config
+from analytics import SalesAggregates
+from dashboard import DashboardReport, compute_dashboard
+from journal import Journal
+from json_stream import JsonStream, iter_object
+from models import Order, Product, User, decode_rows, iter_rows
+from order_archive import OrderArchive
+from user_store import UserStore
+
+CSV_COLUMNS = ["metric", "period", "rank", "id", "name", "unit", "quantity", "order_count", "total_spent"]
+
+
+def resolve_source(source: Optional[str]) -> str:
+    """Каталог с файлами данных по аргументу командной строки"""
+    if not source:
+        return config.DATA_DIR
+    if os.path.isfile(source):
+        return os.path.dirname(os.path.abspath(source))
+    if os.path.isdir(source):
+        return source
+    backup = os.path.join(config.BACKUP_DIR, source)
+    if os.path.isdir(backup):
+        return backup
+    raise FileNotFoundError(f"Источник данных не найден: {source}")
+
+
+def _journal(directory: str, filename: str) -> Journal:
+    return Journal(os.path.join(directory, os.path.basename(filename)) + ".log")
+
+
+def load_rows(directory: str, filename: str, model: type) -> Dict[int, Any]:
+    """Записи коллекции по id (с учетом журнала изменений, если он есть)"""
+    path = os.path.join(directory, os.path.basename(filename))
+    rows = {}
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            rows = {row.id: row for row in decode_rows(model, codec.loads(f.read()))}
+    for record in _journal(directory, filename).replay():
+        if record["op"] == "del":
+            rows.pop(record["id"], None)
+        else:
+            rows[record["id"]] = model.from_dict(record["data"])
+    return rows
+
+
+def load_products(directory: str) -> Dict[int, Product]:
+    return load_rows(directory, config.PRODUCTS_FILE, Product)
+
+
+def iter_orders(directory: str) -> Iterator[Order]:
+    """
+    Потоковый обход заказов: снимок orders.json в табличном формате или
+    в прежнем (список словарей), изменения из журнала заказов и архив.
+    """
+    # Журнал ограничен порогом компактизации и читается целиком
+    changes = {}
+    for record in _journal(directory, config.ORDERS_FILE).replay():
+        changes[record["id"]] = None if record["op"] == "del" else Order.from_dict(record["data"])
+
+    # Архив завершенных заказов по месяцам. Заказ может быть и в архиве, и в рабочих
+    # (сбой между записью архива и перезаписью orders.json) - тогда берется рабочий,
+    # поэтому при непустом архиве запоминаются id рабочих заказов
+    archive = OrderArchive(os.path.join(directory, os.path.basename(config.ARCHIVE_DIR)))
+    live_ids = set() if archive.months() else None
+
+    path = os.path.join(directory, os.path.basename(config.ORDERS_FILE))
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            for order in iter_rows(Order, JsonStream(f)):
+                if live_ids is not None:
+                    live_ids.add(order.id)
+                if order.id not in changes:
+                    yield order
+    for order in changes.values():
+        if order is not None:
+            yield order
+    for order in archive.iter_orders():
+        if order.id not in changes and (live_ids is None or order.id not in live_ids):
+            yield order
+
+
+def aggregate_orders(orders: Iterator[Order]) -> Tuple[SalesAggregates, int]:
+    """Накопительные суммы продаж и количество прочитанных заказов"""
+    sales = SalesAggregates()
+    count = 0
+    for order in orders:
+        sales.add_order(order)
+        count += 1
+    return sales, count
+
+
+def _user_store(directory: str) -> Optional[UserStore]:
+    """Каталог корзин пользователей (только для чтения) или None для прежнего users.json"""
+    users_dir = os.path.join(directory, os.path.basename(config.USERS_DIR))
+    if not os.path.isdir(users_dir):
+        return None
+
+    def read_file(path: str, expected_type: type) -> Optional[Any]:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return codec.loads(f.read())
+
+    return UserStore(users_dir, config.USER_BUCKETS, read_file, write_file=None)
+
+
+def iter_users(directory: str) -> Iterator[User]:
+    """Все пользователи: из корзин или из users.json с его журналом"""
+    store = _user_store(directory)
+    if store is not None:
+        yield from store.iter_users()
+        return
+
+    users = {}
+    path = os.path.join(directory, os.path.basename(config.USERS_FILE))
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            users = {int(key): User.from_dict(data) for key, data in iter_object(JsonStream(f))}
+    for record in _journal(directory, config.USERS_FILE).replay():
+        if record["op"] == "del":
+            users.pop(record["id"], None)
+        else:
+            users[record["id"]] = User.from_dict(record["data"])
+    yield from users.values()
+
+
+def find_users(directory: str, user_ids: Set[int]) -> Dict[int, User]:
+    """Пользователи с заданными id из каталога корзин users/ или из прежнего users.json"""
+    users = {}
+    store = _user_store(directory)
+    if store is not None:
+        for user_id in user_ids:
+            user = store.load(user_id)
+            if user is not None:
+                users[user_id] = user
+        return users
+
+    path = os.path.join(directory, os.path.basename(config.USERS_FILE))
+    if os.path.exists(path):
+        wanted = {str(user_id) for user_id in user_ids}
+        with open(path, 'rb') as f:
+            for key, data in iter_object(JsonStream(f)):
+                if key in wanted:
+                    users[int(key)] = User.from_dict(data)
+    return users
+
+
+def describe(report: DashboardReport, products: Dict[int, Product], users: Dict[int, User]) -> Dict[str, Any]:
+    """Показатели отчета с названиями товаров и именами покупателей"""
+    def product_entries(pairs) -> List[Dict[str, Any]]:
+        return [{"id": product_id, "name": products[product_id].name, "count": count,
+                 "unit": products[product_id].unit}
+                for product_id, count in pairs if product_id in products]
+
+    def username(user_id: int) -> Optional[str]:
+        user = users.get(user_id)
+        return user.username if user else None
+
+    return {
+        "generated_at": report.generated_at,
+        "popular_products": product_entries(report.popular_all_time),
+        "popular_by_period": {str(days): product_entries(pairs) for days, pairs in report.popular_products.items()},
+        "seasonal_products": {season: product_entries(pairs) for season, pairs in report.seasonal_products.items()},
+        "active_customers": [
+            {"id": user_id, "username": username(user_id), "order_count": count, "total_spent": total}
+            for user_id, count, total in report.active_customers],
+        "top_customers_by_amount": [
+            {"id": user_id, "username": username(user_id), "total_spent": total}
+            for user_id, total in report.top_customers_by_amount],
+        "top_customers_by_frequency": [
+            {"id": user_id, "username": username(user_id), "order_count": count}
+            for user_id, count in report.top_customers_by_frequency],
+    }
+
+
+def to_csv(analytics: Dict[str, Any]) -> str:
+    """Показатели отчета одной таблицей: строка на каждую позицию каждого показателя"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+
+    def write(metric: str, period: str, entries: List[Dict[str, Any]]) -> None:
+        for rank, entry in enumerate(entries, 1):
+            writer.writerow({
+                "metric": metric, "period": period, "rank": rank, "id": entry["id"],
+                "name": entry.get("name", entry.get("username")), "unit": entry.get("unit"),
+                "quantity": entry.get("count"), "order_count": entry.get("order_count"),
+                "total_spent": entry.get("total_spent"),
+            })
+
+    write("popular_products", "all", analytics["popular_products"])
+    for days, entries in analytics["popular_by_period"].items():
+        write("popular_products", f"{days}d", entries)
+    for season, entries in analytics["seasonal_products"].items():
+        write("seasonal_products", season, entries)
+    write("active_customers", "all", analytics["active_customers"])
+    write("top_customers_by_amount", "all", analytics["top_customers_by_amount"])
+    write("top_customers_by_frequency", "all", analytics["top_customers_by_frequency"])
+    return output.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отчет по аналитике магазина без запуска бота")
+    parser.add_argument("source", nargs="?", help="каталог данных, имя резервной копии или файл orders.json")
+    parser.add_argument("--format", choices=["json", "csv"], default="json", help="формат отчета")
+    parser.add_argument("--output", help="файл отчета (по умолчанию - стандартный вывод)")
+    parser.add_argument("--limit", type=int, default=10, help="количество позиций в каждом показателе")
+    parser.add_argument("--date", help="дата отчета YYYY-MM-DD (по умолчанию - сегодня)")
+    args = parser.parse_args()
+
+    directory = resolve_source(args.source)
+    now = datetime.combine(datetime.strptime(args.date, "%Y-%m-%d").date(), time.max) if args.date else None
+    products = load_products(directory)
+    sales, order_count = aggregate_orders(iter_orders(directory))
+    report = compute_dashboard(sales, set(products), now=now, limit=args.limit)
+    user_ids = {user_id for user_id, _ in report.top_customers_by_amount}
+    user_ids.update(user_id for user_id, _ in report.top_customers_by_frequency)
+    analytics = describe(report, products, find_users(directory, user_ids))
+
+    if args.format == "csv":
+        content = to_csv(analytics)
+    else:
+        analytics["source"] = directory
+        analytics["orders"] = order_count
+        content = codec.dumps_pretty(analytics).decode('utf-8')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        print(f"Отчет по {order_count} заказам из {directory} сохранен в {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Сравнение кодека хранения (codec) с прежней записью json.dumps(indent=2)
+на табличном снимке заказов.
+
+Запуск из корня проекта:
+    python benchmarks/bench_codec.py [количество заказов]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+from bench_models import make_orders
+from models import Order, encode_rows
+
+
+def timed(label: str, func, repeat: int = 3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<40} {best:8.3f} с")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    data = encode_rows(Order, make_orders(count))
+    print(f"Заказов: {count}, кодек: {codec.BACKEND}")
+
+    pretty = timed("json.dumps(indent=2)", lambda: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+    compact = timed(f"codec.dumps ({codec.BACKEND})", lambda: codec.dumps(data))
+    print(f"Размер: с отступами {len(pretty) / 2**20:.1f} МБ, компактно {len(compact) / 2**20:.1f} МБ")
+
+    timed("json.loads", lambda: json.loads(pretty))
+    timed(f"codec.loads ({codec.BACKEND})", lambda: codec.loads(compact))
+
+
+if __name__ == "__main__":
+    main()
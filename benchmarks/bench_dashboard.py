@@ -0,0 +1,108 @@
+"""
+Сбор показателей экрана аналитики из накопительных сумм продаж
+(dashboard.compute_dashboard) на синтетических заказах: заполнение сумм,
+построение отчета и сравнение с отдельным обходом заказов для каждого
+показателя (как было до накопительных сумм).
+
+Запуск из корня проекта:
+    python benchmarks/bench_dashboard.py [количество заказов] [заказов для сравнения]
+"""
+import heapq
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import SalesAggregates
+from dashboard import POPULAR_WINDOWS, SEASONS, compute_dashboard, window_start
+from models import CartItem, Order
+
+NOW = datetime(2025, 6, 1, 12, 0)
+PRODUCTS = 200
+USERS = 50000
+
+
+def iter_orders(count: int):
+    """Заказы за последние два года (генерируются по одному, без списка в памяти)"""
+    random.seed(1)
+    for i in range(1, count + 1):
+        created_at = NOW - timedelta(seconds=random.randint(0, 2 * 365 * 86400))
+        yield Order(id=i, user_id=random.randint(1, USERS),
+                    items=[CartItem(random.randint(1, PRODUCTS), random.randint(1, 5))
+                           for _ in range(random.randint(1, 8))],
+                    status=random.choice(["new", "processing", "completed", "cancelled"]),
+                    created_at=created_at.isoformat(), total=random.randint(100, 5000) / 1.0)
+
+
+def separate_scans(orders, known_products, limit: int = 10):
+    """Каждый показатель - отдельный обход всех заказов"""
+    def counted():
+        return (order for order in orders if order.status != "cancelled" and order.user_id)
+
+    def top_customers(index):
+        stats = {}
+        for order in counted():
+            value = stats.setdefault(order.user_id, [0.0, 0])
+            value[0] += order.total
+            value[1] += 1
+        return heapq.nlargest(limit, stats.items(), key=lambda item: item[1][index])
+
+    def popular(since=None, months=None):
+        quantities = {}
+        for order in counted():
+            created_at = datetime.fromisoformat(order.created_at)
+            if since is not None and created_at < since:
+                continue
+            if months is not None and created_at.month not in months:
+                continue
+            for item in order.items:
+                if item.product_id in known_products:
+                    quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        return heapq.nlargest(limit, quantities.items(), key=lambda item: item[1])
+
+    top_customers(0)
+    top_customers(1)
+    top_customers(1)
+    for days in POPULAR_WINDOWS:
+        popular(since=window_start(NOW, days))
+    popular()
+    for months in SEASONS.values():
+        popular(months=months)
+
+
+def timed(label: str, func, repeat: int = 3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<40} {best:8.3f} с")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    compare_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    known_products = set(range(1, PRODUCTS + 1)) - {PRODUCTS}  # один товар удален
+
+    sales = SalesAggregates()
+    start = time.perf_counter()
+    for order in iter_orders(count):
+        sales.add_order(order)
+    print(f"Заказов: {count}, заполнение накопительных сумм {time.perf_counter() - start:.1f} с")
+    timed("compute_dashboard", lambda: compute_dashboard(sales, known_products, NOW))
+
+    orders = list(iter_orders(compare_count))
+    small = SalesAggregates()
+    small.rebuild(orders)
+    print(f"\nСравнение на {compare_count} заказах")
+    timed("отдельный обход на каждый показатель", lambda: separate_scans(orders, known_products), repeat=1)
+    timed("compute_dashboard", lambda: compute_dashboard(small, known_products, NOW))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Стоимость показа клавиатуры (построение и сериализация reply_markup в JSON,
+как при каждом send_message/edit_message_text): заново при каждом показе
+против готовых клавиатур с заранее сериализованным JSON (keyboards.PrebuiltMarkup).
+
+Запускается на пустом временном каталоге данных, каталог товаров синтетический.
+
+Запуск из корня проекта:
+    python benchmarks/bench_keyboards.py [товаров в категории] [показов]
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Каталог данных задан относительным путем: база создается во временном каталоге
+WORK_DIR = tempfile.mkdtemp(prefix="bench_keyboards_")
+os.chdir(WORK_DIR)
+atexit.register(shutil.rmtree, WORK_DIR, True)
+
+import keyboards
+from database import db
+from telebot import types
+
+USER_ID = 1
+
+
+def timed(label: str, render, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        render()
+    per_render = (time.perf_counter() - start) / count * 1e6
+    print(f"{label:<50} {per_render:9.1f} мкс")
+    return per_render
+
+
+def uncached(render):
+    """Показ без готовых клавиатур: клавиатура строится и сериализуется заново"""
+    def run():
+        keyboards._static_keyboards.clear()
+        keyboards._catalog_keyboards.clear()
+        markup = render()
+        return types.InlineKeyboardMarkup.to_json(markup)
+    return run
+
+
+def cached(render):
+    return lambda: render().to_json()
+
+
+def main():
+    product_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    for c in range(8):
+        db.add_category(f"Категория {c}")
+    category = db.add_category("Фрукты")
+    for i in range(product_count):
+        db.add_product(f"Товар {product_count - i:03d}", category.id, 10.0 + i * 1.5, "кг")
+    user = db.get_user(USER_ID)
+    user.add_to_cart(db.get_products(category.id)[0].id, 2)
+    db.update_user(USER_ID)
+
+    cases = [
+        ("главная администратора", keyboards.get_admin_main_keyboard),
+        ("время доставки", keyboards.get_delivery_time_keyboard),
+        ("ввод телефона", keyboards.get_phone_input_keyboard),
+        ("главная покупателя с корзиной", lambda: keyboards.get_customer_main_keyboard_with_cart(USER_ID)),
+        (f"товары категории ({product_count}) с корзиной",
+         lambda: keyboards.get_products_by_category_keyboard(category.id, USER_ID)),
+    ]
+    print(f"Показов: {count}\n")
+    for label, render in cases:
+        assert cached(render)() == uncached(render)(), label
+        before = timed(f"{label}: заново", uncached(render), count)
+        after = timed(f"{label}: готовая", cached(render), count)
+        print(f"{'':<50} x{before / after:.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Сравнение памяти и скорости (де)сериализации заказов: классы со __slots__
+и табличный формат (encode_rows/decode_rows) против обычных классов
+и списка словарей.
+
+Запуск из корня проекта:
+    python benchmarks/bench_models.py [количество заказов]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import CartItem, Order, decode_rows, encode_rows
+
+# Те же классы без __slots__ (как до перехода на __slots__)
+PlainCartItem = type("PlainCartItem", (), {"__init__": CartItem.__init__})
+PlainOrder = type("PlainOrder", (), {"__init__": Order.__init__})
+
+
+def make_orders(count: int):
+    random.seed(1)
+    return [
+        Order(id=i, user_id=random.randint(1, 10000),
+              items=[CartItem(random.randint(1, 200), random.randint(1, 5)) for _ in range(random.randint(1, 8))],
+              status=random.choice(["new", "processing", "completed", "cancelled"]),
+              created_at="2025-05-12T10:00:00", phone="+79990000000", address="ул. Ленина, 1",
+              total=random.randint(100, 5000) / 1.0)
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(label: str, func):
+    """Время выполнения и (отдельным запуском под tracemalloc) занимаемая результатом память"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<42} {elapsed:8.3f} с  память {current / 2**20:8.1f} МБ  пик {peak / 2**20:8.1f} МБ")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    orders = make_orders(count)
+    legacy_text = json.dumps([order.to_dict() for order in orders], ensure_ascii=False)
+    rows_text = json.dumps(encode_rows(Order, orders), ensure_ascii=False)
+    print(f"Заказов: {count}, размер JSON: словари {len(legacy_text) / 2**20:.1f} МБ, "
+          f"таблица {len(rows_text) / 2**20:.1f} МБ")
+
+    def load_plain():
+        return [PlainOrder(id=item["id"], user_id=item["user_id"],
+                           items=[PlainCartItem(i["product_id"], i["quantity"]) for i in item["items"]],
+                           status=item["status"], created_at=item["created_at"], phone=item["phone"],
+                           address=item["address"], delivery_time=item["delivery_time"], total=item["total"])
+                for item in json.loads(legacy_text)]
+
+    plain = measure("загрузка: словари -> обычные классы", load_plain)
+    del plain
+    slotted = measure("загрузка: словари -> __slots__", lambda: decode_rows(Order, json.loads(legacy_text)))
+    del slotted
+    slotted = measure("загрузка: таблица -> __slots__", lambda: decode_rows(Order, json.loads(rows_text)))
+
+    measure("сохранение: to_dict", lambda: json.dumps([order.to_dict() for order in slotted], ensure_ascii=False))
+    measure("сохранение: encode_rows", lambda: json.dumps(encode_rows(Order, slotted), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
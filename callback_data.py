@@ -0,0 +1,168 @@
+"""
+Компактный формат callback_data inline-кнопок.
+
+Кнопка с параметрами кодируется как код действия и аргументы через ":":
+"ca:9ix:6y" - добавить в корзину товар 12345 в количестве 0.25. Целые числа
+записываются в системе счисления по основанию 36, дробные - как целое число
+тысячных, строки - как есть (без ":"). Так callback_data укладывается в
+ограничение Telegram в 64 байта при любых id, а разбор - один split и
+преобразование аргументов по типам действия.
+
+Кнопки без параметров ("back", "cart", "admin_orders") остаются строками,
+действием считается сама строка. Кнопки в формате до перехода на коды
+("add_to_cart_12345_0.25") в уже отправленных сообщениях распознаются по
+самому длинному известному префиксу.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+
+# Ограничение Telegram на длину callback_data (в байтах)
+MAX_LENGTH = 64
+
+SEPARATOR = ":"
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _encode_int(value: int) -> str:
+    value = int(value)
+    if value < 0:
+        return "-" + _encode_int(-value)
+    if value < 36:
+        return _DIGITS[value]
+    digits = []
+    while value:
+        value, digit = divmod(value, 36)
+        digits.append(_DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def _decode_int(text: str) -> int:
+    return int(text, 36)
+
+
+def _encode_decimal(value: float) -> str:
+    return _encode_int(round(value * 1000))
+
+
+def _decode_decimal(text: str) -> float:
+    return int(text, 36) / 1000
+
+
+def _encode_str(value: str) -> str:
+    value = str(value)
+    if SEPARATOR in value:
+        raise ValueError(f"Строковый аргумент callback_data не может содержать '{SEPARATOR}': {value}")
+    return value
+
+
+# Типы аргументов: (кодирование, разбор нового формата, разбор прежнего формата)
+_TYPES: Dict[type, Tuple[Callable[[Any], str], Callable[[str], Any], Callable[[str], Any]]] = {
+    int: (_encode_int, _decode_int, int),
+    float: (_encode_decimal, _decode_decimal, float),
+    str: (_encode_str, str, str),
+}
+
+
+class Action:
+    """Действие кнопки: имя, короткий код, типы аргументов и префикс прежнего формата"""
+
+    __slots__ = ("name", "code", "types", "legacy_prefix")
+
+    def __init__(self, name: str, code: str, types: Tuple[type, ...], legacy_prefix: str):
+        self.name = name
+        self.code = code
+        self.types = types
+        self.legacy_prefix = legacy_prefix
+
+
+ACTIONS = [
+    # Выбор режима: аргумент "customer" или "admin"
+    Action("mode", "m", (str,), "mode_"),
+    # Покупатель
+    Action("category", "c", (int,), "category_"),
+    Action("product", "p", (int,), "product_"),
+    Action("add_favorite", "fa", (int,), "add_favorite_"),
+    Action("remove_favorite", "fr", (int,), "remove_favorite_"),
+    Action("add_to_cart", "ca", (int, float), "add_to_cart_"),
+    Action("remove_from_cart", "cr", (int,), "remove_from_cart_"),
+    Action("custom_quantity", "cq", (int,), "custom_quantity_"),
+    Action("phone_digit", "d", (int,), "phone_digit_"),
+    # Заказы
+    Action("view_order", "o", (int,), "view_order_"),
+    Action("complete_order", "oc", (int,), "complete_order_"),
+    Action("reopen_order", "or", (int,), "reopen_order_"),
+    Action("filter_orders", "of", (str,), "filter_orders_"),
+    Action("sort_orders", "os", (str,), "sort_orders_"),
+    Action("page_size", "ps", (int,), "page_size_"),
+    # Администратор
+    Action("edit_category", "ec", (int,), "edit_category_"),
+    Action("delete_category", "dc", (int,), "delete_category_"),
+    Action("product_category", "pc", (int,), "product_category_"),
+    Action("edit_category_products", "ecp", (int,), "edit_category_products_"),
+    Action("delete_category_products", "dcp", (int,), "delete_category_products_"),
+    Action("edit_product", "ep", (int,), "edit_product_"),
+    Action("edit_product_name", "epn", (int,), "edit_product_name_"),
+    Action("edit_product_price", "epp", (int,), "edit_product_price_"),
+    Action("edit_product_image", "epi", (int,), "edit_product_image_"),
+    Action("edit_product_available", "epa", (int,), "edit_product_available_"),
+    Action("delete_product", "dp", (int,), "delete_product_"),
+    Action("confirm_delete_product", "cdp", (int,), "confirm_delete_product_"),
+    # Аргумент "kg" или "piece"
+    Action("unit", "u", (str,), "unit_"),
+    Action("load_backup", "b", (str,), "load_backup_"),
+]
+
+_BY_NAME = {action.name: action for action in ACTIONS}
+_BY_CODE = {action.code: action for action in ACTIONS}
+_BY_LEGACY_PREFIX = {action.legacy_prefix: action for action in ACTIONS}
+
+
+def encode(name: str, *args: Any) -> str:
+    """callback_data действия name с аргументами args"""
+    action = _BY_NAME[name]
+    if len(args) != len(action.types):
+        raise ValueError(f"Действие {name} принимает {len(action.types)} аргумент(а), передано {len(args)}")
+    data = SEPARATOR.join([action.code] + [_TYPES[kind][0](arg) for kind, arg in zip(action.types, args)])
+    if len(data.encode('utf-8')) > MAX_LENGTH:
+        raise ValueError(f"callback_data длиннее {MAX_LENGTH} байт: {data}")
+    return data
+
+
+def parse(data: str) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Действие и аргументы кнопки. Для кнопок без параметров действие - сама
+    строка, аргументов нет. ValueError - данные не соответствуют действию.
+    """
+    if SEPARATOR in data:
+        parts = data.split(SEPARATOR)
+        action = _BY_CODE.get(parts[0])
+        if action is None or len(parts) != len(action.types) + 1:
+            raise ValueError(f"Неизвестный формат callback_data: {data}")
+        return action.name, tuple(_TYPES[kind][1](text) for kind, text in zip(action.types, parts[1:]))
+    return _parse_legacy(data)
+
+
+def _parse_legacy(data: str) -> Tuple[str, Tuple[Any, ...]]:
+    # Самый длинный префикс до "_", которому соответствует действие
+    end = data.rfind("_")
+    while end >= 0:
+        action = _BY_LEGACY_PREFIX.get(data[:end + 1])
+        if action is not None:
+            rest = data[end + 1:]
+            # Последний строковый аргумент может содержать "_" (имена резервных копий)
+            parts: List[str] = rest.split("_", len(action.types) - 1) if rest else []
+            if len(parts) != len(action.types):
+                raise ValueError(f"Неизвестный формат callback_data: {data}")
+            return action.name, tuple(_TYPES[kind][2](text) for kind, text in zip(action.types, parts))
+        end = data.rfind("_", 0, end)
+    return data, ()
+
+
+def action_of(data: str) -> str:
+    """Только действие кнопки (для выбора обработчика)"""
+    return parse(data)[0]
+
+
+def args(data: str) -> Tuple[Any, ...]:
+    """Только аргументы кнопки"""
+    return parse(data)[1]
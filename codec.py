@@ -0,0 +1,78 @@
+"""
+Кодек JSON для хранения данных.
+
+Использует самый быстрый из установленных кодировщиков: orjson, msgspec
+или стандартный модуль json. Явно заданный JSON_CODEC проверяется при импорте:
+неизвестное значение - ValueError, неустановленный пакет - ImportError.
+Файлы данных пишутся компактно (без отступов), человекочитаемый вид
+с отступами - только для экспорта (dumps_pretty).
+Все функции работают с байтами в UTF-8, ошибки разбора - ValueError.
+"""
+import json
+from typing import Any, Union
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+_BACKENDS = {"orjson": orjson, "msgspec": msgspec, "json": json}
+
+
+def _select_backend() -> str:
+    if config.JSON_CODEC != "auto":
+        if config.JSON_CODEC not in _BACKENDS:
+            raise ValueError(f"Неизвестный кодек JSON_CODEC={config.JSON_CODEC!r}: "
+                             f"допустимы auto, {', '.join(_BACKENDS)}")
+        if _BACKENDS[config.JSON_CODEC] is None:
+            raise ImportError(f"JSON_CODEC={config.JSON_CODEC} требует пакет {config.JSON_CODEC}: "
+                              f"pip install {config.JSON_CODEC}", name=config.JSON_CODEC)
+        return config.JSON_CODEC
+    if orjson is not None:
+        return "orjson"
+    if msgspec is not None:
+        return "msgspec"
+    return "json"
+
+
+BACKEND = _select_backend()
+
+if BACKEND == "orjson":
+    def dumps(data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(content: Union[bytes, str]) -> Any:
+        return orjson.loads(content)
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(data: Any) -> bytes:
+        return _encoder.encode(data)
+
+    def loads(content: Union[bytes, str]) -> Any:
+        try:
+            return _decoder.decode(content)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+else:
+    def dumps(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(content: Union[bytes, str]) -> Any:
+        return json.loads(content)
+
+
+def dumps_pretty(data: Any) -> bytes:
+    """Человекочитаемый JSON с отступами (для экспорта данных)"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
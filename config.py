@@ -14,9 +14,66 @@ ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "0"))  # Временная за
 DATA_DIR = "data"
 CATEGORIES_FILE = os.path.join(DATA_DIR, "categories.json")
 PRODUCTS_FILE = os.path.join(DATA_DIR, "products.json")
-USERS_FILE = os.path.join(DATA_DIR, "users.json")
+USERS_FILE = os.path.join(DATA_DIR, "users.json")  # Прежний формат, переносится в USERS_DIR
+USERS_DIR = os.path.join(DATA_DIR, "users")  # Файлы-корзины пользователей
 ORDERS_FILE = os.path.join(DATA_DIR, "orders.json")
+SEQUENCES_FILE = os.path.join(DATA_DIR, "sequences.json")  # Счетчики id
 BACKUP_DIR = os.path.join(DATA_DIR, "backups")
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")  # Архив завершенных заказов по месяцам
+
+# Кодек JSON: "auto" (orjson, msgspec или стандартный json - что установлено),
+# либо явно "orjson", "msgspec" или "json"
+JSON_CODEC = os.getenv("JSON_CODEC", "auto")
+
+# Хранилище данных: "json" (файлы в DATA_DIR) или "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SQLITE_FILE = os.path.join(DATA_DIR, "bot.sqlite3")
+
+# Режим журнала: мутации дописываются в журнал коллекции (<файл>.log)
+# вместо полной перезаписи JSON-файла
+JOURNAL_MODE = os.getenv("JOURNAL_MODE", "0") == "1"
+# Количество записей в журнале, после которого снимок коллекции перезаписывается
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv("JOURNAL_COMPACT_THRESHOLD", "1000"))
+
+# Отложенная запись: изменения сохраняются фоновым потоком не чаще раза
+# в указанное количество миллисекунд (0 - сохранять сразу)
+WRITE_BEHIND_MS = int(os.getenv("WRITE_BEHIND_MS", "0"))
+
+# Количество файлов-корзин пользователей (не изменять после создания данных)
+USER_BUCKETS = 64
+# Перенос пользователей из users.json прежних версий в файлы-корзины при запуске.
+# По умолчанию выключен (0): пока перенос не включен явно, пользователи хранятся
+# в users.json и прежняя версия бота может их прочитать
+USER_BUCKETS_MIGRATE = os.getenv("USER_BUCKETS_MIGRATE", "0") == "1"
+# Кэш пользователей: максимальный размер и время хранения без обращений (в секундах)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "1800"))
+
+# Загрузка истории заказов в фоновом потоке: бот отвечает покупателям сразу
+# после запуска, операции с заказами ждут окончания загрузки
+ORDERS_BACKGROUND_LOAD = os.getenv("ORDERS_BACKGROUND_LOAD", "1") == "1"
+# Шаг записи прогресса загрузки заказов в лог (количество заказов)
+ORDERS_LOAD_PROGRESS_STEP = 100000
+# Архив заказов: выполненные и отмененные заказы старше указанного количества
+# дней переносятся из рабочих заказов в сжатые файлы по месяцам. По умолчанию
+# выключено (0): архивирование включается явно, например ORDERS_ARCHIVE_DAYS=180
+ORDERS_ARCHIVE_DAYS = int(os.getenv("ORDERS_ARCHIVE_DAYS", "0"))
+
+# Время хранения рассчитанных показателей аналитики (в секундах, 0 - без кэша)
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+
+# Количество потоков обработки обновлений бота
+BOT_NUM_THREADS = int(os.getenv("BOT_NUM_THREADS", "2"))
+
+# Режим webhook (запуск через gunicorn): внешний адрес сервера, например
+# https://bot.example.com (пусто - бот опрашивает Telegram), путь приема
+# обновлений и секрет, который Telegram передает в заголовке запроса (пусто -
+# случайный секрет на время работы процесса)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Количество потоков gunicorn, принимающих запросы
+WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
 
 # Создание директорий, если они не существуют
 os.makedirs(DATA_DIR, exist_ok=True)
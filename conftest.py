@@ -0,0 +1,61 @@
+"""
+Общие настройки тестов pytest.
+
+Пути к файлам данных в config заданы относительно рабочего каталога
+("data/..."), а при импорте database создается глобальная база. Чтобы тесты
+не читали и не изменяли данные бота, рабочий каталог заменяется временным,
+а каждый тест получает свой каталог данных (фикстура data_dir).
+"""
+import os
+import tempfile
+
+os.chdir(tempfile.mkdtemp(prefix="bot-tests-"))
+
+import pytest
+
+import config
+
+# Ручные проверки бота (запускаются с BOT_TOKEN как скрипты), а не тесты pytest
+collect_ignore = ["test_admin.py", "test_bot.py", "test_import.py"]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Пустой каталог данных теста: все пути config указывают в него"""
+    directory = str(tmp_path / "data")
+    prefix = config.DATA_DIR + os.sep
+    for name in dir(config):
+        value = getattr(config, name)
+        if isinstance(value, str) and value.startswith(prefix):
+            monkeypatch.setattr(config, name, os.path.join(directory, value[len(prefix):]))
+    monkeypatch.setattr(config, "DATA_DIR", directory)
+    os.makedirs(config.BACKUP_DIR)
+
+    # Настройки по умолчанию не зависят от переменных окружения
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(config, "JOURNAL_MODE", False)
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 0)
+    monkeypatch.setattr(config, "USER_BUCKETS_MIGRATE", False)
+    monkeypatch.setattr(config, "ORDERS_BACKGROUND_LOAD", False)
+    monkeypatch.setattr(config, "ORDERS_ARCHIVE_DAYS", 0)
+    return directory
+
+
+@pytest.fixture
+def open_db(data_dir):
+    """Открытие базы (Database) над каталогом data_dir; журналы закрываются после теста"""
+    from database import Database
+
+    databases = []
+
+    def open_db():
+        database = Database()
+        database.wait_orders_loaded()
+        databases.append(database)
+        return database
+
+    yield open_db
+    for database in databases:
+        database.flush()
+        for journal in database._journals.values():
+            journal.close()
@@ -0,0 +1,125 @@
+"""
+Показатели экрана аналитики.
+
+Топ покупателей по сумме и по частоте заказов, активные покупатели,
+популярные товары за несколько периодов и за все время, популярные товары
+по сезонам собираются из накопительных сумм продаж (analytics.SalesAggregates),
+которые обновляются при каждом заказе, без обхода заказов. Результат -
+DashboardReport, который показывает админ-панель и выгружает экспорт.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from analytics import SalesAggregates
+
+# Периоды популярности товаров (календарные дни, включая сегодняшний)
+POPULAR_WINDOWS = (7, 30, 90, 365)
+
+SEASONS = {
+    "winter": (12, 1, 2),
+    "spring": (3, 4, 5),
+    "summer": (6, 7, 8),
+    "autumn": (9, 10, 11),
+}
+SEASON_OF_MONTH = {month: season for season, months in SEASONS.items() for month in months}
+
+
+def window_start(now: datetime, days: int) -> datetime:
+    """Начало периода из days календарных дней, заканчивающегося now"""
+    return datetime.combine((now - timedelta(days=days - 1)).date(), time())
+
+
+def _top(values: Dict[int, float], limit: int) -> List[Tuple[int, float]]:
+    # При равных значениях - по возрастанию id, чтобы результат не зависел от порядка группировки
+    return heapq.nlargest(limit, values.items(), key=lambda item: (item[1], -item[0]))
+
+
+class DashboardReport:
+    """Все показатели экрана аналитики на момент generated_at"""
+
+    __slots__ = ("generated_at", "limit", "top_customers_by_amount", "top_customers_by_frequency",
+                 "active_customers", "popular_products", "popular_all_time", "seasonal_products")
+
+    def __init__(self, generated_at: str, limit: int,
+                 top_customers_by_amount: List[Tuple[int, float]],
+                 top_customers_by_frequency: List[Tuple[int, int]],
+                 active_customers: List[Tuple[int, int, float]],
+                 popular_products: Dict[int, List[Tuple[int, float]]],
+                 popular_all_time: List[Tuple[int, float]],
+                 seasonal_products: Dict[str, List[Tuple[int, float]]]):
+        self.generated_at = generated_at
+        self.limit = limit
+        self.top_customers_by_amount = top_customers_by_amount  # [(user_id, сумма)]
+        self.top_customers_by_frequency = top_customers_by_frequency  # [(user_id, количество заказов)]
+        self.active_customers = active_customers  # [(user_id, количество заказов, сумма)]
+        self.popular_products = popular_products  # дней -> [(product_id, количество)]
+        self.popular_all_time = popular_all_time  # [(product_id, количество)]
+        self.seasonal_products = seasonal_products  # сезон -> [(product_id, количество)]
+
+    @classmethod
+    def build(cls, now: datetime, limit: int,
+              customers: Dict[int, Tuple[float, int]],
+              product_totals: Dict[int, float],
+              window_totals: Dict[int, Dict[int, float]],
+              season_totals: Dict[str, Dict[int, float]]) -> 'DashboardReport':
+        """Отбор первых limit позиций каждого показателя из сгруппированных сумм"""
+        by_amount = heapq.nlargest(limit, customers.items(), key=lambda item: (item[1][0], -item[0]))
+        by_count = heapq.nlargest(limit, customers.items(), key=lambda item: (item[1][1], item[1][0], -item[0]))
+        return cls(
+            generated_at=now.isoformat(),
+            limit=limit,
+            top_customers_by_amount=[(user_id, total) for user_id, (total, count) in by_amount],
+            top_customers_by_frequency=[(user_id, count) for user_id, (total, count) in by_count],
+            active_customers=[(user_id, count, total) for user_id, (total, count) in by_count],
+            popular_products={days: _top(totals, limit) for days, totals in window_totals.items()},
+            popular_all_time=_top(product_totals, limit),
+            seasonal_products={season: _top(totals, limit) for season, totals in season_totals.items()},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        def products(pairs: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+            return [{"product_id": product_id, "quantity": quantity} for product_id, quantity in pairs]
+
+        return {
+            "generated_at": self.generated_at,
+            "limit": self.limit,
+            "top_customers_by_amount": [
+                {"user_id": user_id, "total_spent": total} for user_id, total in self.top_customers_by_amount],
+            "top_customers_by_frequency": [
+                {"user_id": user_id, "order_count": count} for user_id, count in self.top_customers_by_frequency],
+            "active_customers": [
+                {"user_id": user_id, "order_count": count, "total_spent": total}
+                for user_id, count, total in self.active_customers],
+            "popular_products": {str(days): products(pairs) for days, pairs in self.popular_products.items()},
+            "popular_all_time": products(self.popular_all_time),
+            "seasonal_products": {season: products(pairs) for season, pairs in self.seasonal_products.items()},
+        }
+
+
+def compute_dashboard(sales: SalesAggregates, known_products: Set[int], now: Optional[datetime] = None,
+                      limit: int = 10, windows: Iterable[int] = POPULAR_WINDOWS) -> DashboardReport:
+    """
+    Показатели по накопительным суммам продаж: время расчета зависит от
+    количества товаров и дней в периодах, а не от количества заказов.
+
+    Отмененные заказы (не входят в суммы), удаленные товары (не входящие
+    в known_products) и заказы без покупателя не учитываются.
+    """
+    now = now or datetime.now()
+
+    def known(quantities: Dict[int, float]) -> Dict[int, float]:
+        return {product_id: quantity for product_id, quantity in quantities.items() if product_id in known_products}
+
+    customers = {user_id: stats for user_id, stats in sales.customer_stats().items() if user_id}
+    window_totals = {days: known(sales.product_quantities(window_start(now, days).date().isoformat()))
+                     for days in windows}
+    by_month = sales.quantities_by_month_of_year()
+    season_totals = {}
+    for season, months in SEASONS.items():
+        totals = {}
+        for month in months:
+            for product_id, quantity in by_month.get(month, {}).items():
+                totals[product_id] = totals.get(product_id, 0) + quantity
+        season_totals[season] = known(totals)
+    return DashboardReport.build(now, limit, customers, known(sales.product_quantities()), window_totals, season_totals)
@@ -1,99 +1,622 @@
-import json
+import atexit
+import heapq
+import logging
 import os
 import shutil
-from datetime import datetime
-from typing import List, Dict, Optional, Union, Any
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterator, Optional, Tuple, Union, Any
 
+import codec
 import config
-from models import Category, Product, User, Order, CartItem
+from analytics import SalesAggregates
+from dashboard import DashboardReport, compute_dashboard, window_start
+from journal import Journal
+from json_stream import JsonStream
+from order_archive import ARCHIVE_STATUSES, OrderArchive, fsync_directory
+from models import Category, Product, User, Order, CartItem, decode_rows, encode_rows, iter_rows
+from user_store import UserFile, UserStore
+
+# Коллекции в порядке захвата блокировок (во избежание взаимных блокировок)
+COLLECTIONS = ("categories", "products", "users", "orders")
+
+# Пользователь, к которому обращались в последние секунды, не вытесняется из кэша,
+# даже если кэш переполнен: обработчик может еще изменять полученный объект
+USER_EVICTION_GRACE = 60
+
+def _replace_atomic(path: str, write) -> None:
+    """
+    Атомарная запись файла: содержимое пишется во временный файл в том же
+    каталоге, сбрасывается на диск (fsync) и заменяет целевой файл через rename.
+    При сбое во время записи на диске остается либо старая, либо новая версия.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(directory)
+
+def encode_json(data: Any) -> bytes:
+    return codec.dumps(data)
+
+def write_bytes_atomic(path: str, content: bytes) -> None:
+    """Атомарная запись содержимого в файл"""
+    _replace_atomic(path, lambda f: f.write(content))
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Атомарная запись данных в JSON-файл"""
+    write_bytes_atomic(path, encode_json(data))
+
+def copy_file_atomic(source: str, target: str) -> None:
+    """Атомарная замена файла копией"""
+    def write(f):
+        with open(source, 'rb') as src:
+            shutil.copyfileobj(src, f)
+    _replace_atomic(target, write)
+    shutil.copystat(source, target)
+
+def read_json_file(path: str, expected_type: Union[type, Tuple[type, ...]]) -> Any:
+    """Чтение JSON-файла с проверкой типа корневого элемента"""
+    with open(path, 'rb') as f:
+        data = codec.loads(f.read())
+    if not isinstance(data, expected_type):
+        expected = expected_type if isinstance(expected_type, tuple) else (expected_type,)
+        raise ValueError(f"ожидался {' или '.join(t.__name__ for t in expected)}, получен {type(data).__name__}")
+    return data
 
 class Database:
     def __init__(self):
         self._categories = []
         self._products = []
-        self._users = {}  # user_id -> User
+        self._users = {}  # Кэш пользователей: user_id -> User
+        self._user_access = {}  # user_id -> время последнего обращения (time.monotonic)
+        self._transient_users = set()  # id новых пользователей, еще не сохраненных на диск
+        self._last_user_eviction = time.monotonic()
         self._orders = []
-        self._load_data()
+        # Индексы по id, поддерживаются при каждом изменении коллекций
+        self._categories_by_id = {}  # category_id -> Category
+        self._products_by_id = {}  # product_id -> Product
+        self._orders_by_id = {}  # order_id -> Order
+        # Вторичные индексы
+        self._products_by_category = {}  # category_id -> {product_id: Product}
+        self._orders_by_user = {}  # user_id -> [Order]
+        self._orders_by_status = {}  # status -> {order_id: Order}
+        # Накопительные показатели продаж (по ним строится экран аналитики)
+        self._sales = SalesAggregates()
+        # Номер версии заказов (меняется при создании заказа и смене статуса)
+        # и кэш показателей аналитики: (ключ, время расчета, DashboardReport)
+        self._orders_version = 0
+        self._dashboard_cache = None
+        self._dashboard_lock = threading.Lock()
+        # Номер версии каталога (меняется при любом изменении категорий и товаров),
+        # по нему сбрасываются готовые клавиатуры каталога
+        self._catalog_version = 0
+        # Блокировки коллекций: изменения данных и их сериализация
+        self._locks = {collection: threading.RLock() for collection in COLLECTIONS}
+        # Блокировки записи снимков на диск и номера снимков для упорядочивания записи
+        self._io_locks = {collection: threading.Lock() for collection in COLLECTIONS}
+        self._snapshot_seq = {collection: 0 for collection in COLLECTIONS}
+        self._written_seq = {collection: 0 for collection in COLLECTIONS}
+        # Последние выданные id коллекций
+        self._sequences = {"categories": 0, "products": 0, "orders": 0}
+        self._id_lock = threading.Lock()
+        self._journals = {
+            "categories": Journal(config.CATEGORIES_FILE + ".log"),
+            "products": Journal(config.PRODUCTS_FILE + ".log"),
+            "users": Journal(config.USERS_FILE + ".log"),
+            "orders": Journal(config.ORDERS_FILE + ".log"),
+        }
+        self._savers = {
+            "categories": self._save_categories,
+            "products": self._save_products,
+            "users": self._save_users,
+            "orders": self._save_orders,
+        }
+        # Отложенная запись: (коллекция, id) -> измененная запись (None - удаление)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flusher = None
+        self._bucket_store = UserStore(config.USERS_DIR, config.USER_BUCKETS,
+                                       self._read_snapshot, write_json_atomic)
+        # Хранилище пользователей: корзины или users.json до переноса (см. _load_users)
+        self._user_store = self._bucket_store
+        # Архив завершенных заказов: в памяти только их позиции для аналитики
+        self._archive = OrderArchive(config.ARCHIVE_DIR)
+        self._archived_live = set()  # id заказов, уже записанных в архив, но еще не удаленных из рабочих
+        self._archived_max_id = 0
+        if config.WRITE_BEHIND_MS > 0:
+            atexit.register(self.flush)
+        # Заказы могут загружаться в фоне: до окончания загрузки операции с заказами ждут
+        self._orders_loaded = threading.Event()
+        self._load_data(background_orders=config.ORDERS_BACKGROUND_LOAD)
+    
+    @contextmanager
+    def _locked(self, *collections: str):
+        """
+        Захват блокировок нескольких коллекций в фиксированном порядке
+        (заказы - после окончания их фоновой загрузки)
+        """
+        if "orders" in collections:
+            self._orders_loaded.wait()
+        with ExitStack() as stack:
+            for collection in COLLECTIONS:
+                if collection in collections:
+                    stack.enter_context(self._locks[collection])
+            yield
     
-    def _load_data(self) -> None:
-        """Загрузка данных из файлов"""
-        self._load_categories()
-        self._load_products()
-        self._load_users()
-        self._load_orders()
+    def _allocate_id(self, collection: str) -> int:
+        """Выдача следующего id коллекции; id не переиспользуются после удаления"""
+        with self._id_lock:
+            self._sequences[collection] += 1
+            return self._sequences[collection]
+    
+    def _load_data(self, background_orders: bool = False) -> None:
+        """
+        Загрузка данных из файлов. С background_orders каталог и пользователи
+        загружаются сразу, а история заказов - в фоновом потоке: бот начинает
+        отвечать покупателям, не дожидаясь разбора всех заказов.
+        """
+        self._orders_loaded.clear()
+        background_orders = background_orders and os.path.exists(config.ORDERS_FILE)
+        # Блокировки берутся напрямую: _locked ждал бы окончания загрузки заказов
+        with ExitStack() as stack:
+            for collection in COLLECTIONS:
+                stack.enter_context(self._locks[collection])
+            self._load_categories()
+            self._load_products()
+            self._load_users()
+            if background_orders:
+                self._orders = []
+            else:
+                self._load_orders()
+            self._rebuild_indexes(with_archive=not background_orders)
+            self._load_sequences()
+        
+        if background_orders:
+            threading.Thread(target=self._load_orders_background, name="orders-loader", daemon=True).start()
+        else:
+            self._orders_loaded.set()
+            self.archive_orders()
+    
+    def _load_orders_background(self) -> None:
+        logger = logging.getLogger(__name__)
+        started = time.monotonic()
+        try:
+            orders = self._read_orders(progress=True)
+            with self._locks["orders"]:
+                self._orders = self._replay_journal("orders", orders, Order)
+                self._rebuild_order_indexes()
+            self._load_sequences()
+            logger.info(f"Заказы загружены: {len(self._orders)} за {time.monotonic() - started:.1f} с")
+        except Exception as e:
+            logger.error(f"Ошибка фоновой загрузки заказов: {e}")
+        finally:
+            self._orders_loaded.set()
+        self.archive_orders()
+    
+    def wait_orders_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание окончания загрузки заказов; False - не дождались за timeout секунд"""
+        return self._orders_loaded.wait(timeout)
+    
+    def _rebuild_indexes(self, with_archive: bool = True) -> None:
+        """Построение индексов по id после загрузки или восстановления данных"""
+        self._catalog_version += 1
+        self._categories_by_id = {category.id: category for category in self._categories}
+        self._products_by_id = {product.id: product for product in self._products}
+        
+        self._products_by_category = {}
+        for product in self._products:
+            self._products_by_category.setdefault(product.category_id, {})[product.id] = product
+        self._rebuild_order_indexes(with_archive)
+    
+    def _rebuild_order_indexes(self, with_archive: bool = True) -> None:
+        """Индексы рабочих заказов и аналитика по всей истории, включая архив"""
+        self._orders_version += 1
+        self._orders_by_id = {order.id: order for order in self._orders}
+        self._orders_by_user = {}
+        self._orders_by_status = {}
+        for order in self._orders:
+            self._index_order(order)
+        
+        self._sales.clear()
+        self._archived_live = set()
+        self._archived_max_id = 0
+        if with_archive:
+            for order in self._archived_orders():
+                self._archived_max_id = max(self._archived_max_id, order.id)
+                # Сбой между записью в архив и удалением из рабочих заказов
+                if order.id in self._orders_by_id:
+                    self._archived_live.add(order.id)
+                    continue
+                self._sales.add_order(order)
+        for order in self._orders:
+            self._sales.add_order(order)
+    
+    def _archived_orders(self) -> Iterator[Order]:
+        return self._archive.iter_orders()
+    
+    def archive_orders(self, older_than_days: Optional[int] = None) -> int:
+        """
+        Перенос в архив завершенных и отмененных заказов старше older_than_days
+        дней (по умолчанию ORDERS_ARCHIVE_DAYS, 0 - не переносить). Заказы
+        сначала дописываются в архив и только потом удаляются из рабочих;
+        их позиции остаются в аналитике. Возвращает количество заказов.
+        """
+        days = config.ORDERS_ARCHIVE_DAYS if older_than_days is None else older_than_days
+        if days <= 0:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        with self._locked("orders"):
+            archived = [order for order in self._orders
+                        if order.status in ARCHIVE_STATUSES and (order.created_at or "") < cutoff]
+            if not archived:
+                return 0
+            self._archive.append(order for order in archived if order.id not in self._archived_live)
+            
+            ids = {order.id for order in archived}
+            self._orders = [order for order in self._orders if order.id not in ids]
+            for order in archived:
+                del self._orders_by_id[order.id]
+                self._orders_by_status.get(order.status, {}).pop(order.id, None)
+                self._archived_max_id = max(self._archived_max_id, order.id)
+            for user_id in {order.user_id for order in archived}:
+                remaining = [order for order in self._orders_by_user.get(user_id, []) if order.id not in ids]
+                if remaining:
+                    self._orders_by_user[user_id] = remaining
+                else:
+                    self._orders_by_user.pop(user_id, None)
+            self._archived_live -= ids
+            self._persist_many("orders", [(order_id, None) for order_id in ids])
+        logging.getLogger(__name__).info(f"Перенесено в архив заказов: {len(archived)}")
+        return len(archived)
+    
+    def _product_price(self, product_id: int) -> float:
+        product = self._products_by_id.get(product_id)
+        return product.price if product else 0.0
+    
+    def _load_sequences(self) -> None:
+        """
+        Загрузка счетчиков id. Счетчик не может быть меньше наибольшего id
+        в данных: журнал и старые резервные копии могут опережать файл счетчиков.
+        """
+        stored = self._read_sequences()
+        with self._id_lock:
+            self._sequences = {
+                "categories": max(stored.get("categories", 0),
+                                  max((category.id for category in self._categories), default=0)),
+                "products": max(stored.get("products", 0),
+                                max((product.id for product in self._products), default=0)),
+                "orders": max(stored.get("orders", 0), self._archived_max_id,
+                              max((order.id for order in self._orders), default=0)),
+            }
+    
+    def _read_sequences(self) -> Dict[str, int]:
+        if not os.path.exists(config.SEQUENCES_FILE):
+            return {}
+        try:
+            return read_json_file(config.SEQUENCES_FILE, dict)
+        except ValueError as e:
+            # Счетчики восстанавливаются по данным
+            print(f"Ошибка чтения счетчиков id: {e}")
+            return {}
+    
+    def _save_sequences(self) -> None:
+        """Сохранение счетчиков id (под блокировкой, чтобы не записать устаревшие значения)"""
+        with self._id_lock:
+            write_json_atomic(config.SEQUENCES_FILE, self._sequences)
+    
+    def _index_order(self, order: Order) -> None:
+        """Добавление заказа во вторичные индексы"""
+        self._orders_by_user.setdefault(order.user_id, []).append(order)
+        self._orders_by_status.setdefault(order.status, {})[order.id] = order
+    
+    def _read_snapshot(self, path: str, expected_type: Union[type, Tuple[type, ...]]) -> Optional[Any]:
+        """
+        Чтение снимка коллекции с проверкой целостности.
+        Если файл поврежден (например, обрезан при сбое записи), он сохраняется
+        рядом с суффиксом .corrupt, а данные берутся из самой свежей резервной
+        копии, в которой этот файл читается без ошибок.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            return read_json_file(path, expected_type)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"Файл {path} поврежден: {e}")
+        
+        filename = os.path.relpath(path, config.DATA_DIR)
+        for backup in reversed(self.list_backups()):
+            source = os.path.join(config.BACKUP_DIR, backup, filename)
+            if not os.path.exists(source):
+                continue
+            try:
+                data = read_json_file(source, expected_type)
+            except (ValueError, UnicodeDecodeError):
+                continue
+            
+            corrupt_path = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.replace(path, corrupt_path)
+            copy_file_atomic(source, path)
+            print(f"Файл {path} восстановлен из резервной копии {backup}, поврежденный файл: {corrupt_path}")
+            return data
+        
+        raise ValueError(f"файл {path} поврежден, исправной резервной копии не найдено")
     
     def _load_categories(self) -> None:
         if os.path.exists(config.CATEGORIES_FILE):
             try:
-                with open(config.CATEGORIES_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._categories = [Category.from_dict(item) for item in data]
+                data = self._read_snapshot(config.CATEGORIES_FILE, (list, dict))
+                self._categories = decode_rows(Category, data)
             except Exception as e:
                 print(f"Ошибка загрузки категорий: {e}")
                 self._categories = []
+        self._categories = self._replay_journal("categories", self._categories, Category)
     
     def _load_products(self) -> None:
         if os.path.exists(config.PRODUCTS_FILE):
             try:
-                with open(config.PRODUCTS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._products = [Product.from_dict(item) for item in data]
+                data = self._read_snapshot(config.PRODUCTS_FILE, (list, dict))
+                self._products = decode_rows(Product, data)
             except Exception as e:
                 print(f"Ошибка загрузки товаров: {e}")
                 self._products = []
+        self._products = self._replay_journal("products", self._products, Product)
     
     def _load_users(self) -> None:
+        """
+        Пользователи загружаются по первому обращению (get_user) из файлов-корзин.
+        Данные прежнего формата (users.json и его журнал) переносятся в корзины
+        только с USER_BUCKETS_MIGRATE=1, до этого пользователи хранятся
+        в users.json, который может прочитать и прежняя версия бота.
+        """
+        self._user_store = self._bucket_store
+        if not self._bucket_store.exists() and (os.path.exists(config.USERS_FILE)
+                                                or self._journals["users"].exists()):
+            if config.USER_BUCKETS_MIGRATE:
+                self._migrate_users()
+            else:
+                self._user_store = self._load_legacy_users()
+        self._users = {}
+        self._user_access = {}
+        self._transient_users = set()
+    
+    def _read_legacy_users(self) -> Optional[Dict[int, User]]:
+        """Пользователи из users.json с его журналом (None - файл не читается)"""
+        users = {}
         if os.path.exists(config.USERS_FILE):
             try:
-                with open(config.USERS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._users = {int(user_id): User.from_dict(user_data) 
-                                 for user_id, user_data in data.items()}
+                data = self._read_snapshot(config.USERS_FILE, dict)
+                users = {int(user_id): User.from_dict(user_data) 
+                         for user_id, user_data in data.items()}
             except Exception as e:
                 print(f"Ошибка загрузки пользователей: {e}")
-                self._users = {}
+                return None
+        return self._replay_journal("users", users, User)
+    
+    def _load_legacy_users(self) -> UserFile:
+        users = self._read_legacy_users() or {}
+        store = UserFile(config.USERS_FILE, {str(user_id): user.to_dict() for user_id, user in users.items()},
+                         write_json_atomic)
+        if self._journals["users"].exists():
+            # Записи журнала переносятся в users.json: корзины не используют журнал
+            store.import_users({user_id: user.to_dict() for user_id, user in users.items()})
+            self._journals["users"].clear()
+        return store
+    
+    def _migrate_users(self) -> None:
+        users = self._read_legacy_users()
+        if users is None:
+            return
+        
+        self._bucket_store.import_users({user_id: user.to_dict() for user_id, user in users.items()})
+        self._journals["users"].clear()
+        if os.path.exists(config.USERS_FILE):
+            os.replace(config.USERS_FILE, config.USERS_FILE + ".migrated")
+        print(f"Пользователи перенесены в {config.USERS_DIR}: {len(users)}")
     
     def _load_orders(self) -> None:
-        if os.path.exists(config.ORDERS_FILE):
+        self._orders = self._replay_journal("orders", self._read_orders(), Order)
+    
+    def _read_orders(self, progress: bool = False) -> List[Order]:
+        """
+        Потоковое чтение снимка заказов: заказы разбираются по одному, без
+        промежуточного представления всего файла. Поврежденный файл читается
+        обычным способом с восстановлением из резервной копии (_read_snapshot).
+        """
+        if not os.path.exists(config.ORDERS_FILE):
+            return []
+        logger = logging.getLogger(__name__)
+        orders = []
+        try:
+            size = os.path.getsize(config.ORDERS_FILE)
+            with open(config.ORDERS_FILE, 'rb') as f:
+                for order in iter_rows(Order, JsonStream(f)):
+                    orders.append(order)
+                    if progress and len(orders) % config.ORDERS_LOAD_PROGRESS_STEP == 0:
+                        logger.info(f"Загружено заказов: {len(orders)} "
+                                    f"({f.tell() / 2**20:.0f} из {size / 2**20:.0f} МБ)")
+            return orders
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Потоковое чтение заказов не удалось: {e}")
+        
+        try:
+            return decode_rows(Order, self._read_snapshot(config.ORDERS_FILE, (list, dict)) or [])
+        except Exception as e:
+            print(f"Ошибка загрузки заказов: {e}")
+            return []
+    
+    def _replay_journal(self, collection: str, items: Union[List, Dict], model) -> Union[List, Dict]:
+        """Применение записей журнала коллекции поверх загруженного снимка"""
+        journal = self._journals[collection]
+        if not journal.exists():
+            journal.size = 0
+            return items
+        
+        # Словарь сохраняет порядок вставки, поэтому порядок списков не меняется
+        by_key = dict(items) if isinstance(items, dict) else {item.id: item for item in items}
+        for record in journal.replay():
+            if record["op"] == "del":
+                by_key.pop(record["id"], None)
+            else:
+                by_key[record["id"]] = model.from_dict(record["data"])
+        
+        return by_key if isinstance(items, dict) else list(by_key.values())
+    
+    def _persist(self, collection: str, key: Any, item: Optional[Any]) -> None:
+        """Сохранение изменения одной записи коллекции (item=None - удаление)"""
+        self._persist_many(collection, [(key, item)])
+    
+    def _persist_many(self, collection: str, changes: List[Tuple[Any, Optional[Any]]]) -> None:
+        """
+        Сохранение изменений записей коллекции.
+        В режиме отложенной записи изменения только помечаются, а на диск их
+        записывает фоновый поток не чаще раза в WRITE_BEHIND_MS миллисекунд.
+        """
+        if config.WRITE_BEHIND_MS <= 0:
+            self._write_changes(collection, changes)
+            return
+        
+        with self._pending_lock:
+            for key, item in changes:
+                self._pending[(collection, key)] = item
+        self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="db-flusher", daemon=True)
+            self._flusher.start()
+        self._flush_requested.set()
+    
+    def _flush_loop(self) -> None:
+        """Фоновый поток: объединяет изменения за интервал в одну запись"""
+        while True:
+            self._flush_requested.wait()
+            time.sleep(config.WRITE_BEHIND_MS / 1000)
+            self._flush_requested.clear()
             try:
-                with open(config.ORDERS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._orders = [Order.from_dict(item) for item in data]
+                self.flush()
             except Exception as e:
-                print(f"Ошибка загрузки заказов: {e}")
-                self._orders = []
+                print(f"Ошибка фонового сохранения данных: {e}")
+    
+    def flush(self) -> None:
+        """Запись на диск всех отложенных изменений"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            
+            changes = {}
+            for (collection, key), item in pending.items():
+                changes.setdefault(collection, []).append((key, item))
+            for collection, collection_changes in changes.items():
+                self._write_changes(collection, collection_changes)
+    
+    def _discard_pending(self) -> None:
+        with self._pending_lock:
+            self._pending = {}
+    
+    def _write_changes(self, collection: str, changes: List[Tuple[Any, Optional[Any]]]) -> None:
+        """
+        Запись изменений коллекции на диск.
+        В режиме журнала каждое изменение дописывается в журнал,
+        иначе коллекция перезаписывается целиком.
+        """
+        # Перед удалением записей сохраняем счетчик, иначе после перезапуска
+        # id удаленных записей с наибольшими номерами выдавались бы повторно
+        if collection in self._sequences and any(item is None for _, item in changes):
+            self._save_sequences()
+        
+        if collection == "users":
+            # Файлы-корзины невелики, журнал для них не нужен
+            with self._locks["users"]:
+                self._user_store.write([(key, None if item is None else item.to_dict())
+                                        for key, item in changes])
+            return
+        
+        if not config.JOURNAL_MODE:
+            self._savers[collection]()
+            return
+        
+        journal = self._journals[collection]
+        with self._locks[collection]:
+            for key, item in changes:
+                if item is None:
+                    journal.append("del", key)
+                else:
+                    journal.append("put", key, item.to_dict())
+            
+            # Компактизация: перезаписываем снимок, журнал очищается при сохранении
+            if journal.size >= config.JOURNAL_COMPACT_THRESHOLD:
+                self._savers[collection]()
+    
+    def _write_snapshot(self, collection: str, path: str, build) -> None:
+        """
+        Запись снимка коллекции. Данные сериализуются под блокировкой коллекции,
+        а запись на диск выполняется уже без нее; более старый снимок никогда
+        не перезаписывает более новый. Если есть журнал, запись снимка и очистка
+        журнала выполняются под блокировкой, чтобы не потерять новые записи журнала.
+        """
+        journal = self._journals[collection]
+        with self._locks[collection]:
+            content = encode_json(build())
+            if config.JOURNAL_MODE or journal.exists():
+                with self._io_locks[collection]:
+                    write_bytes_atomic(path, content)
+                    journal.clear()
+                return
+            self._snapshot_seq[collection] += 1
+            seq = self._snapshot_seq[collection]
+        
+        with self._io_locks[collection]:
+            if seq < self._written_seq[collection]:
+                return
+            write_bytes_atomic(path, content)
+            self._written_seq[collection] = seq
     
     def _save_categories(self) -> None:
         """Сохранение категорий в файл"""
-        os.makedirs(os.path.dirname(config.CATEGORIES_FILE), exist_ok=True)
-        with open(config.CATEGORIES_FILE, 'w', encoding='utf-8') as f:
-            json.dump([category.to_dict() for category in self._categories], f, ensure_ascii=False, indent=2)
+        self._write_snapshot("categories", config.CATEGORIES_FILE,
+                             lambda: encode_rows(Category, self._categories))
     
     def _save_products(self) -> None:
         """Сохранение товаров в файл"""
-        os.makedirs(os.path.dirname(config.PRODUCTS_FILE), exist_ok=True)
-        with open(config.PRODUCTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([product.to_dict() for product in self._products], f, ensure_ascii=False, indent=2)
+        self._write_snapshot("products", config.PRODUCTS_FILE,
+                             lambda: encode_rows(Product, self._products))
     
     def _save_users(self) -> None:
-        """Сохранение пользователей в файл"""
-        os.makedirs(os.path.dirname(config.USERS_FILE), exist_ok=True)
-        with open(config.USERS_FILE, 'w', encoding='utf-8') as f:
-            data = {str(user_id): user.to_dict() for user_id, user in self._users.items()}
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """Сохранение всех пользователей, загруженных в память"""
+        with self._locks["users"]:
+            self._user_store.write([(user_id, user.to_dict()) for user_id, user in self._users.items()])
     
     def _save_orders(self) -> None:
-        """Сохранение заказов в файл"""
-        os.makedirs(os.path.dirname(config.ORDERS_FILE), exist_ok=True)
-        with open(config.ORDERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([order.to_dict() for order in self._orders], f, ensure_ascii=False, indent=2)
+        """Сохранение заказов в файл (не раньше окончания их загрузки)"""
+        self._orders_loaded.wait()
+        self._write_snapshot("orders", config.ORDERS_FILE,
+                             lambda: encode_rows(Order, self._orders))
     
     def save_all(self) -> None:
-        """Сохранение всех данных"""
-        self._save_categories()
-        self._save_products()
-        self._save_users()
-        self._save_orders()
+        """Сохранение всех данных (с компактизацией журналов)"""
+        with self._flush_lock:
+            # Полные снимки включают все отложенные изменения
+            self._discard_pending()
+            self._save_categories()
+            self._save_products()
+            self._save_users()
+            self._save_orders()
+            self._save_sequences()
     
     def backup_data(self) -> str:
         """Создание резервной копии данных"""
@@ -106,28 +629,75 @@ class Database:
         
         # Копируем файлы в резервную директорию
         for filename in [config.CATEGORIES_FILE, config.PRODUCTS_FILE, 
-                         config.USERS_FILE, config.ORDERS_FILE]:
+                         config.ORDERS_FILE, config.SEQUENCES_FILE]:
             if os.path.exists(filename):
                 shutil.copy2(filename, os.path.join(backup_path, os.path.basename(filename)))
+        self._user_store.copy_to(backup_path)
+        self._archive.copy_to(os.path.join(backup_path, os.path.basename(config.ARCHIVE_DIR)))
         
         return backup_path
     
     def restore_data(self, backup_path: str) -> bool:
         """Восстановление данных из резервной копии"""
         try:
-            for filename in [config.CATEGORIES_FILE, config.PRODUCTS_FILE, 
-                             config.USERS_FILE, config.ORDERS_FILE]:
-                source = os.path.join(backup_path, os.path.basename(filename))
-                if os.path.exists(source):
-                    shutil.copy2(source, filename)
-            
-            # Перезагружаем данные
-            self._load_data()
+            # Фоновая загрузка не должна вернуть прежние заказы после восстановления
+            self._orders_loaded.wait()
+            with self._flush_lock:
+                # Отложенные изменения относятся к прежним данным
+                self._discard_pending()
+                
+                for filename in [config.CATEGORIES_FILE, config.PRODUCTS_FILE, 
+                                 config.ORDERS_FILE, config.SEQUENCES_FILE]:
+                    source = os.path.join(backup_path, os.path.basename(filename))
+                    if os.path.exists(source):
+                        copy_file_atomic(source, filename)
+                
+                # Пользователи: каталог корзин или users.json в копиях прежнего формата
+                # (копия с корзинами восстанавливается в корзины, и users.json больше не используется)
+                users_dir = os.path.join(backup_path, os.path.basename(config.USERS_DIR))
+                users_file = os.path.join(backup_path, os.path.basename(config.USERS_FILE))
+                if os.path.isdir(users_dir):
+                    self._bucket_store.replace_from(users_dir)
+                elif os.path.exists(users_file):
+                    self._user_store.import_users(read_json_file(users_file, dict))
+                
+                # Архив заказов: в копиях без архива все заказы находятся в orders.json
+                self._archive.replace_from(os.path.join(backup_path, os.path.basename(config.ARCHIVE_DIR)))
+                
+                # Журналы относятся к прежним снимкам и не должны применяться к копии
+                for journal in self._journals.values():
+                    journal.clear()
+                
+                # Перезагружаем данные
+                self._load_data()
             return True
         except Exception as e:
             print(f"Ошибка восстановления данных: {e}")
             return False
     
+    def export_data(self, target_dir: str) -> str:
+        """
+        Экспорт всех данных в человекочитаемые JSON-файлы с отступами
+        (формат прежних версий, такой каталог можно загрузить через restore_data)
+        """
+        os.makedirs(target_dir, exist_ok=True)
+        self.flush()
+        
+        def export(filename: str, data: Any) -> None:
+            write_bytes_atomic(os.path.join(target_dir, os.path.basename(filename)), codec.dumps_pretty(data))
+        
+        export(config.CATEGORIES_FILE, [category.to_dict() for category in self.get_categories()])
+        export(config.PRODUCTS_FILE, [product.to_dict() for product in self.get_products()])
+        export(config.USERS_FILE, {str(user.id): user.to_dict() for user in self._iter_all_users()})
+        # Архивные заказы выгружаются вместе с рабочими, в порядке создания
+        orders = sorted([*self._archived_orders(), *self.get_all_orders()], key=lambda order: order.id)
+        export(config.ORDERS_FILE, [order.to_dict() for order in orders])
+        return target_dir
+    
+    def _iter_all_users(self) -> Iterator[User]:
+        """Обход всех сохраненных пользователей"""
+        return self._user_store.iter_users()
+    
     def list_backups(self) -> List[str]:
         """Список всех доступных резервных копий"""
         if not os.path.exists(config.BACKUP_DIR):
@@ -139,44 +709,55 @@ class Database:
         return self._categories
     
     def get_category(self, category_id: int) -> Optional[Category]:
-        for category in self._categories:
-            if category.id == category_id:
-                return category
-        return None
+        return self._categories_by_id.get(category_id)
     
     def add_category(self, name: str) -> Category:
-        category_id = 1
-        if self._categories:
-            category_id = max(category.id for category in self._categories) + 1
-        
-        category = Category(id=category_id, name=name)
-        self._categories.append(category)
-        self._save_categories()
+        with self._locks["categories"]:
+            category = Category(id=self._allocate_id("categories"), name=name)
+            self._categories.append(category)
+            self._categories_by_id[category.id] = category
+            self._catalog_version += 1
+            self._persist("categories", category.id, category)
         return category
     
     def update_category(self, category_id: int, name: str) -> Optional[Category]:
-        category = self.get_category(category_id)
-        if category:
-            category.name = name
-            self._save_categories()
-            return category
+        with self._locks["categories"]:
+            category = self.get_category(category_id)
+            if category:
+                category.name = name
+                self._catalog_version += 1
+                self._persist("categories", category.id, category)
+                return category
         return None
     
     def delete_category(self, category_id: int) -> bool:
-        for i, category in enumerate(self._categories):
-            if category.id == category_id:
-                self._categories.pop(i)
-                # Удаляем все товары в этой категории
+        with self._locked("categories", "products"):
+            category = self._categories_by_id.pop(category_id, None)
+            if not category:
+                return False
+            
+            self._categories.remove(category)
+            # Удаляем все товары в этой категории
+            removed = list(self._products_by_category.pop(category_id, {}).values())
+            if removed:
                 self._products = [p for p in self._products if p.category_id != category_id]
-                self._save_categories()
-                self._save_products()
-                return True
-        return False
+            for product in removed:
+                del self._products_by_id[product.id]
+            self._catalog_version += 1
+            self._persist("categories", category_id, None)
+            if removed:
+                self._persist_many("products", [(product.id, None) for product in removed])
+        return True
+    
+    def get_catalog_version(self) -> int:
+        """Номер версии каталога: меняется при изменении категорий и товаров"""
+        return self._catalog_version
     
     # Методы для работы с товарами
     def get_products(self, category_id: Optional[int] = None) -> List[Product]:
         if category_id is not None:
-            return [p for p in self._products if p.category_id == category_id]
+            with self._locks["products"]:
+                return list(self._products_by_category.get(category_id, {}).values())
         return self._products
     
     def get_available_products(self, category_id: Optional[int] = None) -> List[Product]:
@@ -184,52 +765,63 @@ class Database:
         return [p for p in products if p.available]
     
     def get_product(self, product_id: int) -> Optional[Product]:
-        for product in self._products:
-            if product.id == product_id:
-                return product
-        return None
+        return self._products_by_id.get(product_id)
     
     def add_product(self, name: str, category_id: int, price: float, 
                    unit: str, image_path: Optional[str] = None) -> Optional[Product]:
-        if not self.get_category(category_id):
-            return None
-        
-        product_id = 1
-        if self._products:
-            product_id = max(product.id for product in self._products) + 1
-        
-        product = Product(
-            id=product_id,
-            name=name,
-            category_id=category_id,
-            price=price,
-            unit=unit,
-            image_path=image_path,
-            available=True
-        )
-        self._products.append(product)
-        self._save_products()
+        with self._locked("categories", "products"):
+            if not self.get_category(category_id):
+                return None
+            
+            product = Product(
+                id=self._allocate_id("products"),
+                name=name,
+                category_id=category_id,
+                price=price,
+                unit=unit,
+                image_path=image_path,
+                available=True
+            )
+            self._products.append(product)
+            self._products_by_id[product.id] = product
+            self._products_by_category.setdefault(category_id, {})[product.id] = product
+            self._catalog_version += 1
+            self._persist("products", product.id, product)
         return product
     
     def update_product(self, product_id: int, **kwargs) -> Optional[Product]:
-        product = self.get_product(product_id)
-        if not product:
-            return None
-        
-        for key, value in kwargs.items():
-            if hasattr(product, key):
-                setattr(product, key, value)
-        
-        self._save_products()
+        with self._locks["products"]:
+            product = self.get_product(product_id)
+            if not product:
+                return None
+            
+            old_category_id = product.category_id
+            for key, value in kwargs.items():
+                if hasattr(product, key):
+                    setattr(product, key, value)
+            
+            # Переносим товар в индексе, если изменилась категория
+            if product.category_id != old_category_id:
+                self._products_by_category.get(old_category_id, {}).pop(product.id, None)
+                self._products_by_category.setdefault(product.category_id, {})[product.id] = product
+            
+            self._catalog_version += 1
+            self._persist("products", product.id, product)
         return product
     
     def delete_product(self, product_id: int) -> bool:
-        for i, product in enumerate(self._products):
-            if product.id == product_id:
-                self._products.pop(i)
-                self._save_products()
-                return True
-        return False
+        with self._locks["products"]:
+            product = self._products_by_id.pop(product_id, None)
+            if not product:
+                return False
+            
+            self._products.remove(product)
+            self._products_by_category.get(product.category_id, {}).pop(product_id, None)
+            # Удаленный товар исключается из аналитики
+            self._dashboard_cache = None
+            self._catalog_version += 1
+            self._persist("products", product_id, None)
+        return True
     
     def search_products(self, query: str) -> List[Product]:
         query = query.lower()
@@ -237,17 +829,62 @@ class Database:
     
     # Методы для работы с пользователями
     def get_user(self, user_id: int) -> User:
-        if user_id not in self._users:
-            self._users[user_id] = User(id=user_id)
-            self._save_users()
-        return self._users[user_id]
+        user = self._users.get(user_id)
+        if user is None:
+            with self._locks["users"]:
+                user = self._users.get(user_id)
+                if user is None:
+                    user = self._user_store.load(user_id)
+                    if user is None:
+                        # Новый пользователь сохраняется только при первом изменении (update_user)
+                        user = User(id=user_id)
+                        self._transient_users.add(user_id)
+                    self._users[user_id] = user
+                    self._evict_users()
+        self._user_access[user_id] = time.monotonic()
+        return user
+    
+    def _evict_users(self) -> None:
+        """
+        Вытеснение пользователей из кэша: не чаще раза в минуту (или при
+        переполнении кэша) удаляются пользователи, к которым не обращались
+        дольше USER_CACHE_TTL, а при переполнении - самые давние.
+        Пользователи с еще не записанными изменениями остаются в кэше
+        до следующей проверки, после записи фоновым потоком.
+        """
+        now = time.monotonic()
+        excess = len(self._users) - config.USER_CACHE_SIZE
+        if excess <= 0 and now - self._last_user_eviction < 60:
+            return
+        self._last_user_eviction = now
+        
+        with self._pending_lock:
+            dirty = {key for collection, key in self._pending if collection == "users"}
+        # get_user отмечает обращение без блокировки: обходим копию словаря,
+        # чтобы параллельная вставка не прервала обход
+        access = self._user_access.copy()
+        idle = sorted((accessed, user_id) for user_id, accessed in access.items()
+                      if user_id not in dirty and now - accessed > USER_EVICTION_GRACE)
+        for accessed, user_id in idle:
+            if excess <= 0 and now - accessed < config.USER_CACHE_TTL:
+                break
+            self._users.pop(user_id, None)
+            self._user_access.pop(user_id, None)
+            self._transient_users.discard(user_id)
+            excess -= 1
     
     def update_user(self, user_id: int, **kwargs) -> User:
-        user = self.get_user(user_id)
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
-        self._save_users()
+        with self._locks["users"]:
+            user = self.get_user(user_id)
+            for key, value in kwargs.items():
+                if hasattr(user, key):
+                    setattr(user, key, value)
+            if user_id in self._transient_users:
+                if user.to_dict() == User(id=user_id).to_dict():
+                    # Состояние нового пользователя не изменилось, сохранять нечего
+                    return user
+                self._transient_users.discard(user_id)
+            self._persist("users", user_id, user)
         return user
     
     def get_favorite_products(self, user_id: int) -> List[Product]:
@@ -256,65 +893,191 @@ class Database:
     
     # Методы для работы с заказами
     def create_order(self, user_id: int, phone: str, address: str, delivery_time: Optional[str] = None) -> Optional[Order]:
-        user = self.get_user(user_id)
-        if not user.cart:
-            return None
-        
-        order_id = 1
-        if self._orders:
-            order_id = max(order.id for order in self._orders) + 1
-        
-        # Вычисляем общую сумму заказа
-        total = 0.0
-        for cart_item in user.cart:
-            product = self.get_product(cart_item.product_id)
-            if product:
-                total += product.price * cart_item.quantity
-        
-        order = Order(
-            id=order_id,
-            user_id=user_id,
-            items=user.cart.copy(),
-            phone=phone,
-            address=address,
-            delivery_time=delivery_time,
-            total=total
-        )
-        self._orders.append(order)
-        
-        # Очищаем корзину пользователя
-        user.clear_cart()
-        
-        self._save_orders()
-        self._save_users()
+        with self._locked("users", "orders"):
+            user = self.get_user(user_id)
+            if not user.cart:
+                return None
+            
+            # Вычисляем общую сумму заказа (по ценам на момент заказа)
+            total = 0.0
+            for cart_item in user.cart:
+                total += self._product_price(cart_item.product_id) * cart_item.quantity
+            
+            order = Order(
+                id=self._allocate_id("orders"),
+                user_id=user_id,
+                items=user.cart.copy(),
+                phone=phone,
+                address=address,
+                delivery_time=delivery_time,
+                total=total
+            )
+            self._orders.append(order)
+            self._orders_by_id[order.id] = order
+            self._index_order(order)
+            self._sales.add_order(order)
+            self._orders_version += 1
+            
+            # Очищаем корзину пользователя
+            user.clear_cart()
+            
+            self._persist("orders", order.id, order)
+            self._transient_users.discard(user_id)
+            self._persist("users", user_id, user)
         return order
     
     def get_orders(self, user_id: Optional[int] = None) -> List[Order]:
         if user_id is not None:
-            return [order for order in self._orders if order.user_id == user_id]
-        return self._orders
+            with self._locked("orders"):
+                return list(self._orders_by_user.get(user_id, []))
+        return self.get_all_orders()
     
     def get_all_orders(self) -> List[Order]:
         """Получить все заказы"""
+        self._orders_loaded.wait()
         return self._orders
     
     def get_order(self, order_id: int) -> Optional[Order]:
-        for order in self._orders:
-            if order.id == order_id:
-                return order
-        return None
+        """Заказ по id: среди рабочих заказов, затем в архиве"""
+        self._orders_loaded.wait()
+        order = self._orders_by_id.get(order_id)
+        if order is None:
+            order = self._archive.get(order_id)
+        return order
+    
+    def is_order_archived(self, order_id: int) -> bool:
+        """Заказ перенесен в архив (его статус больше не меняется)"""
+        self._orders_loaded.wait()
+        return order_id not in self._orders_by_id and self._archive.get(order_id) is not None
     
     def update_order_status(self, order_id: int, status: str) -> Optional[Order]:
-        order = self.get_order(order_id)
-        if order:
-            order.status = status
-            self._save_orders()
-            return order
+        with self._locked("orders"):
+            # Архивные заказы не изменяются
+            order = self._orders_by_id.get(order_id)
+            if order:
+                old_status = order.status
+                if old_status != status:
+                    self._orders_by_status.get(old_status, {}).pop(order.id, None)
+                    self._orders_by_status.setdefault(status, {})[order.id] = order
+                order.status = status
+                self._sales.change_status(order, old_status)
+                self._orders_version += 1
+                self._persist("orders", order.id, order)
+                return order
         return None
         
     def update_product_availability(self, product_id: int, available: bool) -> Optional[Product]:
         """Обновление статуса доступности товара"""
         return self.update_product(product_id, available=available)
+    
+    def find_orders(self, status: Optional[str] = None, exclude_status: Optional[str] = None,
+                    sort_by: Optional[str] = "created_at", descending: bool = True,
+                    offset: int = 0, limit: Optional[int] = None) -> List[Order]:
+        """
+        Выборка заказов с фильтром по статусу, сортировкой и пагинацией.
+        
+        Args:
+            status: Только заказы с этим статусом
+            exclude_status: Все заказы, кроме заказов с этим статусом
+            sort_by: Поле сортировки ("created_at", "user_id") или None
+            descending: Сортировка по убыванию
+            offset: Количество пропускаемых заказов
+            limit: Максимальное количество заказов
+        """
+        with self._locked("orders"):
+            buckets = self._status_buckets(status, exclude_status)
+            if buckets is None:
+                orders = list(self._orders)
+            else:
+                orders = [order for bucket in buckets for order in bucket.values()]
+        if buckets and len(buckets) > 1:
+            # Восстанавливаем порядок создания заказов
+            orders.sort(key=lambda order: order.id)
+        if sort_by:
+            orders.sort(key=lambda order: getattr(order, sort_by), reverse=descending)
+        end = None if limit is None else offset + limit
+        return orders[offset:end]
+    
+    def count_orders(self, status: Optional[str] = None, exclude_status: Optional[str] = None) -> int:
+        """Количество заказов с фильтром по статусу"""
+        with self._locked("orders"):
+            buckets = self._status_buckets(status, exclude_status)
+            if buckets is None:
+                return len(self._orders)
+            return sum(len(bucket) for bucket in buckets)
+    
+    def _status_buckets(self, status: Optional[str], exclude_status: Optional[str]) -> Optional[List[Dict[int, Order]]]:
+        """Группы индекса по статусу, соответствующие фильтру (None - все заказы)"""
+        if status is not None:
+            bucket = self._orders_by_status.get(status, {})
+            return [bucket] if status != exclude_status else []
+        if exclude_status is not None:
+            return [bucket for key, bucket in self._orders_by_status.items() if key != exclude_status]
+        return None
+    
+    # Методы для аналитики
+    def get_product_quantities(self, since: Optional[str] = None) -> Dict[int, float]:
+        """Суммарное количество каждого товара в заказах (кроме отмененных) начиная с дня since (ISO)"""
+        return self.get_product_sales(since[:10] if since else None)
+    
+    def get_product_quantities_by_month(self) -> Dict[int, Dict[int, float]]:
+        """Количество каждого товара в заказах (кроме отмененных) по месяцам года: month -> {product_id: quantity}"""
+        with self._locked("orders"):
+            return self._sales.quantities_by_month_of_year()
+    
+    def get_product_sales(self, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Dict[int, float]:
+        """Количество каждого товара в заказах (кроме отмененных) за период YYYY-MM-DD включительно"""
+        with self._locked("orders"):
+            return self._sales.product_quantities(start_date, end_date)
+    
+    def get_customer_stats(self) -> Dict[int, Tuple[float, int]]:
+        """Сумма и количество заказов (кроме отмененных) каждого покупателя: user_id -> (total, count)"""
+        with self._locked("orders"):
+            return self._sales.customer_stats()
+    
+    def get_top_customers(self, by_amount: bool = True, limit: int = 5) -> List[Tuple[int, float]]:
+        """Покупатели с наибольшей суммой или количеством заказов: [(user_id, total/count)]"""
+        with self._locked("orders"):
+            return self._sales.top_customers(by_amount, limit)
+    
+    def get_popular_products(self, days: int = 30, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Самые заказываемые товары за последние days календарных дней
+        (включая сегодняшний): [(product_id, количество)]
+        """
+        quantities = self.get_product_sales(window_start(datetime.now(), days).strftime("%Y-%m-%d"))
+        return heapq.nlargest(limit, ((product_id, quantity) for product_id, quantity in quantities.items()
+                                      if product_id in self._products_by_id),
+                              key=lambda item: (item[1], -item[0]))
+    
+    def get_dashboard(self, limit: int = 10, refresh: bool = False) -> DashboardReport:
+        """
+        Все показатели экрана аналитики, собранные из накопительных сумм продаж.
+        
+        Результат кэшируется по дате и версии заказов не дольше ANALYTICS_CACHE_TTL секунд:
+        новый заказ или смена статуса сбрасывают кэш, refresh - пересчет без кэша.
+        """
+        with self._dashboard_lock:
+            key = (datetime.now().date(), self._orders_version, limit)
+            cache = self._dashboard_cache
+            if (not refresh and cache is not None and cache[0] == key
+                    and time.monotonic() - cache[1] < config.ANALYTICS_CACHE_TTL):
+                return cache[2]
+            report = self._compute_dashboard(limit)
+            self._dashboard_cache = (key, time.monotonic(), report)
+            return report
+    
+    def _compute_dashboard(self, limit: int) -> DashboardReport:
+        with self._locked("orders"):
+            return compute_dashboard(self._sales, set(self._products_by_id), limit=limit)
+
+def create_database() -> Database:
+    """Создание базы данных с хранилищем, выбранным в конфигурации"""
+    if config.STORAGE_BACKEND == "sqlite":
+        from sqlite_database import SQLiteDatabase
+        return SQLiteDatabase()
+    return Database()
 
 # Создаем глобальный экземпляр базы данных
-db = Database() 
\ No newline at end of file
+db = create_database() 
\ No newline at end of file
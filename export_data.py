@@ -0,0 +1,69 @@
+"""
+Экспорт данных бота в человекочитаемые JSON-файлы с отступами.
+
+Файлы данных хранятся компактно, для просмотра и ручной правки их удобнее
+выгрузить этой командой. Экспорт можно загрузить обратно как резервную копию.
+Вместе с данными выгружаются показатели экрана аналитики (analytics.json).
+
+JSON-файлы данных (и архив заказов) только читаются, как в analytics_report.py:
+экспорт не создает базу данных бота, поэтому не переносит пользователей,
+не архивирует заказы и не мешает запущенному боту, который владеет файлами.
+Данные в SQLite (STORAGE_BACKEND=sqlite) выгружаются запросами к базе.
+
+Использование:
+    python export_data.py [каталог]
+"""
+import os
+import sys
+from datetime import datetime
+from typing import Any
+
+import codec
+import config
+from analytics_report import aggregate_orders, iter_orders, iter_users, load_products, load_rows
+from dashboard import compute_dashboard
+from models import Category
+
+ANALYTICS_FILE = "analytics.json"
+
+
+def export_data(source_dir: str, target_dir: str) -> int:
+    """Выгрузка данных каталога source_dir в формате прежних версий; результат - количество заказов"""
+    os.makedirs(target_dir, exist_ok=True)
+
+    def export(filename: str, data: Any) -> None:
+        with open(os.path.join(target_dir, os.path.basename(filename)), 'wb') as f:
+            f.write(codec.dumps_pretty(data))
+
+    products = load_products(source_dir)
+    export(config.CATEGORIES_FILE, [category.to_dict() for category in
+                                    load_rows(source_dir, config.CATEGORIES_FILE, Category).values()])
+    export(config.PRODUCTS_FILE, [product.to_dict() for product in products.values()])
+    export(config.USERS_FILE, {str(user.id): user.to_dict() for user in iter_users(source_dir)})
+    # Архивные заказы выгружаются вместе с рабочими, в порядке создания
+    orders = sorted(iter_orders(source_dir), key=lambda order: order.id)
+    export(config.ORDERS_FILE, [order.to_dict() for order in orders])
+
+    sales, order_count = aggregate_orders(iter(orders))
+    export(ANALYTICS_FILE, compute_dashboard(sales, set(products)).to_dict())
+    return order_count
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        target_dir = sys.argv[1]
+    else:
+        target_dir = os.path.join(config.DATA_DIR, "export_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
+    if config.STORAGE_BACKEND == "sqlite" and os.path.exists(config.SQLITE_FILE):
+        # Непустая база SQLite при открытии не импортирует и не архивирует данные
+        from database import db
+        db.export_data(target_dir)
+        with open(os.path.join(target_dir, ANALYTICS_FILE), 'wb') as f:
+            f.write(codec.dumps_pretty(db.get_dashboard().to_dict()))
+    else:
+        export_data(config.DATA_DIR, target_dir)
+    print(f"Данные экспортированы в {target_dir} (кодек хранения: {codec.BACKEND})")
+
+
+if __name__ == "__main__":
+    main()
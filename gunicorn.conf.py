@@ -0,0 +1,22 @@
+"""
+Настройки gunicorn для запуска бота (Procfile):
+    gunicorn "main:create_app()"
+"""
+import os
+import sys
+
+# Имя config занято настройкой gunicorn
+from config import WEB_THREADS
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+# Один процесс: состояния пользователей и данные магазина хранятся в памяти
+# процесса, поэтому запросы принимаются потоками, а не процессами
+workers = 1
+threads = WEB_THREADS
+
+
+def worker_exit(server, worker):
+    # Сохраняем отложенные изменения при остановке процесса (SIGTERM при деплое)
+    main = sys.modules.get("main")
+    if main is not None:
+        main.shutdown()
@@ -5,6 +5,7 @@ from telebot import types
 import logging
 from datetime import datetime
 
+import callback_data
 import keyboards
 import utils
 import config
@@ -109,17 +110,7 @@ def product_category_selected(bot: telebot.TeleBot, call: types.CallbackQuery) -
     bot.answer_callback_query(call.id)
     
     # Получаем ID категории из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        bot.edit_message_text(
-            "Ошибка при выборе категории.",
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=keyboards.get_admin_main_keyboard()
-        )
-        return
-    
-    category_id = int(data_parts[2])
+    category_id = callback_data.args(call.data)[0]
     category = db.get_category(category_id)
     
     if not category:
@@ -227,7 +218,7 @@ def product_unit_selected(bot: telebot.TeleBot, call: types.CallbackQuery) -> No
     bot.answer_callback_query(call.id)
     
     # Получаем выбранную единицу измерения из callback_data
-    unit_data = call.data.split("_")[1]
+    unit_data = callback_data.args(call.data)[0]
     
     # Преобразуем в формат для сохранения в БД
     unit = "кг" if unit_data == "kg" else "шт"
@@ -409,18 +400,7 @@ def edit_category_name_input(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     logger.info(f"Вызвана функция edit_category_name_input: {call.data}")
     
     # Получаем ID категории из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        bot.edit_message_text(
-            "Ошибка при выборе категории.",
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=keyboards.get_admin_main_keyboard()
-        )
-        return
-    
-    category_id = int(data_parts[2])
+    category_id = callback_data.args(call.data)[0]
     logger.info(f"Извлечен ID категории: {category_id}")
     category = db.get_category(category_id)
     
@@ -532,17 +512,7 @@ def delete_category_confirm(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     bot.answer_callback_query(call.id)
     
     # Получаем ID категории из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        bot.edit_message_text(
-            "Ошибка при выборе категории.",
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=keyboards.get_admin_main_keyboard()
-        )
-        return
-    
-    category_id = int(data_parts[2])
+    category_id = callback_data.args(call.data)[0]
     category = db.get_category(category_id)
     
     if not category:
@@ -623,7 +593,7 @@ def show_products_for_edit(bot: telebot.TeleBot, call: types.CallbackQuery, cate
         status = "✅" if product.available else "❌"
         keyboard.add(types.InlineKeyboardButton(
             f"{product.name} [{status}]", 
-            callback_data=f"edit_product_{product.id}"
+            callback_data=callback_data.encode("edit_product", product.id)
         ))
     
     # Добавляем кнопку "Назад"
@@ -644,11 +614,11 @@ def edit_product_menu(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     
     # Получаем ID товара из callback_data или из данных состояния
     product_id = None
-    data_parts = call.data.split("_")
+    action, args = callback_data.parse(call.data)
     
-    if call.data.startswith("edit_product_") and len(data_parts) >= 3:
+    if action == "edit_product":
         # Если вызван через выбор товара для редактирования
-        product_id = int(data_parts[2])
+        product_id = args[0]
     else:
         # Если вызван через кнопку "Назад", получаем ID из данных состояния
         with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
@@ -713,12 +683,7 @@ def toggle_product_availability(bot: telebot.TeleBot, call: types.CallbackQuery)
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 4:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    product_id = int(data_parts[3])
+    product_id = callback_data.args(call.data)[0]
     
     # Получаем товар
     product = db.get_product(product_id)
@@ -769,12 +734,7 @@ def edit_product_name_start(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 4:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    product_id = int(data_parts[3])
+    product_id = callback_data.args(call.data)[0]
     
     # Получаем товар
     product = db.get_product(product_id)
@@ -937,7 +897,7 @@ def show_products_for_delete(bot: telebot.TeleBot, call: types.CallbackQuery, ca
         status = "✅" if product.available else "❌"
         keyboard.add(types.InlineKeyboardButton(
             f"{product.name} [{status}]", 
-            callback_data=f"delete_product_{product.id}"
+            callback_data=callback_data.encode("delete_product", product.id)
         ))
     
     # Добавляем кнопку "Назад"
@@ -973,7 +933,7 @@ def delete_product_confirm(bot: telebot.TeleBot, call: types.CallbackQuery, prod
     
     # Кнопки "Да" и "Нет"
     keyboard.add(
-        types.InlineKeyboardButton("Да", callback_data=f"confirm_delete_product_{product_id}"),
+        types.InlineKeyboardButton("Да", callback_data=callback_data.encode("confirm_delete_product", product_id)),
         types.InlineKeyboardButton("Нет", callback_data="cancel_delete_product")
     )
     
@@ -1091,7 +1051,7 @@ def load_data_list(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
         for backup in backups:
             keyboard.add(types.InlineKeyboardButton(
                 f"Копия от {backup}", 
-                callback_data=f"load_backup_{backup}"
+                callback_data=callback_data.encode("load_backup", backup)
             ))
         
         # Добавляем кнопку "Назад"
@@ -1160,8 +1120,12 @@ def load_backup(bot: telebot.TeleBot, call: types.CallbackQuery, backup_name: st
             reply_markup=keyboards.get_admin_main_keyboard()
         )
 
-def show_analytics(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
-    """Показывает аналитику по продажам и клиентам."""
+def show_analytics(bot: telebot.TeleBot, call: types.CallbackQuery, refresh: bool = False) -> None:
+    """
+    Показывает аналитику по продажам и клиентам.
+    
+    Показатели берутся из кэша базы данных; refresh - пересчитать их заново.
+    """
     logger = logging.getLogger(__name__)
     
     bot.answer_callback_query(call.id)
@@ -1170,18 +1134,19 @@ def show_analytics(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.set_state(call.from_user.id, BotStates.ANALYTICS_VIEW, call.message.chat.id)
     
     try:
-        # Получаем аналитические данные
-        top_customers_by_amount = get_top_customers(by_amount=True, limit=5)
-        top_customers_by_frequency = get_top_customers(by_amount=False, limit=5)
+        # Показатели собираются из накопительных сумм продаж и кэшируются
+        report = db.get_dashboard(refresh=refresh)
+        top_customers_by_amount = with_customer_names(report.top_customers_by_amount[:5])
+        top_customers_by_frequency = with_customer_names(report.top_customers_by_frequency[:5])
         
-        # Получаем популярные товары за разные периоды
-        popular_week = get_popular_products(days=7, limit=3)
-        popular_month = get_popular_products(days=30, limit=3)
-        popular_3months = get_popular_products(days=90, limit=3)
-        popular_year = get_popular_products(days=365, limit=3)
+        # Популярные товары за разные периоды
+        popular_week = with_product_names(report.popular_products[7][:3])
+        popular_month = with_product_names(report.popular_products[30][:3])
+        popular_3months = with_product_names(report.popular_products[90][:3])
+        popular_year = with_product_names(report.popular_products[365][:3])
         
-        # Текущая дата для отображения в аналитике
-        current_date = utils.format_date(datetime.now().isoformat())
+        # Время расчета показателей для отображения в аналитике
+        current_date = utils.format_date(report.generated_at)
         
         # Формируем текст с аналитикой
         analytics_text = f"📊 *Аналитика магазина*\nДата: {current_date}\n\n"
@@ -1230,18 +1195,26 @@ def show_analytics(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
         else:
             analytics_text += "Нет данных\n"
         
-        # Создаем клавиатуру с кнопкой "Назад"
+        # Создаем клавиатуру с кнопками "Обновить" и "Назад"
         keyboard = types.InlineKeyboardMarkup()
+        keyboard.add(types.InlineKeyboardButton("🔄 Обновить", callback_data="admin_analytics_refresh"))
         keyboard.add(keyboards.BACK_BUTTON)
         
         # Отправляем сообщение с аналитикой
-        bot.edit_message_text(
-            analytics_text,
-            chat_id=call.message.chat.id,
-            message_id=call.message.message_id,
-            reply_markup=keyboard,
-            parse_mode="Markdown"
-        )
+        try:
+            bot.edit_message_text(
+                analytics_text,
+                chat_id=call.message.chat.id,
+                message_id=call.message.message_id,
+                reply_markup=keyboard,
+                parse_mode="Markdown"
+            )
+        except telebot.apihelper.ApiTelegramException as e:
+            # Повторное обновление в ту же минуту без новых заказов не меняет текст
+            if "message is not modified" in str(e):
+                logger.debug(f"Аналитика не изменилась: {str(e)}")
+            else:
+                raise
         
     except Exception as e:
         logger.error(f"Ошибка при формировании аналитики: {str(e)}")
@@ -1266,68 +1239,47 @@ def get_top_customers(by_amount: bool = True, limit: int = 5) -> list:
     logger = logging.getLogger(__name__)
     
     try:
-        # Получаем все заказы
-        orders = db.get_all_orders()
-        
-        # Словарь для хранения статистики по клиентам
-        customer_stats = {}
-        
-        for order in orders:
-            try:
-                user_id = order.user_id
-                if not user_id:
-                    continue
-                    
-                user = db.get_user(user_id)
-                
-                if not user:
-                    continue
-                    
-                # Формируем имя пользователя
-                name = "Пользователь"
-                if hasattr(user, 'first_name') and user.first_name:
-                    name = user.first_name
-                    if hasattr(user, 'last_name') and user.last_name:
-                        name += f" {user.last_name}"
-                
-                if user_id not in customer_stats:
-                    customer_stats[user_id] = {
-                        'name': name,
-                        'total': 0,
-                        'count': 0
-                    }
-                
-                # Обновляем статистику
-                order_total = getattr(order, 'total', 0)
-                customer_stats[user_id]['total'] += order_total
-                customer_stats[user_id]['count'] += 1
-            except Exception as e:
-                logger.error(f"Ошибка при обработке заказа {order.id}: {str(e)}")
-                continue
-        
-        # Сортируем клиентов
-        if by_amount:
-            # По сумме заказов
-            sorted_customers = sorted(
-                [(user_id, stats['name'], stats['total']) for user_id, stats in customer_stats.items()],
-                key=lambda x: x[2],
-                reverse=True
-            )
-        else:
-            # По количеству заказов
-            sorted_customers = sorted(
-                [(user_id, stats['name'], stats['count']) for user_id, stats in customer_stats.items()],
-                key=lambda x: x[2],
-                reverse=True
-            )
-        
-        # Возвращаем ограниченный список
-        return sorted_customers[:limit]
+        # Список уже отсортирован по сумме или количеству заказов
+        return with_customer_names(db.get_top_customers(by_amount=by_amount, limit=limit))
         
     except Exception as e:
         logger.error(f"Ошибка при получении списка активных клиентов: {str(e)}")
         return []
 
+def with_customer_names(customers: list) -> list:
+    """
+    Добавляет имена к списку клиентов [(user_id, total/count)].
+    
+    Returns:
+        Список кортежей (user_id, name, total/count) без неизвестных пользователей
+    """
+    logger = logging.getLogger(__name__)
+    
+    result = []
+    for user_id, value in customers:
+        try:
+            if not user_id:
+                continue
+                
+            user = db.get_user(user_id)
+            
+            if not user:
+                continue
+                
+            # Формируем имя пользователя
+            name = "Пользователь"
+            if hasattr(user, 'first_name') and user.first_name:
+                name = user.first_name
+                if hasattr(user, 'last_name') and user.last_name:
+                    name += f" {user.last_name}"
+            
+            result.append((user_id, name, value))
+        except Exception as e:
+            logger.error(f"Ошибка при обработке клиента {user_id}: {str(e)}")
+            continue
+    
+    return result
+
 def get_popular_products(days: int = 30, limit: int = 5) -> list:
     """
     Получает список самых популярных товаров за указанный период.
@@ -1342,71 +1294,31 @@ def get_popular_products(days: int = 30, limit: int = 5) -> list:
     logger = logging.getLogger(__name__)
     
     try:
-        # Получаем все заказы
-        all_orders = db.get_all_orders()
-        
-        # Фильтруем заказы по дате
-        from datetime import datetime, timedelta
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Словарь для хранения статистики по товарам
-        product_stats = {}
-        
-        for order in all_orders:
-            # Проверяем дату заказа
-            try:
-                order_date = datetime.fromisoformat(order.created_at)
-                if order_date < cutoff_date:
-                    continue
-            except (ValueError, TypeError):
-                logger.warning(f"Неверный формат даты в заказе {order.id}: {order.created_at}")
-                continue
-                
-            # Подсчитываем товары в заказе
-            for item in order.items:
-                try:
-                    product_id = item.product_id
-                    quantity = getattr(item, 'quantity', 1)  # Используем 1, если атрибут quantity не найден
-                except AttributeError:
-                    # Если item - словарь, а не объект CartItem
-                    if isinstance(item, dict):
-                        product_id = item.get('product_id')
-                        quantity = item.get('quantity', 1)
-                    else:
-                        logger.warning(f"Неверный формат товара в заказе {order.id}: {item}")
-                        continue
-                
-                if not product_id:
-                    continue
-                    
-                product = db.get_product(product_id)
-                
-                if not product:
-                    continue
-                    
-                if product_id not in product_stats:
-                    product_stats[product_id] = {
-                        'name': product.name,
-                        'count': 0
-                    }
-                
-                # Обновляем статистику
-                product_stats[product_id]['count'] += quantity
-        
-        # Сортируем товары по популярности
-        sorted_products = sorted(
-            [(product_id, stats['name'], stats['count']) for product_id, stats in product_stats.items()],
-            key=lambda x: x[2],
-            reverse=True
-        )
-        
-        # Возвращаем ограниченный список
-        return sorted_products[:limit]
+        # Товары за указанный период, отсортированные по популярности
+        return with_product_names(db.get_popular_products(days=days, limit=limit))
         
     except Exception as e:
         logger.error(f"Ошибка при получении списка популярных товаров: {str(e)}")
         return []
 
+def with_product_names(products: list) -> list:
+    """
+    Добавляет названия к списку товаров [(product_id, count)].
+    
+    Returns:
+        Список кортежей (product_id, name, count) без удаленных товаров
+    """
+    result = []
+    for product_id, quantity in products:
+        product = db.get_product(product_id)
+        
+        if not product:
+            continue
+            
+        result.append((product_id, product.name, quantity))
+    
+    return result
+
 def edit_product_price_start(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     """Начало процесса изменения цены товара."""
     logger = logging.getLogger(__name__)
@@ -1414,12 +1326,7 @@ def edit_product_price_start(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 4:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    product_id = int(data_parts[3])
+    product_id = callback_data.args(call.data)[0]
     
     # Получаем товар
     product = db.get_product(product_id)
@@ -1542,12 +1449,7 @@ def edit_product_image_start(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 4:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    product_id = int(data_parts[3])
+    product_id = callback_data.args(call.data)[0]
     
     # Получаем товар
     product = db.get_product(product_id)
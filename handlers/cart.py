@@ -4,6 +4,7 @@ from telebot import types
 import logging
 import re
 
+import callback_data
 import config
 import keyboards
 import utils
@@ -286,11 +287,7 @@ def process_phone_digit(bot: telebot.TeleBot, call: types.CallbackQuery) -> None
     bot.answer_callback_query(call.id)
     
     # Извлекаем цифру из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) != 3:
-        return
-    
-    digit = data_parts[2]
+    digit = str(callback_data.args(call.data)[0])
     
     # Получаем текущие цифры из данных состояния
     with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
@@ -5,6 +5,7 @@ from telebot import types
 import logging
 from types import SimpleNamespace
 
+import callback_data
 import keyboards
 import utils
 import config
@@ -40,8 +41,8 @@ def back_to_customer_main(bot: telebot.TeleBot, call: types.CallbackQuery) -> No
             logger.warning(f"Пользователь не найден при возврате в главное меню: user_id={user_id}")
             # Создаем простую клавиатуру
             keyboard = types.InlineKeyboardMarkup()
-            keyboard.add(types.InlineKeyboardButton("Режим покупателя", callback_data="mode_customer"))
-            keyboard.add(types.InlineKeyboardButton("Администрирование", callback_data="mode_admin"))
+            keyboard.add(types.InlineKeyboardButton("Режим покупателя", callback_data=callback_data.encode("mode", "customer")))
+            keyboard.add(types.InlineKeyboardButton("Администрирование", callback_data=callback_data.encode("mode", "admin")))
             
             bot.edit_message_text(
                 "Выберите режим работы:",
@@ -95,12 +96,7 @@ def category_selected(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.answer_callback_query(call.id)
     
     # Получаем ID категории из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 2:
-        back_to_customer_main(bot, call)
-        return
-    
-    category_id = int(data_parts[1])
+    category_id = callback_data.args(call.data)[0]
     category = db.get_category(category_id)
     
     if not category:
@@ -152,12 +148,12 @@ def product_selected(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
             pass
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 2:
+    action, args = callback_data.parse(call.data)
+    if action != "product":
         back_to_customer_main(bot, call)
         return
     
-    product_id = int(data_parts[1])
+    product_id = args[0]
     product = db.get_product(product_id)
     
     if not product or not product.available:
@@ -246,11 +242,7 @@ def add_to_favorites(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        return
-    
-    product_id = int(data_parts[2])
+    product_id = callback_data.args(call.data)[0]
     user_id = call.from_user.id
     
     # Добавляем товар в избранное
@@ -277,11 +269,7 @@ def remove_from_favorites(bot: telebot.TeleBot, call: types.CallbackQuery) -> No
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        return
-    
-    product_id = int(data_parts[2])
+    product_id = callback_data.args(call.data)[0]
     user_id = call.from_user.id
     
     # Удаляем товар из избранного
@@ -398,7 +386,7 @@ def search_process(bot: telebot.TeleBot, message: types.Message) -> None:
         for product in sorted(search_results, key=lambda p: p.name):
             keyboard.add(types.InlineKeyboardButton(
                 f"{product.name} - {utils.format_money(product.price)}",
-                callback_data=f"product_{product.id}"
+                callback_data=callback_data.encode("product", product.id)
             ))
         
         keyboard.add(keyboards.BACK_BUTTON)
@@ -414,21 +402,7 @@ def add_to_cart(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.answer_callback_query(call.id)
     
     # Получаем данные из callback_data
-    data_parts = call.data.split("_")
-    
-    # Проверяем правильность формата callback_data
-    if len(data_parts) < 5 or "_".join(data_parts[:3]) != "add_to_cart":
-        logger = logging.getLogger(__name__)
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    try:
-        product_id = int(data_parts[3])
-        quantity = float(data_parts[4])
-    except (ValueError, IndexError):
-        logger = logging.getLogger(__name__)
-        logger.error(f"Ошибка при обработке данных из callback_data: {call.data}")
-        return
+    product_id, quantity = callback_data.args(call.data)
     
     user_id = call.from_user.id
     
@@ -465,18 +439,7 @@ def remove_from_cart(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.answer_callback_query(call.id)
     
     # Получаем ID товара из callback_data
-    data_parts = call.data.split("_")
-    
-    # Проверяем правильность формата callback_data
-    if len(data_parts) < 4 or "_".join(data_parts[:3]) != "remove_from_cart":
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    try:
-        product_id = int(data_parts[3])
-    except (ValueError, IndexError):
-        logger.error(f"Ошибка при обработке данных из callback_data: {call.data}")
-        return
+    product_id = callback_data.args(call.data)[0]
     
     user_id = call.from_user.id
     
@@ -540,10 +503,7 @@ def ask_custom_quantity(bot: telebot.TeleBot, call: types.CallbackQuery) -> None
     """Запросить у пользователя ввод количества товара вручную."""
     bot.answer_callback_query(call.id)
     # Сохраняем ID товара в состоянии
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        return
-    product_id = int(data_parts[2])
+    product_id = callback_data.args(call.data)[0]
     with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
         data['current_product_id'] = product_id
     # Устанавливаем специальное состояние
@@ -644,6 +604,6 @@ def call_product_selected_from_message(bot, message, product_id):
         chat_id=message.chat.id,
         message_id=getattr(message, 'message_id', None),
         content_type=getattr(message, 'content_type', 'text'),
-        data=f"product_{product_id}"
+        data=callback_data.encode("product", product_id)
     )
     product_selected(bot, fake_call)
\ No newline at end of file
@@ -4,6 +4,7 @@ from telebot import types
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+import callback_data
 import keyboards
 import utils
 import config
@@ -36,11 +37,8 @@ def view_orders(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     try:
         bot.answer_callback_query(call.id)
         
-        # Получаем все заказы для подсчета страниц
-        all_orders = get_filtered_orders(filter_type, sort_type, sort_direction, get_all=True)
-        
         # Вычисляем общее количество страниц
-        total_orders = len(all_orders)
+        total_orders = count_filtered_orders(filter_type)
         total_pages = max(1, (total_orders + page_size - 1) // page_size)  # Округление вверх
         logger.info(f"Всего заказов: {total_orders}, размер страницы: {page_size}, всего страниц: {total_pages}")
         
@@ -91,6 +89,18 @@ def view_orders(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
         except Exception as e2:
             logger.error(f"Не удалось восстановиться после ошибки просмотра заказов: {str(e2)}")
 
+def get_status_filter(filter_type: str) -> Dict[str, str]:
+    """Параметры фильтра по статусу для db.find_orders / db.count_orders."""
+    if filter_type == "new":
+        return {"exclude_status": "completed"}
+    if filter_type == "completed":
+        return {"status": "completed"}
+    return {}  # all
+
+def count_filtered_orders(filter_type: str) -> int:
+    """Количество заказов, соответствующих фильтру."""
+    return db.count_orders(**get_status_filter(filter_type))
+
 def get_filtered_orders(filter_type: str, sort_type: str, sort_direction: str, get_all: bool = False) -> List:
     """
     Получить список заказов с учетом фильтра и сортировки.
@@ -107,61 +117,31 @@ def get_filtered_orders(filter_type: str, sort_type: str, sort_direction: str, g
     logger = logging.getLogger(__name__)
     
     try:
-        # Получаем все заказы
-        all_orders = db.get_orders()
-        logger.info(f"Всего получено заказов: {len(all_orders)}")
-        
-        # Применяем фильтр
-        if filter_type == "new":
-            filtered_orders = [o for o in all_orders if o.status != "completed"]
-        elif filter_type == "completed":
-            filtered_orders = [o for o in all_orders if o.status == "completed"]
-        else:  # all
-            filtered_orders = all_orders
+        status_filter = get_status_filter(filter_type)
         
-        logger.info(f"После фильтрации осталось заказов: {len(filtered_orders)}")
-        
-        # Проверяем, есть ли заказы после фильтрации
-        if not filtered_orders:
-            logger.warning(f"Нет заказов, соответствующих фильтру: {filter_type}")
-            return []
-        
-        # Применяем сортировку с проверкой атрибутов
+        # Поле сортировки
         if sort_type == "date":
-            # Проверяем наличие атрибута created_at у всех заказов
-            if all(hasattr(o, "created_at") and o.created_at for o in filtered_orders):
-                # Сортировка по дате создания
-                if sort_direction == "asc":
-                    # По возрастанию (сначала старые)
-                    sorted_orders = sorted(filtered_orders, key=lambda o: o.created_at)
-                else:
-                    # По убыванию (сначала новые)
-                    sorted_orders = sorted(filtered_orders, key=lambda o: o.created_at, reverse=True)
-            else:
-                logger.error("Некоторые заказы не имеют атрибута created_at, сортировка невозможна")
-                sorted_orders = filtered_orders
-                
+            sort_by = "created_at"
         elif sort_type == "user":
-            # Проверяем наличие атрибута user_id у всех заказов
-            if all(hasattr(o, "user_id") for o in filtered_orders):
-                # Сортировка по ID пользователя
-                if sort_direction == "asc":
-                    sorted_orders = sorted(filtered_orders, key=lambda o: o.user_id)
-                else:
-                    sorted_orders = sorted(filtered_orders, key=lambda o: o.user_id, reverse=True)
-            else:
-                logger.error("Некоторые заказы не имеют атрибута user_id, сортировка невозможна")
-                sorted_orders = filtered_orders
+            sort_by = "user_id"
         else:
             # Без сортировки
-            sorted_orders = filtered_orders
+            sort_by = None
+        descending = sort_direction != "asc"
         
         # Возвращаем все заказы, если запрошено
         if get_all:
-            return sorted_orders
+            return db.find_orders(sort_by=sort_by, descending=descending, **status_filter)
         
         # Применяем пагинацию
-        total_orders = len(sorted_orders)
+        total_orders = db.count_orders(**status_filter)
+        logger.info(f"После фильтрации осталось заказов: {total_orders}")
+        
+        # Проверяем, есть ли заказы после фильтрации
+        if not total_orders:
+            logger.warning(f"Нет заказов, соответствующих фильтру: {filter_type}")
+            return []
+        
         total_pages = max(1, (total_orders + page_size - 1) // page_size)  # Округление вверх
         
         # Если текущая страница вышла за пределы, корректируем её
@@ -169,12 +149,15 @@ def get_filtered_orders(filter_type: str, sort_type: str, sort_direction: str, g
         if current_page > total_pages:
             current_page = total_pages
         
-        # Вычисляем индексы начала и конца для текущей страницы
-        start_idx = (current_page - 1) * page_size
-        end_idx = min(start_idx + page_size, total_orders)
-        
         # Получаем заказы для текущей страницы
-        paginated_orders = sorted_orders[start_idx:end_idx]
+        start_idx = (current_page - 1) * page_size
+        paginated_orders = db.find_orders(
+            sort_by=sort_by,
+            descending=descending,
+            offset=start_idx,
+            limit=page_size,
+            **status_filter
+        )
         
         logger.info(f"Возвращаем {len(paginated_orders)} заказов для страницы {current_page}/{total_pages}")
         return paginated_orders
@@ -189,12 +172,7 @@ def view_order_detail(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     bot.answer_callback_query(call.id)
     
     # Получаем ID заказа из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    order_id = int(data_parts[2])
+    order_id = callback_data.args(call.data)[0]
     
     # Получаем информацию о заказе
     order = db.get_order(order_id)
@@ -300,12 +278,8 @@ def handle_order_filter(bot: telebot.TeleBot, call: types.CallbackQuery) -> None
     bot.answer_callback_query(call.id)
     
     # Получаем тип фильтра из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        return
-    
     # Если нажали на тот же фильтр, что уже выбран, ничего не делаем
-    new_filter_type = data_parts[2]  # "all", "new", "completed"
+    new_filter_type = callback_data.args(call.data)[0]  # "all", "new", "completed"
     if new_filter_type == filter_type:
         return
     
@@ -336,12 +310,7 @@ def handle_order_sort(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     
     try:
         # Получаем тип сортировки из callback_data
-        data_parts = call.data.split("_")
-        if len(data_parts) < 3:
-            logger.error(f"Неверный формат callback_data для сортировки: {call.data}")
-            return
-        
-        new_sort_type = data_parts[2]  # "date", "user"
+        new_sort_type = callback_data.args(call.data)[0]  # "date", "user"
         logger.info(f"Тип сортировки: {new_sort_type}, текущий тип: {sort_type}, направление: {sort_direction}")
         
         # Если нажали на ту же сортировку, меняем направление
@@ -399,13 +368,9 @@ def change_order_status(bot: telebot.TeleBot, call: types.CallbackQuery) -> None
     bot.answer_callback_query(call.id)
     
     # Получаем ID заказа и действие из callback_data
-    data_parts = call.data.split("_")
-    if len(data_parts) < 3:
-        logger.error(f"Неверный формат callback_data: {call.data}")
-        return
-    
-    action = data_parts[0]  # complete или reopen
-    order_id = int(data_parts[2])
+    action, args = callback_data.parse(call.data)
+    action = action.split("_")[0]  # complete или reopen
+    order_id = args[0]
     
     # Получаем информацию о заказе
     order = db.get_order(order_id)
@@ -421,13 +386,14 @@ def change_order_status(bot: telebot.TeleBot, call: types.CallbackQuery) -> None
     
     # Обновляем статус заказа
     new_status = "completed" if action == "complete" else "new"
-    db.update_order_status(order_id, new_status)
-    
-    # Получаем обновленный заказ
-    updated_order = db.get_order(order_id)
+    updated_order = db.update_order_status(order_id, new_status)
     
     # Формируем текст с информацией о заказе
-    order_text = format_order_details(updated_order)
+    if updated_order:
+        order_text = format_order_details(updated_order)
+    else:
+        # Заказ перенесен в архив, пока было открыто сообщение
+        order_text = format_order_details(order) + "\n\n⚠️ Заказ перенесен в архив, его статус не меняется."
     
     bot.edit_message_text(
         order_text,
@@ -463,7 +429,7 @@ def notify_admin_about_new_order(bot: telebot.TeleBot, order_id: int) -> None:
         
         # Создаем клавиатуру с кнопкой просмотра заказа
         keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("📋 Посмотреть заказ", callback_data=f"view_order_{order.id}"))
+        keyboard.add(types.InlineKeyboardButton("📋 Посмотреть заказ", callback_data=callback_data.encode("view_order", order.id)))
         
         # Отправляем уведомление администратору
         bot.send_message(
@@ -486,17 +452,16 @@ def handle_page_navigation(bot: telebot.TeleBot, call: types.CallbackQuery) -> N
     bot.answer_callback_query(call.id)
     
     # Получаем действие из callback_data
-    action = call.data.split("_")[1]  # "prev" или "next"
+    action = callback_data.action_of(call.data)  # "page_prev" или "page_next"
     
-    # Получаем все заказы для подсчета страниц
-    all_orders = get_filtered_orders(filter_type, sort_type, sort_direction, get_all=True)
-    total_orders = len(all_orders)
+    # Подсчитываем количество страниц
+    total_orders = count_filtered_orders(filter_type)
     total_pages = max(1, (total_orders + page_size - 1) // page_size)
     
     # Обновляем текущую страницу в зависимости от действия
-    if action == "prev" and current_page > 1:
+    if action == "page_prev" and current_page > 1:
         current_page -= 1
-    elif action == "next" and current_page < total_pages:
+    elif action == "page_next" and current_page < total_pages:
         current_page += 1
     
     logger.info(f"Новая страница: {current_page}/{total_pages}")
@@ -523,7 +488,7 @@ def handle_page_size_change(bot: telebot.TeleBot, call: types.CallbackQuery) ->
     
     # Получаем новый размер страницы из callback_data
     try:
-        new_size = int(call.data.split("_")[2])  # "10" или "20"
+        new_size = callback_data.args(call.data)[0]  # 10 или 20
         
         # Проверяем, что новый размер находится в списке доступных
         if new_size in available_page_sizes:
@@ -3,6 +3,7 @@ import telebot
 from telebot import types
 import logging
 
+import callback_data
 import keyboards
 import utils
 from database import db
@@ -47,8 +48,9 @@ def mode_selector(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
     user_id = call.from_user.id
     
     bot.answer_callback_query(call.id)
+    mode = callback_data.args(call.data)[0]
     
-    if call.data == "mode_customer":
+    if mode == "customer":
         # Устанавливаем состояние CUSTOMER_MODE
         bot.set_state(call.from_user.id, BotStates.CUSTOMER_MODE, call.message.chat.id)
         
@@ -59,7 +61,7 @@ def mode_selector(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
             reply_markup=keyboards.get_customer_main_keyboard_with_cart(call.from_user.id)
         )
     
-    elif call.data == "mode_admin":
+    elif mode == "admin":
         # Проверяем, имеет ли пользователь права администратора
         if user_id == config.ADMIN_USER_ID:
             logger.info(f"Пользователь {user_id} вошел в режим администратора (авторизован)")
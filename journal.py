@@ -0,0 +1,69 @@
+import os
+from typing import Any, Dict, Iterator, Optional
+
+import codec
+
+
+class Journal:
+    """
+    Журнал изменений коллекции (append-only).
+
+    Каждая мутация записывается одной компактной JSON-строкой:
+    {"op": "put", "id": ..., "data": {...}} или {"op": "del", "id": ...}.
+    При загрузке журнал применяется поверх снимка коллекции, после
+    компактизации (перезаписи снимка) журнал очищается.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0  # Количество записей в журнале
+        self._file = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append(self, op: str, key: Any, data: Optional[Dict[str, Any]] = None) -> None:
+        """Дописывает одну запись в конец журнала"""
+        record = {"op": op, "id": key}
+        if data is not None:
+            record["data"] = data
+
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'ab')
+        self._file.write(codec.dumps(record) + b"\n")
+        self._file.flush()
+        self.size += 1
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """
+        Последовательно возвращает записи журнала.
+        Оборванная последняя строка (сбой во время записи) пропускается.
+        """
+        self.size = 0
+        if not self.exists():
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = codec.loads(line)
+                except (ValueError, UnicodeDecodeError):
+                    print(f"Пропущена поврежденная запись журнала {self.path}")
+                    continue
+                self.size += 1
+                yield record
+
+    def clear(self) -> None:
+        """Очищает журнал после записи полного снимка коллекции"""
+        self.close()
+        if self.exists():
+            os.remove(self.path)
+        self.size = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,113 @@
+"""
+Потоковое чтение больших JSON-файлов.
+
+Файл читается блоками, а элементы корневого массива (или значения корневого
+объекта) разбираются по одному, поэтому в памяти находится только текущий
+блок и текущий элемент, а не весь документ.
+"""
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+
+# Символы, которыми может продолжаться число ("123." + "45", "1e" + "-5")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JsonStream:
+    """Последовательный разбор JSON-документа из двоичного файла"""
+
+    def __init__(self, file: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # Блок может оборваться посередине многобайтового символа UTF-8
+        self._text = codecs.getincrementaldecoder('utf-8')()
+
+    def _read(self) -> bool:
+        """Дочитывает следующий блок в буфер; False - файл закончился"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            self._text.decode(b"", final=True)
+            return False
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Первый непробельный символ (без его извлечения); пустая строка - конец файла"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"ожидался '{char}', найден '{found or 'конец файла'}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Разбор одного значения целиком"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # Число в конце буфера может продолжаться в следующем блоке
+            if not self._eof and _NUMBER_TAIL.fullmatch(self._buffer, end) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """Элементы массива, начинающегося с текущей позиции"""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            self._expect(",")
+
+    def keys(self) -> Iterator[str]:
+        """
+        Ключи объекта, начинающегося с текущей позиции. После каждого ключа
+        значение нужно прочитать вызывающему (value() или items()).
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            if self.peek() == "}":
+                self._pos += 1
+                return
+            self._expect(",")
+
+
+def iter_object(stream: JsonStream) -> Iterator[Tuple[str, Any]]:
+    """Пары (ключ, значение) корневого объекта по одной"""
+    for key in stream.keys():
+        yield key, stream.value()
@@ -1,9 +1,12 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+import json
 import logging
+import threading
 import telebot
 from telebot import types
 from datetime import datetime
 
+import callback_data
 import utils
 import config
 from database import db
@@ -12,78 +15,169 @@ from models import Category, Product
 # Общая кнопка "Назад"
 BACK_BUTTON = types.InlineKeyboardButton("↩️  Назад", callback_data="back")
 
+def _dump_row(row: List[types.InlineKeyboardButton]) -> str:
+    return json.dumps([button.to_dict() for button in row])
+
+class PrebuiltMarkup(types.InlineKeyboardMarkup):
+    """
+    Inline-клавиатура, JSON которой собирается из заранее сериализованных рядов.
+
+    pyTelegramBotAPI вызывает to_json() у reply_markup при каждой отправке;
+    здесь ряды кнопок сериализуются один раз, а copy() переносит готовый JSON
+    в новую клавиатуру. Ряды, добавленные через add() или row() (например,
+    кнопка корзины), сериализуются отдельно и дописываются к готовому JSON.
+    """
+    
+    def __init__(self, rows: List[List[types.InlineKeyboardButton]], row_width: int = 3,
+                 row_json: Optional[List[str]] = None, text: Optional[str] = None):
+        super().__init__([list(row) for row in rows], row_width)
+        self._row_json = list(row_json) if row_json is not None else [_dump_row(row) for row in self.keyboard]
+        self._json = text
+    
+    @classmethod
+    def from_markup(cls, markup: types.InlineKeyboardMarkup) -> 'PrebuiltMarkup':
+        return cls(markup.keyboard, markup.row_width)
+    
+    def copy(self) -> 'PrebuiltMarkup':
+        """Копия для показа: ряды можно дополнять, не меняя исходную клавиатуру"""
+        return PrebuiltMarkup(self.keyboard, self.row_width, self._row_json, self.to_json())
+    
+    def add(self, *args, row_width=None) -> 'PrebuiltMarkup':
+        count = len(self.keyboard)
+        super().add(*args, row_width=row_width)
+        self._extend(count)
+        return self
+    
+    def row(self, *args) -> 'PrebuiltMarkup':
+        count = len(self.keyboard)
+        super().row(*args)
+        self._extend(count)
+        return self
+    
+    def _extend(self, count: int) -> None:
+        self._row_json.extend(_dump_row(row) for row in self.keyboard[count:])
+        self._json = None
+    
+    def to_json(self) -> str:
+        if len(self._row_json) != len(self.keyboard):
+            # Ряды изменены напрямую, минуя add() и row()
+            self._row_json = [_dump_row(row) for row in self.keyboard]
+            self._json = None
+        if self._json is None:
+            self._json = '{"inline_keyboard": [' + ", ".join(self._row_json) + ']}'
+        return self._json
+
+# Неизменяемые клавиатуры: имя -> PrebuiltMarkup, строятся при первом показе
+_static_keyboards: Dict[str, PrebuiltMarkup] = {}
+
+def _static_keyboard(name: str, build: Callable[[], types.InlineKeyboardMarkup]) -> PrebuiltMarkup:
+    template = _static_keyboards.get(name)
+    if template is None:
+        template = _static_keyboards.setdefault(name, PrebuiltMarkup.from_markup(build()))
+    return template.copy()
+
+# Готовые клавиатуры каталога: (вид, категория, префикс, версия каталога) -> PrebuiltMarkup.
+# Строятся один раз на версию каталога (db.get_catalog_version), при показе
+# копируется готовая клавиатура и добавляется кнопка корзины пользователя
+_catalog_keyboards: Dict[Tuple, PrebuiltMarkup] = {}
+_catalog_keyboards_lock = threading.Lock()
+
+def _catalog_keyboard(kind: str, category_id: Optional[int], action_prefix: Optional[str],
+                      build: Callable[[], List[List[types.InlineKeyboardButton]]]) -> PrebuiltMarkup:
+    """Клавиатура каталога из кэша (ряды строятся build при первом обращении на версии каталога)"""
+    version = db.get_catalog_version()
+    key = (kind, category_id, action_prefix, version)
+    template = _catalog_keyboards.get(key)
+    if template is None:
+        template = PrebuiltMarkup(build())
+        with _catalog_keyboards_lock:
+            # Клавиатуры прежних версий каталога больше не понадобятся
+            for stale in [cached for cached in _catalog_keyboards if cached[3] != version]:
+                del _catalog_keyboards[stale]
+            if db.get_catalog_version() == version:
+                _catalog_keyboards[key] = template
+    return template.copy()
+
+def _add_cart_button(keyboard: types.InlineKeyboardMarkup, user_id: int) -> None:
+    """Кнопка корзины с суммой, если корзина пользователя не пуста"""
+    user = db.get_user(user_id)
+    if user and user.cart:
+        total = utils.calculate_cart_total(user_id)
+        logging.getLogger(__name__).debug(f"Добавление кнопки корзины: Корзина ({utils.format_money(total)}), callback_data=cart")
+        keyboard.add(types.InlineKeyboardButton(f"🛒 Корзина ({utils.format_money(total)})", callback_data="cart"))
+
 # Стартовые клавиатуры
 def get_start_keyboard(user_id: int = None) -> types.InlineKeyboardMarkup:
     """Стартовая клавиатура с выбором режима"""
     keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton("Режим покупателя", callback_data="mode_customer"))
+    keyboard.add(types.InlineKeyboardButton("Режим покупателя", callback_data=callback_data.encode("mode", "customer")))
     
     # Показываем кнопку администрирования только администратору
     if user_id == config.ADMIN_USER_ID:
-        keyboard.add(types.InlineKeyboardButton("Администрирование", callback_data="mode_admin"))
+        keyboard.add(types.InlineKeyboardButton("Администрирование", callback_data=callback_data.encode("mode", "admin")))
     
     return keyboard
 
 # Клавиатуры для режима администратора
 def get_admin_main_keyboard() -> types.InlineKeyboardMarkup:
     """Главная клавиатура администратора"""
-    keyboard = types.InlineKeyboardMarkup(row_width=3)
-    keyboard.add(
-        types.InlineKeyboardButton("Добавить категорию", callback_data="admin_add_category"),
-        types.InlineKeyboardButton("Изменить", callback_data="admin_edit_category"),
-        types.InlineKeyboardButton("Удалить", callback_data="admin_delete_category")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton("Добавить товар", callback_data="admin_add_product"),
-        types.InlineKeyboardButton("Изменить", callback_data="admin_edit_product"),
-        types.InlineKeyboardButton("Удалить", callback_data="admin_delete_product")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton("Заказы", callback_data="admin_orders"),
-        types.InlineKeyboardButton("Аналитика", callback_data="admin_analytics")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton("Сохранить", callback_data="admin_save_data"),
-        types.InlineKeyboardButton("Загрузить", callback_data="admin_load_data")
-    )
-    keyboard.add(types.InlineKeyboardButton("Вернуться к выбору режима", callback_data="back_to_start"))
-    return keyboard
-
-def get_categories_keyboard(action_prefix: str) -> types.InlineKeyboardMarkup:
-    """Клавиатура для выбора категории"""
-    logger = logging.getLogger(__name__)
-    logger.info(f"Создание клавиатуры для выбора категории с префиксом: {action_prefix}")
-    
-    keyboard = types.InlineKeyboardMarkup()
-    categories = db.get_categories()
-    logger.info(f"Получено категорий: {len(categories)}")
-    
-    for category in categories:
-        callback_data = f"{action_prefix}_{category.id}"
-        logger.info(f"Добавление кнопки: {category.name} с callback_data: {callback_data}")
-        keyboard.add(types.InlineKeyboardButton(category.name, callback_data=callback_data))
+    def build() -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup(row_width=3)
+        keyboard.add(
+            types.InlineKeyboardButton("Добавить категорию", callback_data="admin_add_category"),
+            types.InlineKeyboardButton("Изменить", callback_data="admin_edit_category"),
+            types.InlineKeyboardButton("Удалить", callback_data="admin_delete_category")
+        )
+        keyboard.add(
+            types.InlineKeyboardButton("Добавить товар", callback_data="admin_add_product"),
+            types.InlineKeyboardButton("Изменить", callback_data="admin_edit_product"),
+            types.InlineKeyboardButton("Удалить", callback_data="admin_delete_product")
+        )
+        keyboard.add(
+            types.InlineKeyboardButton("Заказы", callback_data="admin_orders"),
+            types.InlineKeyboardButton("Аналитика", callback_data="admin_analytics")
+        )
+        keyboard.add(
+            types.InlineKeyboardButton("Сохранить", callback_data="admin_save_data"),
+            types.InlineKeyboardButton("Загрузить", callback_data="admin_load_data")
+        )
+        keyboard.add(types.InlineKeyboardButton("Вернуться к выбору режима", callback_data="back_to_start"))
+        return keyboard
     
-    keyboard.add(BACK_BUTTON)
-    return keyboard
+    return _static_keyboard("admin_main", build)
 
-def get_products_keyboard(category_id: Optional[int], action_prefix: str) -> types.InlineKeyboardMarkup:
-    """Клавиатура для выбора товара"""
-    keyboard = types.InlineKeyboardMarkup()
-    products = db.get_products(category_id)
-    
-    # Сортируем товары по алфавиту
-    sorted_products = sorted(products, key=lambda p: p.name)
-    
-    for product in sorted_products:
-        product_text = f"{product.name} ({utils.format_money(product.price)})"
-        if not product.available:
-            product_text += " [Недоступен]"
+def get_categories_keyboard(action: str) -> types.InlineKeyboardMarkup:
+    """Клавиатура для выбора категории; action - действие кнопок (callback_data.ACTIONS)"""
+    def build() -> List[List[types.InlineKeyboardButton]]:
+        logger = logging.getLogger(__name__)
+        categories = db.get_categories()
+        logger.debug(f"Создание клавиатуры для выбора категории с действием {action}, категорий: {len(categories)}")
         
-        callback_data = f"{action_prefix}_{product.id}"
-        keyboard.add(types.InlineKeyboardButton(product_text, callback_data=callback_data))
+        rows = []
+        for category in categories:
+            data = callback_data.encode(action, category.id)
+            logger.debug(f"Добавление кнопки: {category.name} с callback_data: {data}")
+            rows.append([types.InlineKeyboardButton(category.name, callback_data=data)])
+        rows.append([BACK_BUTTON])
+        return rows
+    
+    return _catalog_keyboard("categories", None, action, build)
+
+def get_products_keyboard(category_id: Optional[int], action: str) -> types.InlineKeyboardMarkup:
+    """Клавиатура для выбора товара; action - действие кнопок (callback_data.ACTIONS)"""
+    def build() -> List[List[types.InlineKeyboardButton]]:
+        rows = []
+        # Сортируем товары по алфавиту
+        for product in sorted(db.get_products(category_id), key=lambda p: p.name):
+            product_text = f"{product.name} ({utils.format_money(product.price)})"
+            if not product.available:
+                product_text += " [Недоступен]"
+            
+            rows.append([types.InlineKeyboardButton(product_text, callback_data=callback_data.encode(action, product.id))])
+        rows.append([BACK_BUTTON])
+        return rows
     
-    keyboard.add(BACK_BUTTON)
-    return keyboard
+    return _catalog_keyboard("products", category_id, action, build)
 
 def get_product_edit_keyboard(product_id: int) -> types.InlineKeyboardMarkup:
     """Клавиатура для редактирования товара"""
@@ -91,22 +185,25 @@ def get_product_edit_keyboard(product_id: int) -> types.InlineKeyboardMarkup:
     product = db.get_product(product_id)
     availability_text = "Снять с продажи" if product.available else "Вернуть в продажу"
     
-    keyboard.add(types.InlineKeyboardButton("Изменить название", callback_data=f"edit_product_name_{product_id}"))
-    keyboard.add(types.InlineKeyboardButton("Изменить цену", callback_data=f"edit_product_price_{product_id}"))
-    keyboard.add(types.InlineKeyboardButton("Изменить картинку", callback_data=f"edit_product_image_{product_id}"))
-    keyboard.add(types.InlineKeyboardButton(availability_text, callback_data=f"edit_product_available_{product_id}"))
+    keyboard.add(types.InlineKeyboardButton("Изменить название", callback_data=callback_data.encode("edit_product_name", product_id)))
+    keyboard.add(types.InlineKeyboardButton("Изменить цену", callback_data=callback_data.encode("edit_product_price", product_id)))
+    keyboard.add(types.InlineKeyboardButton("Изменить картинку", callback_data=callback_data.encode("edit_product_image", product_id)))
+    keyboard.add(types.InlineKeyboardButton(availability_text, callback_data=callback_data.encode("edit_product_available", product_id)))
     keyboard.add(BACK_BUTTON)
     return keyboard
 
 def get_unit_selection_keyboard() -> types.InlineKeyboardMarkup:
     """Клавиатура для выбора единицы измерения"""
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    keyboard.add(
-        types.InlineKeyboardButton("кг", callback_data="unit_kg"),
-        types.InlineKeyboardButton("шт", callback_data="unit_piece")
-    )
-    keyboard.add(BACK_BUTTON)
-    return keyboard
+    def build() -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup(row_width=2)
+        keyboard.add(
+            types.InlineKeyboardButton("кг", callback_data=callback_data.encode("unit", "kg")),
+            types.InlineKeyboardButton("шт", callback_data=callback_data.encode("unit", "piece"))
+        )
+        keyboard.add(BACK_BUTTON)
+        return keyboard
+    
+    return _static_keyboard("unit_selection", build)
 
 def get_backup_list_keyboard() -> types.InlineKeyboardMarkup:
     """Клавиатура для выбора резервной копии"""
@@ -114,7 +211,7 @@ def get_backup_list_keyboard() -> types.InlineKeyboardMarkup:
     backups = db.list_backups()
     
     for backup in backups:
-        keyboard.add(types.InlineKeyboardButton(backup, callback_data=f"load_backup_{backup}"))
+        keyboard.add(types.InlineKeyboardButton(backup, callback_data=callback_data.encode("load_backup", backup)))
     
     keyboard.add(BACK_BUTTON)
     return keyboard
@@ -122,64 +219,42 @@ def get_backup_list_keyboard() -> types.InlineKeyboardMarkup:
 # Клавиатуры для режима покупателя
 def get_customer_main_keyboard() -> types.InlineKeyboardMarkup:
     """Главная клавиатура покупателя"""
-    keyboard = types.InlineKeyboardMarkup()
-    categories = db.get_categories()
-    
-    # Добавляем категории
-    for category in categories:
-        keyboard.add(types.InlineKeyboardButton(category.name, callback_data=f"category_{category.id}"))
-    
-    # Добавляем избранное и поиск
-    keyboard.add(types.InlineKeyboardButton("❤️ Избранное", callback_data="favorites"))
-    keyboard.add(types.InlineKeyboardButton("🔍 Поиск", callback_data="search"))
-    
-    return keyboard
+    def build() -> List[List[types.InlineKeyboardButton]]:
+        # Категории, затем избранное и поиск
+        rows = [[types.InlineKeyboardButton(category.name, callback_data=callback_data.encode("category", category.id))]
+                for category in db.get_categories()]
+        rows.append([types.InlineKeyboardButton("❤️ Избранное", callback_data="favorites")])
+        rows.append([types.InlineKeyboardButton("🔍 Поиск", callback_data="search")])
+        return rows
+    
+    return _catalog_keyboard("customer_main", None, None, build)
 
 def get_customer_main_keyboard_with_cart(user_id: int) -> types.InlineKeyboardMarkup:
     """Главная клавиатура покупателя с корзиной, если она не пуста"""
-    logger = logging.getLogger(__name__)
-    logger.info(f"Создание клавиатуры с корзиной для пользователя: {user_id}")
-    
+    logging.getLogger(__name__).debug(f"Создание клавиатуры с корзиной для пользователя: {user_id}")
     keyboard = get_customer_main_keyboard()
-    
-    # Проверяем, не пуста ли корзина
-    user = db.get_user(user_id)
-    if user and user.cart:
-        total = utils.calculate_cart_total(user_id)
-        logger.info(f"Добавление кнопки корзины: Корзина ({utils.format_money(total)}), callback_data=cart")
-        keyboard.add(types.InlineKeyboardButton(f"🛒 Корзина ({utils.format_money(total)})", callback_data="cart"))
-    else:
-        logger.info(f"Корзина пользователя пуста или пользователь не найден: {user_id}")
-    
+    _add_cart_button(keyboard, user_id)
     return keyboard
 
 def get_products_by_category_keyboard(category_id: int, user_id: int) -> types.InlineKeyboardMarkup:
     """Клавиатура с товарами в категории"""
     logger = logging.getLogger(__name__)
-    logger.info(f"Создание клавиатуры с товарами категории {category_id} для пользователя: {user_id}")
-    
-    keyboard = types.InlineKeyboardMarkup()
-    products = db.get_available_products(category_id)
-    
-    # Сортируем товары по алфавиту
-    sorted_products = sorted(products, key=lambda p: p.name)
-    
-    for product in sorted_products:
-        product_text = f"{product.name} - {utils.format_money(product.price)}"
-        callback_data = f"product_{product.id}"
-        logger.debug(f"Добавление кнопки товара: {product_text}, callback_data={callback_data}")
-        keyboard.add(types.InlineKeyboardButton(product_text, callback_data=callback_data))
-    
-    # Добавляем кнопку назад
-    keyboard.add(BACK_BUTTON)
-    
-    # Проверяем, не пуста ли корзина
-    user = db.get_user(user_id)
-    if user and user.cart:
-        total = utils.calculate_cart_total(user_id)
-        logger.info(f"Добавление кнопки корзины в категории: Корзина ({utils.format_money(total)}), callback_data=cart")
-        keyboard.add(types.InlineKeyboardButton(f"🛒 Корзина ({utils.format_money(total)})", callback_data="cart"))
-    
+    logger.debug(f"Создание клавиатуры с товарами категории {category_id} для пользователя: {user_id}")
+    
+    def build() -> List[List[types.InlineKeyboardButton]]:
+        rows = []
+        # Сортируем товары по алфавиту
+        for product in sorted(db.get_available_products(category_id), key=lambda p: p.name):
+            product_text = f"{product.name} - {utils.format_money(product.price)}"
+            data = callback_data.encode("product", product.id)
+            logger.debug(f"Добавление кнопки товара: {product_text}, callback_data={data}")
+            rows.append([types.InlineKeyboardButton(product_text, callback_data=data)])
+        # Добавляем кнопку назад
+        rows.append([BACK_BUTTON])
+        return rows
+    
+    keyboard = _catalog_keyboard("category_products", category_id, None, build)
+    _add_cart_button(keyboard, user_id)
     return keyboard
 
 def get_product_detail_keyboard(product: Product, user_id: int, allow_custom_quantity: bool = False) -> types.InlineKeyboardMarkup:
@@ -198,30 +273,30 @@ def get_product_detail_keyboard(product: Product, user_id: int, allow_custom_qua
         return keyboard
     
     favorite_text = "❌ Удалить из избранного" if product.id in user.favorites else "❤ Добавить в избранное"
-    favorite_callback = f"remove_favorite_{product.id}" if product.id in user.favorites else f"add_favorite_{product.id}"
+    favorite_callback = callback_data.encode("remove_favorite" if product.id in user.favorites else "add_favorite", product.id)
     
     keyboard.add(types.InlineKeyboardButton(favorite_text, callback_data=favorite_callback))
     
     # Кнопки для добавления товара в корзину
     if product.unit == "шт":
-        keyboard.add(types.InlineKeyboardButton("+1 шт", callback_data=f"add_to_cart_{product.id}_1"))
+        keyboard.add(types.InlineKeyboardButton("+1 шт", callback_data=callback_data.encode("add_to_cart", product.id, 1)))
     else:
         keyboard.add(
-            types.InlineKeyboardButton("+1 кг", callback_data=f"add_to_cart_{product.id}_1"),
-            types.InlineKeyboardButton("+0.5 кг", callback_data=f"add_to_cart_{product.id}_0.5")
+            types.InlineKeyboardButton("+1 кг", callback_data=callback_data.encode("add_to_cart", product.id, 1)),
+            types.InlineKeyboardButton("+0.5 кг", callback_data=callback_data.encode("add_to_cart", product.id, 0.5))
         )
         keyboard.add(
-            types.InlineKeyboardButton("+0.25 кг", callback_data=f"add_to_cart_{product.id}_0.25"),
-            types.InlineKeyboardButton("+0.1 кг", callback_data=f"add_to_cart_{product.id}_0.1")
+            types.InlineKeyboardButton("+0.25 кг", callback_data=callback_data.encode("add_to_cart", product.id, 0.25)),
+            types.InlineKeyboardButton("+0.1 кг", callback_data=callback_data.encode("add_to_cart", product.id, 0.1))
         )
     # Новая кнопка для ручного ввода количества
     if allow_custom_quantity:
-        keyboard.add(types.InlineKeyboardButton("👉 Ввести количество", callback_data=f"custom_quantity_{product.id}"))
+        keyboard.add(types.InlineKeyboardButton("👉 Ввести количество", callback_data=callback_data.encode("custom_quantity", product.id)))
     
     # Кнопка для удаления товара из корзины только если товар есть в корзине
     product_in_cart = any(item.product_id == product.id for item in user.cart)
     if product_in_cart:
-        keyboard.add(types.InlineKeyboardButton("❌ Удалить из корзины", callback_data=f"remove_from_cart_{product.id}"))
+        keyboard.add(types.InlineKeyboardButton("❌ Удалить из корзины", callback_data=callback_data.encode("remove_from_cart", product.id)))
     
     # Кнопка назад
     keyboard.add(BACK_BUTTON)
@@ -245,9 +320,9 @@ def get_favorites_keyboard(user_id: int) -> types.InlineKeyboardMarkup:
     
     for product in sorted_favorites:
         product_text = f"{product.name} - {utils.format_money(product.price)}"
-        callback_data = f"product_{product.id}"
-        logger.debug(f"Добавление кнопки избранного товара: {product_text}, callback_data={callback_data}")
-        keyboard.add(types.InlineKeyboardButton(product_text, callback_data=callback_data))
+        data = callback_data.encode("product", product.id)
+        logger.debug(f"Добавление кнопки избранного товара: {product_text}, callback_data={data}")
+        keyboard.add(types.InlineKeyboardButton(product_text, callback_data=data))
     
     # Добавляем кнопку назад
     keyboard.add(BACK_BUTTON)
@@ -290,39 +365,46 @@ def get_cart_keyboard(user_id: int) -> types.InlineKeyboardMarkup:
 
 def get_checkout_keyboard(user_id: int) -> types.InlineKeyboardMarkup:
     """Клавиатура для оформления заказа"""
-    keyboard = types.InlineKeyboardMarkup()
     user = db.get_user(user_id)
-    
     # Если у пользователя есть сохраненный адрес и телефон, предлагаем использовать их
-    if user.phone and user.address:
-        keyboard.add(types.InlineKeyboardButton("Использовать сохраненные данные", callback_data="use_saved_data"))
+    has_saved_data = bool(user.phone and user.address)
     
-    # Добавляем кнопку для ввода телефона
-    keyboard.add(types.InlineKeyboardButton("Ввести контактные данные", callback_data="phone_input"))
+    def build() -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup()
+        if has_saved_data:
+            keyboard.add(types.InlineKeyboardButton("Использовать сохраненные данные", callback_data="use_saved_data"))
+        
+        # Добавляем кнопку для ввода телефона
+        keyboard.add(types.InlineKeyboardButton("Ввести контактные данные", callback_data="phone_input"))
+        
+        keyboard.add(BACK_BUTTON)
+        return keyboard
     
-    keyboard.add(BACK_BUTTON)
-    return keyboard
+    return _static_keyboard("checkout_saved" if has_saved_data else "checkout", build)
 
 def get_delivery_time_keyboard() -> types.InlineKeyboardMarkup:
     """Клавиатура для выбора времени доставки"""
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    
-    # Добавляем временные интервалы (можно настроить под требования бизнеса)
-    keyboard.add(
-        types.InlineKeyboardButton("10:00 - 12:00", callback_data="delivery_time_10-12"),
-        types.InlineKeyboardButton("12:00 - 14:00", callback_data="delivery_time_12-14")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton("14:00 - 16:00", callback_data="delivery_time_14-16"),
-        types.InlineKeyboardButton("16:00 - 18:00", callback_data="delivery_time_16-18")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton("18:00 - 20:00", callback_data="delivery_time_18-20"),
-        types.InlineKeyboardButton("20:00 - 22:00", callback_data="delivery_time_20-22")
-    )
+    def build() -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup(row_width=2)
+        
+        # Добавляем временные интервалы (можно настроить под требования бизнеса)
+        keyboard.add(
+            types.InlineKeyboardButton("10:00 - 12:00", callback_data="delivery_time_10-12"),
+            types.InlineKeyboardButton("12:00 - 14:00", callback_data="delivery_time_12-14")
+        )
+        keyboard.add(
+            types.InlineKeyboardButton("14:00 - 16:00", callback_data="delivery_time_14-16"),
+            types.InlineKeyboardButton("16:00 - 18:00", callback_data="delivery_time_16-18")
+        )
+        keyboard.add(
+            types.InlineKeyboardButton("18:00 - 20:00", callback_data="delivery_time_18-20"),
+            types.InlineKeyboardButton("20:00 - 22:00", callback_data="delivery_time_20-22")
+        )
+        
+        keyboard.add(BACK_BUTTON)
+        return keyboard
     
-    keyboard.add(BACK_BUTTON)
-    return keyboard
+    return _static_keyboard("delivery_time", build)
 
 # Клавиатуры для работы с заказами
 def get_orders_list_keyboard(orders: List, filter_type: str = "all", current_page: int = 1, total_pages: int = 1, page_size: int = 10) -> types.InlineKeyboardMarkup:
@@ -350,14 +432,8 @@ def get_orders_list_keyboard(orders: List, filter_type: str = "all", current_pag
                     status_str = "✅" if order.status == "completed" else "🔄"
                     
                     button_text = f"Заказ #{order.id} от {date_str} {status_str}"
-                    callback_data = f"view_order_{order.id}"
-                    
-                    # Проверка длины callback_data, Telegram API ограничивает до 64 байт
-                    if len(callback_data.encode('utf-8')) > 64:
-                        logger.warning(f"Callback data слишком длинный: {callback_data}, обрезаем")
-                        callback_data = callback_data[:64]
-                    
-                    keyboard.add(types.InlineKeyboardButton(button_text, callback_data=callback_data))
+                    # callback_data.encode проверяет ограничение Telegram в 64 байта
+                    keyboard.add(types.InlineKeyboardButton(button_text, callback_data=callback_data.encode("view_order", order.id)))
                 except Exception as e:
                     logger.error(f"Ошибка при создании кнопки для заказа {getattr(order, 'id', 'unknown')}: {str(e)}")
                     continue
@@ -383,7 +459,7 @@ def get_orders_list_keyboard(orders: List, filter_type: str = "all", current_pag
         page_size_row = []
         for size in [10, 20]:
             btn_text = f"🔘 {size} заказов" if size == page_size else f"{size} заказов"
-            page_size_row.append(types.InlineKeyboardButton(btn_text, callback_data=f"page_size_{size}"))
+            page_size_row.append(types.InlineKeyboardButton(btn_text, callback_data=callback_data.encode("page_size", size)))
         
         keyboard.add(*page_size_row)
         
@@ -393,27 +469,27 @@ def get_orders_list_keyboard(orders: List, filter_type: str = "all", current_pag
         # Кнопка "Все заказы" активна, если выбран этот фильтр
         all_btn = types.InlineKeyboardButton(
             "🔘 Все" if filter_type == "all" else "Все", 
-            callback_data="filter_orders_all"
+            callback_data=callback_data.encode("filter_orders", "all")
         )
         
         # Кнопка "Новые" активна, если выбран этот фильтр
         new_btn = types.InlineKeyboardButton(
             "🔘 Новые" if filter_type == "new" else "Новые", 
-            callback_data="filter_orders_new"
+            callback_data=callback_data.encode("filter_orders", "new")
         )
         
         # Кнопка "Завершенные" активна, если выбран этот фильтр
         completed_btn = types.InlineKeyboardButton(
             "🔘 Завершенные" if filter_type == "completed" else "Завершенные", 
-            callback_data="filter_orders_completed"
+            callback_data=callback_data.encode("filter_orders", "completed")
         )
         
         filter_row.extend([all_btn, new_btn, completed_btn])
         keyboard.add(*filter_row)
         
         # Сортировка
-        keyboard.add(types.InlineKeyboardButton("📅 Сортировать по дате", callback_data="sort_orders_date"))
-        keyboard.add(types.InlineKeyboardButton("👤 Сортировать по пользователям", callback_data="sort_orders_user"))
+        keyboard.add(types.InlineKeyboardButton("📅 Сортировать по дате", callback_data=callback_data.encode("sort_orders", "date")))
+        keyboard.add(types.InlineKeyboardButton("👤 Сортировать по пользователям", callback_data=callback_data.encode("sort_orders", "user")))
         
         # Кнопка "Назад"
         keyboard.add(BACK_BUTTON)
@@ -432,11 +508,12 @@ def get_order_detail_keyboard(order_id: int) -> types.InlineKeyboardMarkup:
     keyboard = types.InlineKeyboardMarkup()
     order = db.get_order(order_id)
     
-    # Статус заказа (завершен/не завершен)
-    if order.status == "completed":
-        keyboard.add(types.InlineKeyboardButton("Reopened заказ", callback_data=f"reopen_order_{order_id}"))
-    else:
-        keyboard.add(types.InlineKeyboardButton("Завершить заказ", callback_data=f"complete_order_{order_id}"))
+    # Статус заказа (завершен/не завершен); статус архивных заказов не меняется
+    if not db.is_order_archived(order_id):
+        if order.status == "completed":
+            keyboard.add(types.InlineKeyboardButton("Reopened заказ", callback_data=callback_data.encode("reopen_order", order_id)))
+        else:
+            keyboard.add(types.InlineKeyboardButton("Завершить заказ", callback_data=callback_data.encode("complete_order", order_id)))
     
     # Кнопка назад
     keyboard.add(types.InlineKeyboardButton("↩️ К списку заказов", callback_data="back_to_orders"))
@@ -453,25 +530,29 @@ def get_phone_input_keyboard(current_phone: str = "") -> types.InlineKeyboardMar
     Returns:
         Клавиатура с цифрами и функциональными кнопками
     """
-    keyboard = types.InlineKeyboardMarkup(row_width=3)
-    
-    # Добавляем цифры от 1 до 9
-    buttons_row = []
-    for i in range(1, 10):
-        btn = types.InlineKeyboardButton(str(i), callback_data=f"phone_digit_{i}")
-        buttons_row.append(btn)
-        if len(buttons_row) == 3:
-            keyboard.add(*buttons_row)
-            buttons_row = []
-    
-    # Добавляем кнопку "0" в центре последнего ряда
-    keyboard.add(
-        types.InlineKeyboardButton("⬅️", callback_data="phone_delete"),
-        types.InlineKeyboardButton("0", callback_data="phone_digit_0"),
-        types.InlineKeyboardButton("✅", callback_data="phone_submit")
-    )
-    
-    # Добавляем кнопку "Назад"
-    keyboard.add(BACK_BUTTON)
+    def build() -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup(row_width=3)
+        
+        # Добавляем цифры от 1 до 9
+        buttons_row = []
+        for i in range(1, 10):
+            btn = types.InlineKeyboardButton(str(i), callback_data=callback_data.encode("phone_digit", i))
+            buttons_row.append(btn)
+            if len(buttons_row) == 3:
+                keyboard.add(*buttons_row)
+                buttons_row = []
+        
+        # Добавляем кнопку "0" в центре последнего ряда
+        keyboard.add(
+            types.InlineKeyboardButton("⬅️", callback_data="phone_delete"),
+            types.InlineKeyboardButton("0", callback_data=callback_data.encode("phone_digit", 0)),
+            types.InlineKeyboardButton("✅", callback_data="phone_submit")
+        )
+        
+        # Добавляем кнопку "Назад"
+        keyboard.add(BACK_BUTTON)
+        
+        return keyboard
     
-    return keyboard
\ No newline at end of file
+    # Клавиатура не зависит от введенного номера и показывается после каждой цифры
+    return _static_keyboard("phone_input", build)
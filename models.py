@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Optional, Union, Any
+from typing import Callable, Iterator, List, Dict, Optional, Union, Any
 import config
 
 class Category:
+    __slots__ = ("id", "name")
+    COLUMNS = ("id", "name")
+    
     def __init__(self, id: int, name: str):
         self.id = id
         self.name = name
@@ -18,8 +21,18 @@ class Category:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Category':
         return cls(id=data["id"], name=data["name"])
+    
+    def to_row(self) -> List[Any]:
+        return [self.id, self.name]
+    
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Category':
+        return cls(*row)
 
 class Product:
+    __slots__ = ("id", "name", "category_id", "price", "unit", "image_path", "available")
+    COLUMNS = __slots__
+    
     def __init__(self, id: int, name: str, category_id: int, price: float, 
                  unit: str, image_path: Optional[str] = None, available: bool = True):
         self.id = id
@@ -52,8 +65,18 @@ class Product:
             image_path=data.get("image_path"),
             available=data.get("available", True)
         )
+    
+    def to_row(self) -> List[Any]:
+        return [self.id, self.name, self.category_id, self.price,
+                self.unit, self.image_path, self.available]
+    
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Product':
+        return cls(*row)
 
 class CartItem:
+    __slots__ = ("product_id", "quantity")
+    
     def __init__(self, product_id: int, quantity: float):
         self.product_id = product_id
         self.quantity = quantity
@@ -69,6 +92,8 @@ class CartItem:
         return cls(product_id=data["product_id"], quantity=data["quantity"])
 
 class User:
+    __slots__ = ("id", "username", "phone", "address", "favorites", "cart", "is_admin")
+    
     def __init__(self, id: int, username: Optional[str] = None, 
                  phone: Optional[str] = None, address: Optional[str] = None,
                  favorites: Optional[List[int]] = None, is_admin: bool = False):
@@ -142,6 +167,10 @@ class User:
         return user
 
 class Order:
+    __slots__ = ("id", "user_id", "items", "status", "created_at",
+                 "phone", "address", "delivery_time", "total")
+    COLUMNS = __slots__
+    
     def __init__(self, id: int, user_id: int, items: List[CartItem], 
                  status: str = "new", created_at: Optional[str] = None,
                  phone: Optional[str] = None, address: Optional[str] = None,
@@ -181,4 +210,69 @@ class Order:
             address=data.get("address"),
             delivery_time=data.get("delivery_time"),
             total=data.get("total", 0.0)
-        ) 
\ No newline at end of file
+        )
+    
+    def to_row(self) -> List[Any]:
+        # Позиции заказа хранятся парами [product_id, quantity]
+        return [self.id, self.user_id, [[item.product_id, item.quantity] for item in self.items],
+                self.status, self.created_at, self.phone, self.address, self.delivery_time, self.total]
+    
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Order':
+        return cls(row[0], row[1], [CartItem(product_id, quantity) for product_id, quantity in row[2]],
+                   *row[3:])
+
+def encode_rows(model, items: List[Any]) -> Dict[str, Any]:
+    """
+    Табличное представление коллекции для записи в файл: имена полей
+    записываются один раз, а каждая запись - списком значений.
+    """
+    return {"columns": list(model.COLUMNS), "rows": [item.to_row() for item in items]}
+
+def decode_rows(model, data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Any]:
+    """
+    Чтение коллекции из табличного представления (encode_rows)
+    или из прежнего формата - списка словарей.
+    """
+    if isinstance(data, list):
+        return [model.from_dict(item) for item in data]
+    
+    decode = row_decoder(model, data["columns"])
+    return [decode(row) for row in data["rows"]]
+
+def row_decoder(model, columns: List[str]) -> Callable[[List[Any]], Any]:
+    """Функция чтения одной строки табличного представления с заданными колонками"""
+    if list(columns) == list(model.COLUMNS):
+        return model.from_row
+    
+    # Набор полей изменился: читаем по именам через прежний формат
+    def decode(row: List[Any]) -> Any:
+        item = dict(zip(columns, row))
+        if isinstance(item.get("items"), list):
+            item["items"] = [{"product_id": product_id, "quantity": quantity}
+                             for product_id, quantity in item["items"]]
+        return model.from_dict(item)
+    
+    return decode
+
+def iter_rows(model, stream) -> Iterator[Any]:
+    """
+    Потоковое чтение коллекции из json_stream.JsonStream: записи табличного
+    представления (encode_rows) или прежнего формата разбираются по одной.
+    """
+    if stream.peek() == "[":
+        for item in stream.items():
+            yield model.from_dict(item)
+        return
+    
+    decode = None
+    for key in stream.keys():
+        if key == "columns":
+            decode = row_decoder(model, stream.value())
+        elif key == "rows":
+            if decode is None:
+                raise ValueError("в табличном представлении колонки должны идти перед строками")
+            for row in stream.items():
+                yield decode(row)
+        else:
+            stream.value()
\ No newline at end of file
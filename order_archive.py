@@ -0,0 +1,199 @@
+import gzip
+import os
+import re
+import shutil
+import threading
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+import codec
+from models import Order
+
+# Заказы с этими статусами больше не меняются и могут переноситься в архив
+ARCHIVE_STATUSES = ("completed", "cancelled")
+
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+_FILE = re.compile(r"^orders-(\d{4}-\d{2}|unknown)\.jsonl\.gz$")
+
+
+def fsync_directory(directory: str) -> None:
+    """Фиксация на диске записи каталога после создания или переименования файла"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Каталоги нельзя открыть на Windows, там замена файла атомарна и так
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def order_month(order: Order) -> str:
+    month = (order.created_at or "")[:7]
+    return month if _MONTH.match(month) else "unknown"
+
+
+class OrderArchive:
+    """
+    Архив завершенных заказов, разбитый по месяцам создания.
+
+    Заказы месяца хранятся в файле <каталог>/orders-YYYY-MM.jsonl.gz: по одному
+    заказу в строке, сжатыми блоками gzip. Архив только дополняется: новая
+    порция заказов дописывается отдельным блоком gzip в конец файла месяца,
+    прежние блоки не перечитываются и не перезаписываются. Блок, оборванный
+    сбоем при записи, обнаруживается при чтении месяца и отрезается перед
+    следующим дописыванием, чтобы не закрыть собой новые блоки.
+
+    Для поиска заказа по id хранятся только диапазоны id каждого месяца,
+    а не сами заказы; последний прочитанный месяц кэшируется.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._damaged = {}  # месяц -> размер целой части файла до оборванного блока
+        self._ranges = {}  # месяц -> [наименьший id, наибольший id]
+        self._scanned = False
+        self._cached_month = None
+        self._cached_orders = {}  # order_id -> Order последнего прочитанного месяца
+
+    def _path(self, month: str, directory: Optional[str] = None) -> str:
+        return os.path.join(directory or self.directory, f"orders-{month}.jsonl.gz")
+
+    def months(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(match.group(1) for match in map(_FILE.match, os.listdir(self.directory)) if match)
+
+    def append(self, orders: Iterable[Order]) -> int:
+        """Дописывание заказов в файлы их месяцев; возвращает количество заказов"""
+        by_month = {}
+        for order in orders:
+            by_month.setdefault(order_month(order), []).append(order)
+        if not by_month:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for month, month_orders in by_month.items():
+                path = self._path(month)
+                member = gzip.compress(b"".join(codec.dumps(order.to_dict()) + b"\n" for order in month_orders))
+                created = not os.path.exists(path)
+                with open(path, 'ab') as f:
+                    size = self._damaged.pop(month, None)
+                    if size is None:
+                        size = f.seek(0, os.SEEK_END)
+                    else:
+                        f.truncate(size)
+                    try:
+                        f.write(member)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except BaseException:
+                        self._damaged[month] = size
+                        raise
+                if created:
+                    fsync_directory(self.directory)
+                self._extend_range(month, month_orders)
+                if self._cached_month == month:
+                    self._cached_month = None
+        return sum(len(month_orders) for month_orders in by_month.values())
+
+    def _extend_range(self, month: str, orders: Iterable[Order]) -> None:
+        for order in orders:
+            bounds = self._ranges.get(month)
+            if bounds is None:
+                self._ranges[month] = [order.id, order.id]
+            else:
+                bounds[0] = min(bounds[0], order.id)
+                bounds[1] = max(bounds[1], order.id)
+
+    def _read_month(self, month: str) -> Iterator[Order]:
+        path = self._path(month)
+        try:
+            with open(path, 'rb') as f:
+                data = memoryview(f.read())
+        except FileNotFoundError:
+            return
+        # Блоки gzip распаковываются по одному, чтобы знать, где кончается целый блок
+        offset = 0
+        while offset < len(data):
+            member = zlib.decompressobj(wbits=31)
+            try:
+                content = member.decompress(data[offset:])
+                if not member.eof:
+                    raise EOFError("блок gzip оборван")
+            except (EOFError, zlib.error) as e:
+                # Поврежденный конец файла: заказы до него уже прочитаны
+                self._damaged[month] = offset
+                print(f"Ошибка чтения архива заказов {path}: {e}")
+                return
+            try:
+                orders = [Order.from_dict(codec.loads(line)) for line in content.splitlines() if line.strip()]
+            except ValueError as e:
+                print(f"Ошибка чтения архива заказов {path}: {e}")
+                orders = []
+            yield from orders
+            offset = len(data) - len(member.unused_data)
+
+    def iter_orders(self) -> Iterator[Order]:
+        """Последовательный обход всех архивных заказов (по одному месяцу в памяти)"""
+        ranges = {}
+        for month in self.months():
+            for order in self._read_month(month):
+                bounds = ranges.setdefault(month, [order.id, order.id])
+                bounds[0] = min(bounds[0], order.id)
+                bounds[1] = max(bounds[1], order.id)
+                yield order
+        with self._lock:
+            self._ranges = ranges
+            self._scanned = True
+
+    def get(self, order_id: int) -> Optional[Order]:
+        """Поиск заказа в архиве по id"""
+        if not self._scanned:
+            for _ in self.iter_orders():
+                pass
+        with self._lock:
+            candidates = [month for month, (low, high) in self._ranges.items() if low <= order_id <= high]
+            for month in candidates:
+                if self._cached_month != month:
+                    self._cached_orders = {order.id: order for order in self._read_month(month)}
+                    self._cached_month = month
+                order = self._cached_orders.get(order_id)
+                if order is not None:
+                    return order
+        return None
+
+    def copy_to(self, target: str) -> None:
+        """Копирование архива в резервную копию"""
+        months = self.months()
+        if not months:
+            return
+        os.makedirs(target, exist_ok=True)
+        with self._lock:
+            for month in months:
+                shutil.copy2(self._path(month), self._path(month, target))
+
+    def replace_from(self, source: Optional[str]) -> None:
+        """Замена архива копией из резервной копии (None - пустой архив)"""
+        with self._lock:
+            staging = self.directory + ".tmp"
+            old = self.directory + ".old"
+            shutil.rmtree(staging, ignore_errors=True)
+            if source and os.path.isdir(source):
+                shutil.copytree(source, staging)
+            else:
+                os.makedirs(staging)
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.isdir(self.directory):
+                os.replace(self.directory, old)
+            os.replace(staging, self.directory)
+            shutil.rmtree(old, ignore_errors=True)
+            self._ranges = {}
+            self._damaged = {}
+            self._scanned = False
+            self._cached_month = None
@@ -0,0 +1,93 @@
+"""
+Маршрутизация обновлений бота по таблице маршрутов.
+
+Маршрут связывает состояние пользователя (или любое состояние) и действие
+кнопки с обработчиком. Действие определяется по callback_data функцией
+разбора (callback_data.action_of), маршруты хранятся в словаре по ключу
+(состояние, действие), поэтому выбор обработчика не зависит от количества
+маршрутов.
+"""
+import logging
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from telebot.handler_backends import State
+
+Handler = Callable[[Any, Any], None]
+
+
+class Route:
+    """Обработчик маршрута и признак доступа только администратору"""
+
+    __slots__ = ("handler", "admin")
+
+    def __init__(self, handler: Handler, admin: bool = False):
+        self.handler = handler
+        self.admin = admin
+
+
+class Router:
+    """
+    Таблица маршрутов: (состояние, действие кнопки) -> обработчик.
+
+    Маршруты без состояния (state=None) действуют в любом состоянии и
+    проверяются раньше маршрутов состояния. Для маршрутов с admin=True перед
+    вызовом обработчика выполняется admin_check(bot, event): если он вернул
+    False, обработчик не вызывается (admin_check сам сообщает об отказе).
+    В состояниях, отмеченных restrict(), права проверяются и для кнопок
+    без маршрута.
+    Для сообщений действие не указывается: маршрут выбирается только по состоянию.
+    """
+
+    def __init__(self, admin_check: Callable[[Any, Any], bool],
+                 action_of: Optional[Callable[[str], str]] = None):
+        self._admin_check = admin_check
+        self._action_of = action_of
+        self._routes: Dict[Tuple[Optional[str], Optional[str]], Route] = {}
+        self._restricted: Set[str] = set()
+
+    def add(self, handler: Handler, state: Optional[State] = None, action: Optional[str] = None,
+            admin: bool = False) -> None:
+        """Регистрация обработчика действия action в состоянии state"""
+        key = (state.name if state is not None else None, action)
+        if key in self._routes:
+            raise ValueError(f"Маршрут уже зарегистрирован: {key}")
+        self._routes[key] = Route(handler, admin)
+
+    def restrict(self, *states: State) -> None:
+        """Состояния только для администратора: без прав нельзя нажать ни одну кнопку"""
+        self._restricted.update(state.name for state in states)
+
+    def on(self, state: Optional[State] = None, action: Optional[str] = None,
+           admin: bool = False) -> Callable[[Handler], Handler]:
+        """Декоратор для регистрации обработчика"""
+        def decorator(handler: Handler) -> Handler:
+            self.add(handler, state, action, admin)
+            return handler
+        return decorator
+
+    def resolve(self, state: Optional[str], data: Optional[str] = None) -> Optional[Route]:
+        """Маршрут для состояния и данных кнопки; None - обработчика нет"""
+        action = data
+        if data is not None and self._action_of is not None:
+            try:
+                action = self._action_of(data)
+            except ValueError as e:
+                logging.getLogger(__name__).warning(str(e))
+                return None
+        route = self._routes.get((None, action))
+        if route is None:
+            route = self._routes.get((state, action))
+        return route
+
+    def dispatch(self, bot: Any, event: Any, state: Optional[str], data: Optional[str] = None) -> bool:
+        """Вызов обработчика маршрута; False - маршрут не найден"""
+        route = self.resolve(state, data)
+        if route is None:
+            if state in self._restricted:
+                self._admin_check(bot, event)
+                return True
+            return False
+        if route.admin and not self._admin_check(bot, event):
+            return True
+        route.handler(bot, event)
+        return True
@@ -0,0 +1,376 @@
+"""
+Таблицы маршрутов бота: нажатия inline-кнопок (callbacks), текстовые
+сообщения (text_messages) и фотографии (photos) по состоянию пользователя.
+
+Маршруты регистрируются один раз при импорте модуля; main.py только передает
+обновления в dispatch. Действие кнопки определяется по callback_data
+(callback_data.parse). Доступ только для администратора задается в маршруте
+(admin=True) и проверяется check_admin_rights/check_admin_rights_message.
+"""
+import logging
+
+import telebot
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+
+import callback_data
+import config
+import keyboards
+import utils
+import handlers.start as start
+import handlers.admin as admin
+import handlers.customer as customer
+import handlers.cart as cart
+import handlers.orders as orders
+from database import db
+from router import Router
+from states import BotStates
+
+
+# Проверка прав администратора и перенаправление
+def check_admin_rights(bot: telebot.TeleBot, call: types.CallbackQuery) -> bool:
+    """
+    Проверяет права администратора у пользователя.
+    Если пользователь не админ, перенаправляет его в режим покупателя и возвращает False.
+    Если пользователь админ, возвращает True.
+    """
+    logger = logging.getLogger(__name__)
+
+    # Если пользователь не админ, перенаправляем его и возвращаем False
+    if call.from_user.id != config.ADMIN_USER_ID:
+        logger.warning(f"Попытка неавторизованного доступа к админ-функциям: user_id={call.from_user.id}")
+
+        # Перенаправляем пользователя в режим покупателя
+        bot.set_state(call.from_user.id, BotStates.CUSTOMER_MODE, call.message.chat.id)
+
+        try:
+            bot.edit_message_text(
+                "У вас нет прав доступа к режиму администратора. Вы перенаправлены в режим покупателя.",
+                chat_id=call.message.chat.id,
+                message_id=call.message.message_id,
+                reply_markup=keyboards.get_customer_main_keyboard_with_cart(call.from_user.id)
+            )
+        except ApiTelegramException as e:
+            # Если не удалось отредактировать сообщение, отправляем новое
+            logger.error(f"Ошибка при редактировании сообщения: {str(e)}")
+            try:
+                bot.send_message(
+                    chat_id=call.message.chat.id,
+                    text="У вас нет прав доступа к режиму администратора. Вы перенаправлены в режим покупателя.",
+                    reply_markup=keyboards.get_customer_main_keyboard_with_cart(call.from_user.id)
+                )
+            except Exception as e2:
+                logger.error(f"Критическая ошибка при отправке сообщения: {str(e2)}")
+
+        return False
+
+    return True
+
+
+def check_admin_rights_message(bot: telebot.TeleBot, message: types.Message) -> bool:
+    """
+    Проверяет права администратора у пользователя при обработке сообщений.
+    Если пользователь не админ, перенаправляет его в режим покупателя и возвращает False.
+    Если пользователь админ, возвращает True.
+    """
+    logger = logging.getLogger(__name__)
+
+    # Если пользователь не админ, перенаправляем его и возвращаем False
+    if message.from_user.id != config.ADMIN_USER_ID:
+        logger.warning(f"Попытка неавторизованного доступа к админ-функциям: user_id={message.from_user.id}")
+
+        # Перенаправляем пользователя в режим покупателя
+        bot.set_state(message.from_user.id, BotStates.CUSTOMER_MODE, message.chat.id)
+
+        try:
+            bot.send_message(
+                chat_id=message.chat.id,
+                text="У вас нет прав доступа к режиму администратора. Вы перенаправлены в режим покупателя.",
+                reply_markup=keyboards.get_customer_main_keyboard_with_cart(message.from_user.id)
+            )
+        except Exception as e:
+            logger.error(f"Критическая ошибка при отправке сообщения: {str(e)}")
+
+        return False
+
+    return True
+
+
+callbacks = Router(check_admin_rights, callback_data.action_of)
+text_messages = Router(check_admin_rights_message)
+photos = Router(check_admin_rights_message)
+
+
+# Кнопки, доступные в любом состоянии
+callbacks.add(start.mode_selector, action="mode")
+callbacks.add(start.back_to_start, action="back_to_start")
+callbacks.add(orders.view_order_detail, action="view_order")
+
+
+# Режим администратора: в этих состояниях пользователь без прав перенаправляется
+# в режим покупателя при нажатии любой кнопки
+callbacks.restrict(BotStates.ADMIN_MODE, BotStates.CATEGORY_EDIT_SELECT, BotStates.CATEGORY_DELETE_SELECT,
+                   BotStates.PRODUCT_CATEGORY_SELECT, BotStates.PRODUCT_UNIT_SELECT, BotStates.PRODUCT_IMAGE_INPUT,
+                   BotStates.PRODUCT_EDIT_SELECT, BotStates.PRODUCT_DELETE_SELECT, BotStates.PRODUCT_EDIT_MENU,
+                   BotStates.BACKUP_SELECT, BotStates.ANALYTICS_VIEW)
+
+for action, handler in {
+    "admin_add_category": admin.add_category_start,
+    "admin_edit_category": admin.edit_category_select,
+    "admin_delete_category": admin.delete_category_select,
+    "admin_add_product": admin.add_product_start,
+    "admin_edit_product": admin.edit_product_select,
+    "admin_orders": admin.show_orders,
+    "admin_delete_product": admin.delete_product_select,
+    "admin_save_data": admin.save_data,
+    "admin_load_data": admin.load_data_list,
+    "admin_analytics": admin.show_analytics,
+    "back": start.back_to_start,
+}.items():
+    callbacks.add(handler, BotStates.ADMIN_MODE, action=action, admin=True)
+
+# "Назад" из экранов администратора возвращает в главное меню администратора
+for state in (BotStates.CATEGORY_NAME_INPUT, BotStates.CATEGORY_EDIT_SELECT,
+              BotStates.CATEGORY_EDIT_NAME_INPUT, BotStates.CATEGORY_DELETE_SELECT,
+              BotStates.PRODUCT_CATEGORY_SELECT, BotStates.PRODUCT_EDIT_SELECT,
+              BotStates.PRODUCT_DELETE_SELECT, BotStates.ANALYTICS_VIEW, BotStates.BACKUP_SELECT):
+    callbacks.add(admin.back_to_admin_main, state, action="back", admin=True)
+
+# Категории
+callbacks.add(admin.edit_category_name_input, BotStates.CATEGORY_EDIT_SELECT, action="edit_category", admin=True)
+callbacks.add(admin.delete_category_confirm, BotStates.CATEGORY_DELETE_SELECT, action="delete_category", admin=True)
+
+
+# Создание товара
+callbacks.add(admin.product_category_selected, BotStates.PRODUCT_CATEGORY_SELECT, action="product_category", admin=True)
+# Возврат к выбору категории
+callbacks.add(admin.add_product_start, BotStates.PRODUCT_NAME_INPUT, action="back", admin=True)
+
+
+@callbacks.on(BotStates.PRODUCT_PRICE_INPUT, action="back", admin=True)
+def back_to_product_name(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    """Возврат от ввода цены к вводу названия товара"""
+    with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
+        category_id = data.get('product_category_id')
+    if category_id:
+        category = db.get_category(category_id)
+        keyboard = types.InlineKeyboardMarkup()
+        keyboard.add(keyboards.BACK_BUTTON)
+        bot.edit_message_text(
+            f"Выбрана категория: {category.name if category else 'Неизвестная категория'}\n"
+            f"Введите название товара:",
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            reply_markup=keyboard
+        )
+        bot.set_state(call.from_user.id, BotStates.PRODUCT_NAME_INPUT, call.message.chat.id)
+    else:
+        # Если ID категории не найден, возвращаемся в начало создания товара
+        admin.add_product_start(bot, call)
+
+
+callbacks.add(admin.product_unit_selected, BotStates.PRODUCT_UNIT_SELECT, action="unit", admin=True)
+
+
+@callbacks.on(BotStates.PRODUCT_UNIT_SELECT, action="back", admin=True)
+def back_to_product_price(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    """Возврат от выбора единицы измерения к вводу цены"""
+    with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
+        product_name = data.get('product_name', '')
+
+    bot.set_state(call.from_user.id, BotStates.PRODUCT_PRICE_INPUT, call.message.chat.id)
+
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(keyboards.BACK_BUTTON)
+
+    bot.edit_message_text(
+        f"Название товара: {product_name}\n"
+        f"Введите цену товара (в рублях, например: 99.90):",
+        chat_id=call.message.chat.id,
+        message_id=call.message.message_id,
+        reply_markup=keyboard
+    )
+
+
+callbacks.add(admin.product_image_skipped, BotStates.PRODUCT_IMAGE_INPUT, action="skip_image", admin=True)
+
+
+@callbacks.on(BotStates.PRODUCT_IMAGE_INPUT, action="back", admin=True)
+def back_to_product_unit(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    """Возврат от загрузки изображения к выбору единицы измерения"""
+    with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
+        product_name = data.get('product_name', '')
+        product_price = data.get('product_price', 0)
+
+    bot.set_state(call.from_user.id, BotStates.PRODUCT_UNIT_SELECT, call.message.chat.id)
+
+    bot.edit_message_text(
+        f"Название: {product_name}\n"
+        f"Цена: {utils.format_money(product_price)}\n"
+        f"Выберите единицу измерения:",
+        chat_id=call.message.chat.id,
+        message_id=call.message.message_id,
+        reply_markup=keyboards.get_unit_selection_keyboard()
+    )
+
+
+# Редактирование товара
+callbacks.add(admin.edit_product_menu, BotStates.PRODUCT_EDIT_SELECT, action="edit_product", admin=True)
+callbacks.add(lambda bot, call: admin.show_products_for_edit(bot, call, *callback_data.args(call.data)),
+              BotStates.PRODUCT_EDIT_SELECT, action="edit_category_products", admin=True)
+
+callbacks.add(admin.toggle_product_availability, BotStates.PRODUCT_EDIT_MENU, action="edit_product_available", admin=True)
+callbacks.add(admin.edit_product_name_start, BotStates.PRODUCT_EDIT_MENU, action="edit_product_name", admin=True)
+callbacks.add(admin.edit_product_price_start, BotStates.PRODUCT_EDIT_MENU, action="edit_product_price", admin=True)
+callbacks.add(admin.edit_product_image_start, BotStates.PRODUCT_EDIT_MENU, action="edit_product_image", admin=True)
+callbacks.add(admin.edit_product_select, BotStates.PRODUCT_EDIT_MENU, action="back", admin=True)
+
+
+def back_to_product_edit(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    """Возврат от ввода нового значения в меню редактирования товара"""
+    with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
+        product_id = data.get('edit_product_id')
+        if not product_id:
+            product_id = data.get('current_product_id')
+    if product_id:
+        # Возвращаемся в меню редактирования товара
+        admin.edit_product_menu(bot, call)
+    else:
+        # Если ID не найден, возвращаемся в главное меню админа
+        admin.back_to_admin_main(bot, call)
+
+
+for state in (BotStates.PRODUCT_EDIT_NAME_INPUT, BotStates.PRODUCT_EDIT_PRICE_INPUT,
+              BotStates.PRODUCT_EDIT_IMAGE_INPUT):
+    callbacks.add(back_to_product_edit, state, action="back", admin=True)
+
+# Удаление товара
+callbacks.add(lambda bot, call: admin.show_products_for_delete(bot, call, *callback_data.args(call.data)),
+              BotStates.PRODUCT_DELETE_SELECT, action="delete_category_products", admin=True)
+callbacks.add(lambda bot, call: admin.delete_product_confirm(bot, call, *callback_data.args(call.data)),
+              BotStates.PRODUCT_DELETE_SELECT, action="delete_product", admin=True)
+callbacks.add(lambda bot, call: admin.delete_product_execute(bot, call, *callback_data.args(call.data)),
+              BotStates.PRODUCT_DELETE_SELECT, action="confirm_delete_product", admin=True)
+callbacks.add(admin.back_to_admin_main, BotStates.PRODUCT_DELETE_SELECT, action="cancel_delete_product", admin=True)
+
+
+# Резервные копии и аналитика
+callbacks.add(lambda bot, call: admin.load_backup(bot, call, *callback_data.args(call.data)),
+              BotStates.BACKUP_SELECT, action="load_backup", admin=True)
+callbacks.add(lambda bot, call: admin.show_analytics(bot, call, refresh=True),
+              BotStates.ANALYTICS_VIEW, action="admin_analytics_refresh", admin=True)
+
+
+# Заказы
+callbacks.add(orders.handle_order_filter, BotStates.ORDERS_LIST, action="filter_orders")
+callbacks.add(orders.handle_order_sort, BotStates.ORDERS_LIST, action="sort_orders")
+callbacks.add(orders.handle_page_navigation, BotStates.ORDERS_LIST, action="page_prev")
+callbacks.add(orders.handle_page_navigation, BotStates.ORDERS_LIST, action="page_next")
+callbacks.add(orders.handle_page_size_change, BotStates.ORDERS_LIST, action="page_size")
+callbacks.add(admin.back_to_admin_main, BotStates.ORDERS_LIST, action="back")
+
+callbacks.add(orders.change_order_status, BotStates.ORDER_DETAIL, action="complete_order")
+callbacks.add(orders.change_order_status, BotStates.ORDER_DETAIL, action="reopen_order")
+callbacks.add(orders.back_to_orders, BotStates.ORDER_DETAIL, action="back_to_orders")
+callbacks.add(admin.back_to_admin_main, BotStates.ORDER_DETAIL, action="back")
+
+
+# Режим покупателя
+def view_cart(bot: telebot.TeleBot, call: types.CallbackQuery, place: str, recover) -> None:
+    """Открытие корзины; при ошибке - сообщение и recover(bot, call)"""
+    logger = logging.getLogger(__name__)
+    try:
+        logger.info(f"Нажатие на кнопку корзины {place}: user_id={call.from_user.id}")
+        cart.view_cart(bot, call)
+    except Exception as e:
+        logger.error(f"Ошибка при просмотре корзины {place}: {str(e)}")
+        try:
+            bot.answer_callback_query(call.id, "Ошибка при загрузке корзины")
+            recover(bot, call)
+        except Exception as e2:
+            logger.error(f"Ошибка при обработке ошибки корзины: {str(e2)}")
+
+
+def recover_to_customer_main(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    try:
+        bot.edit_message_text(
+            "Произошла ошибка при загрузке корзины. Попробуйте позже.",
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            reply_markup=keyboards.get_customer_main_keyboard_with_cart(call.from_user.id)
+        )
+    except Exception:
+        bot.send_message(
+            call.message.chat.id,
+            "Произошла ошибка. Пожалуйста, отправьте команду /start для перезапуска бота."
+        )
+
+
+def recover_to_product(bot: telebot.TeleBot, call: types.CallbackQuery) -> None:
+    # Возвращаемся к просмотру товара или в главное меню
+    with bot.retrieve_data(call.from_user.id, call.message.chat.id) as data:
+        product_id = data.get('current_product_id')
+    if product_id and db.get_product(product_id):
+        customer.product_selected(bot, call)
+    else:
+        customer.back_to_customer_main(bot, call)
+
+
+callbacks.add(customer.category_selected, BotStates.CUSTOMER_MODE, action="category")
+callbacks.add(customer.view_favorites, BotStates.CUSTOMER_MODE, action="favorites")
+callbacks.add(customer.search_start, BotStates.CUSTOMER_MODE, action="search")
+callbacks.add(lambda bot, call: view_cart(bot, call, "в главном меню", recover_to_customer_main),
+              BotStates.CUSTOMER_MODE, action="cart")
+
+for state, place in ((BotStates.CATEGORY_VIEW, "в категории"),
+                     (BotStates.FAVORITES_VIEW, "в избранном"),
+                     (BotStates.SEARCH_RESULTS, "в результатах поиска")):
+    callbacks.add(customer.product_selected, state, action="product")
+    callbacks.add(customer.back_to_customer_main, state, action="back")
+    callbacks.add(lambda bot, call, place=place: view_cart(bot, call, place, customer.back_to_customer_main),
+                  state, action="cart")
+
+callbacks.add(customer.add_to_favorites, BotStates.PRODUCT_DETAIL, action="add_favorite")
+callbacks.add(customer.remove_from_favorites, BotStates.PRODUCT_DETAIL, action="remove_favorite")
+callbacks.add(customer.add_to_cart, BotStates.PRODUCT_DETAIL, action="add_to_cart")
+callbacks.add(customer.remove_from_cart, BotStates.PRODUCT_DETAIL, action="remove_from_cart")
+callbacks.add(customer.ask_custom_quantity, BotStates.PRODUCT_DETAIL, action="custom_quantity")
+callbacks.add(customer.back_to_customer_main, BotStates.PRODUCT_DETAIL, action="back")
+callbacks.add(lambda bot, call: view_cart(bot, call, "в просмотре товара", recover_to_product),
+              BotStates.PRODUCT_DETAIL, action="cart")
+
+callbacks.add(customer.back_to_customer_main, BotStates.SEARCH_INPUT, action="back")
+
+
+# Корзина и оформление заказа
+callbacks.add(cart.checkout_start, BotStates.CART_VIEW, action="checkout")
+callbacks.add(cart.clear_cart, BotStates.CART_VIEW, action="clear_cart")
+callbacks.add(customer.back_to_customer_main, BotStates.CART_VIEW, action="back")
+
+callbacks.add(cart.use_saved_data, BotStates.CHECKOUT_START, action="use_saved_data")
+callbacks.add(cart.phone_input_start, BotStates.CHECKOUT_START, action="phone_input")
+callbacks.add(cart.view_cart, BotStates.CHECKOUT_START, action="back")
+
+# Ввод телефона: виртуальная клавиатура (старый интерфейс) и кнопка отправки контакта
+callbacks.add(cart.process_phone_digit, BotStates.PHONE_INPUT, action="phone_digit")
+callbacks.add(cart.process_phone_delete, BotStates.PHONE_INPUT, action="phone_delete")
+callbacks.add(cart.process_phone_submit, BotStates.PHONE_INPUT, action="phone_submit")
+callbacks.add(cart.checkout_start, BotStates.PHONE_INPUT, action="back")
+callbacks.add(cart.phone_input_start, BotStates.ADDRESS_INPUT, action="back")
+
+
+# Текстовые сообщения
+text_messages.add(admin.add_category_name, BotStates.CATEGORY_NAME_INPUT, admin=True)
+text_messages.add(admin.edit_category_name_save, BotStates.CATEGORY_EDIT_NAME_INPUT, admin=True)
+text_messages.add(admin.product_name_input, BotStates.PRODUCT_NAME_INPUT, admin=True)
+text_messages.add(admin.product_price_input, BotStates.PRODUCT_PRICE_INPUT, admin=True)
+text_messages.add(admin.edit_product_name_save, BotStates.PRODUCT_EDIT_NAME_INPUT, admin=True)
+text_messages.add(admin.edit_product_price_save, BotStates.PRODUCT_EDIT_PRICE_INPUT, admin=True)
+text_messages.add(customer.search_process, BotStates.SEARCH_INPUT)
+text_messages.add(cart.process_phone, BotStates.PHONE_INPUT)
+text_messages.add(cart.process_address, BotStates.ADDRESS_INPUT)
+text_messages.add(customer.process_custom_quantity, BotStates.CUSTOM_QUANTITY_INPUT)
+
+# Фотографии товаров при создании и редактировании
+photos.add(admin.product_image_uploaded, BotStates.PRODUCT_IMAGE_INPUT, admin=True)
+photos.add(admin.edit_product_image_upload, BotStates.PRODUCT_EDIT_IMAGE_INPUT, admin=True)
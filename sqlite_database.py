@@ -0,0 +1,508 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Any
+
+import codec
+import config
+from analytics import EXCLUDED_STATUSES
+from dashboard import POPULAR_WINDOWS, SEASONS, DashboardReport, window_start
+from database import COLLECTIONS, Database, read_json_file, write_json_atomic
+from order_archive import OrderArchive
+from models import Category, Product, User, Order, CartItem, decode_rows
+from user_store import UserStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category_id INTEGER NOT NULL,
+    price REAL NOT NULL,
+    unit TEXT NOT NULL,
+    image_path TEXT,
+    available INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category_id);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT,
+    phone TEXT,
+    address TEXT,
+    favorites TEXT NOT NULL DEFAULT '[]',
+    cart TEXT NOT NULL DEFAULT '[]',
+    is_admin INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    phone TEXT,
+    address TEXT,
+    delivery_time TEXT,
+    total REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity REAL NOT NULL,
+    PRIMARY KEY (order_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_order_items_product_id ON order_items(product_id);
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+ORDER_COLUMNS = "id, user_id, status, created_at, phone, address, delivery_time, total"
+# Статусы заказов, не учитываемых в аналитике продаж (для условий NOT IN)
+EXCLUDED_STATUS_LIST = ", ".join(f"'{status}'" for status in EXCLUDED_STATUSES)
+USER_COLUMNS = "id, username, phone, address, favorites, cart, is_admin"
+
+class SQLiteDatabase(Database):
+    """
+    Хранилище в SQLite с тем же API, что и Database.
+
+    Каталог (категории и товары) невелик и держится в памяти, пользователи
+    загружаются по первому обращению, а заказы не загружаются вовсе:
+    выборки по пользователю, статусу и дате выполняются индексными запросами.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path or config.SQLITE_FILE
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn_lock = threading.RLock()
+        with self._conn_lock, self._conn:
+            self._conn.executescript(SCHEMA)
+        super().__init__()
+
+    def _load_data(self, background_orders: bool = False) -> None:
+        """Загрузка каталога; при первом запуске данные импортируются из JSON-файлов"""
+        # Заказы не загружаются в память, фоновая загрузка не нужна
+        self._orders_loaded.set()
+        with self._locked(*COLLECTIONS):
+            if self._is_empty():
+                Database._load_data(self)
+                self._import_loaded(self._user_store.iter_users(), self._archive.iter_orders())
+
+            with self._conn_lock:
+                self._categories = [Category(id=row[0], name=row[1])
+                                    for row in self._conn.execute("SELECT id, name FROM categories ORDER BY id")]
+                self._products = [
+                    Product(id=row[0], name=row[1], category_id=row[2], price=row[3],
+                            unit=row[4], image_path=row[5], available=bool(row[6]))
+                    for row in self._conn.execute(
+                        "SELECT id, name, category_id, price, unit, image_path, available FROM products ORDER BY id")
+                ]
+            self._users = {}
+            self._user_access = {}
+            self._transient_users = set()
+            self._orders = []
+            self._rebuild_indexes()
+            self._load_sequences()
+
+    def _archived_orders(self) -> Iterator[Order]:
+        # Все заказы хранятся в SQLite, архив не используется
+        return iter(())
+
+    def archive_orders(self, older_than_days: Optional[int] = None) -> int:
+        return 0
+
+    def _is_empty(self) -> bool:
+        with self._conn_lock:
+            for table in ("categories", "products", "users", "orders"):
+                if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return False
+        return True
+
+    def _import_loaded(self, users: Iterable[User], archived: Iterable[Order] = ()) -> None:
+        """Перенос данных, загруженных из JSON-файлов (и архива заказов), в SQLite"""
+        with self._conn_lock, self._conn:
+            for table in ("order_items", "orders", "users", "products", "categories"):
+                self._conn.execute(f"DELETE FROM {table}")
+            for category in self._categories:
+                self._write_category(category)
+            for product in self._products:
+                self._write_product(product)
+            for user in users:
+                self._write_user(user)
+            for order in archived:
+                self._write_order(order)
+            for order in self._orders:
+                self._write_order(order)
+            self._write_sequences()
+
+    # Запись строк
+    def _write_category(self, category: Category) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO categories (id, name) VALUES (?, ?)",
+                           (category.id, category.name))
+
+    def _write_product(self, product: Product) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO products (id, name, category_id, price, unit, image_path, available) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (product.id, product.name, product.category_id, product.price,
+             product.unit, product.image_path, int(product.available))
+        )
+
+    def _write_user(self, user: User) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO users (id, username, phone, address, favorites, cart, is_admin) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user.id, user.username, user.phone, user.address, codec.dumps(user.favorites).decode('utf-8'),
+             codec.dumps([item.to_dict() for item in user.cart]).decode('utf-8'), int(user.is_admin))
+        )
+
+    def _write_order(self, order: Order) -> int:
+        cursor = self._conn.execute(
+            f"INSERT OR REPLACE INTO orders ({ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (order.id, order.user_id, order.status, order.created_at, order.phone,
+             order.address, order.delivery_time, order.total)
+        )
+        order_id = cursor.lastrowid if order.id is None else order.id
+        self._conn.execute("DELETE FROM order_items WHERE order_id = ?", (order_id,))
+        self._conn.executemany(
+            "INSERT INTO order_items (order_id, position, product_id, quantity) VALUES (?, ?, ?, ?)",
+            [(order_id, position, item.product_id, item.quantity) for position, item in enumerate(order.items)]
+        )
+        return order_id
+
+    # Счетчики id категорий и товаров (заказы нумеруются AUTOINCREMENT)
+    def _read_sequences(self) -> Dict[str, int]:
+        with self._conn_lock:
+            return dict(self._conn.execute("SELECT name, value FROM sequences"))
+
+    def _write_sequences(self) -> None:
+        with self._id_lock:
+            values = list(self._sequences.items())
+        self._conn.executemany("INSERT OR REPLACE INTO sequences (name, value) VALUES (?, ?)", values)
+
+    def _save_sequences(self) -> None:
+        with self._conn_lock, self._conn:
+            self._write_sequences()
+
+    def _persist_many(self, collection: str, changes: List[Tuple[Any, Optional[Any]]]) -> None:
+        """Построчная запись изменений коллекции в SQLite"""
+        writers = {
+            "categories": self._write_category,
+            "products": self._write_product,
+            "users": self._write_user,
+        }
+        with self._conn_lock, self._conn:
+            if collection in self._sequences and any(item is None for _, item in changes):
+                self._write_sequences()
+            for key, item in changes:
+                if item is None:
+                    self._conn.execute(f"DELETE FROM {collection} WHERE id = ?", (key,))
+                else:
+                    writers[collection](item)
+
+    def save_all(self) -> None:
+        """Все изменения фиксируются сразу, сохранять отдельно нечего"""
+        with self._conn_lock:
+            self._conn.commit()
+
+    def backup_data(self) -> str:
+        """Резервная копия базы средствами SQLite (без остановки записи)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = os.path.join(config.BACKUP_DIR, timestamp)
+        os.makedirs(backup_path, exist_ok=True)
+
+        target = sqlite3.connect(os.path.join(backup_path, os.path.basename(self._path)))
+        try:
+            with self._conn_lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
+        return backup_path
+
+    def restore_data(self, backup_path: str) -> bool:
+        """Восстановление из копии SQLite или из JSON-копии прежнего формата"""
+        try:
+            source_file = os.path.join(backup_path, os.path.basename(self._path))
+            if os.path.exists(source_file):
+                source = sqlite3.connect(source_file)
+                try:
+                    with self._conn_lock:
+                        source.backup(self._conn)
+                finally:
+                    source.close()
+            else:
+                archive = OrderArchive(os.path.join(backup_path, os.path.basename(config.ARCHIVE_DIR)))
+                self._import_loaded(self._load_json_backup(backup_path), archive.iter_orders())
+
+            self._load_data()
+            return True
+        except Exception as e:
+            print(f"Ошибка восстановления данных: {e}")
+            return False
+
+    def _load_json_backup(self, backup_path: str) -> Iterable[User]:
+        """
+        Загрузка в память JSON-файлов из каталога резервной копии.
+        Пользователи возвращаются итератором: из каталога корзин или users.json.
+        """
+        def read(filename: str, default):
+            path = os.path.join(backup_path, os.path.basename(filename))
+            if not os.path.exists(path):
+                return default
+            return read_json_file(path, (list, dict))
+
+        self._categories = decode_rows(Category, read(config.CATEGORIES_FILE, []))
+        self._products = decode_rows(Product, read(config.PRODUCTS_FILE, []))
+        self._orders = decode_rows(Order, read(config.ORDERS_FILE, []))
+
+        users_dir = os.path.join(backup_path, os.path.basename(config.USERS_DIR))
+        if os.path.isdir(users_dir):
+            store = UserStore(users_dir, config.USER_BUCKETS,
+                              lambda path, expected_type: read_json_file(path, expected_type)
+                              if os.path.exists(path) else None,
+                              write_json_atomic)
+            return store.iter_users()
+        return (User.from_dict(data) for data in read(config.USERS_FILE, {}).values())
+
+    # Пользователи загружаются по первому обращению
+    def get_user(self, user_id: int) -> User:
+        user = self._users.get(user_id)
+        if user is None:
+            with self._locks["users"]:
+                user = self._users.get(user_id)
+                if user is None:
+                    user = self._fetch_user(user_id)
+                    if user is None:
+                        # Новый пользователь сохраняется только при первом изменении (update_user)
+                        user = User(id=user_id)
+                        self._transient_users.add(user_id)
+                    self._users[user_id] = user
+                    self._evict_users()
+        self._user_access[user_id] = time.monotonic()
+        return user
+
+    def _fetch_user(self, user_id: int) -> Optional[User]:
+        with self._conn_lock:
+            row = self._conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)).fetchone()
+        return self._user_from_row(row) if row is not None else None
+
+    def _iter_all_users(self) -> Iterator[User]:
+        with self._conn_lock:
+            rows = self._conn.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY id").fetchall()
+        return (self._user_from_row(row) for row in rows)
+
+    @staticmethod
+    def _user_from_row(row: tuple) -> User:
+        user = User(id=row[0], username=row[1], phone=row[2], address=row[3],
+                    favorites=codec.loads(row[4]), is_admin=bool(row[6]))
+        user.cart = [CartItem.from_dict(item) for item in codec.loads(row[5])]
+        return user
+
+    # Заказы
+    def _fetch_orders(self, where: str = "", params: tuple = (), order_by: str = "id",
+                      limit: Optional[int] = None, offset: int = 0) -> List[Order]:
+        query = f"SELECT {ORDER_COLUMNS} FROM orders {where} ORDER BY {order_by}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        elif offset:
+            query += f" LIMIT -1 OFFSET {int(offset)}"
+
+        with self._conn_lock:
+            rows = self._conn.execute(query, params).fetchall()
+            if not rows:
+                return []
+            items = {}
+            ids = [row[0] for row in rows]
+            # Позиции заказов читаются пачками, чтобы не превышать лимит параметров SQLite
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for order_id, product_id, quantity in self._conn.execute(
+                        f"SELECT order_id, product_id, quantity FROM order_items "
+                        f"WHERE order_id IN ({placeholders}) ORDER BY order_id, position", chunk):
+                    items.setdefault(order_id, []).append(CartItem(product_id, quantity))
+
+        return [
+            Order(id=row[0], user_id=row[1], items=items.get(row[0], []), status=row[2],
+                  created_at=row[3], phone=row[4], address=row[5], delivery_time=row[6], total=row[7])
+            for row in rows
+        ]
+
+    def create_order(self, user_id: int, phone: str, address: str, delivery_time: Optional[str] = None) -> Optional[Order]:
+        with self._locks["users"]:
+            user = self.get_user(user_id)
+            if not user.cart:
+                return None
+
+            # Вычисляем общую сумму заказа
+            total = 0.0
+            for cart_item in user.cart:
+                product = self.get_product(cart_item.product_id)
+                if product:
+                    total += product.price * cart_item.quantity
+
+            order = Order(
+                id=None,
+                user_id=user_id,
+                items=user.cart.copy(),
+                phone=phone,
+                address=address,
+                delivery_time=delivery_time,
+                total=total
+            )
+
+            # Очищаем корзину пользователя
+            user.clear_cart()
+
+            with self._conn_lock, self._conn:
+                order.id = self._write_order(order)
+                self._write_user(user)
+            self._transient_users.discard(user_id)
+            self._orders_version += 1
+        return order
+
+    def get_orders(self, user_id: Optional[int] = None) -> List[Order]:
+        if user_id is not None:
+            return self._fetch_orders("WHERE user_id = ?", (user_id,))
+        return self._fetch_orders()
+
+    def get_all_orders(self) -> List[Order]:
+        """Получить все заказы"""
+        return self._fetch_orders()
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        orders = self._fetch_orders("WHERE id = ?", (order_id,))
+        return orders[0] if orders else None
+
+    def is_order_archived(self, order_id: int) -> bool:
+        # Архив переносится в базу при ее создании, все заказы в ней рабочие
+        return False
+
+    def update_order_status(self, order_id: int, status: str) -> Optional[Order]:
+        with self._conn_lock, self._conn:
+            cursor = self._conn.execute("UPDATE orders SET status = ? WHERE id = ?", (status, order_id))
+        if cursor.rowcount:
+            self._orders_version += 1
+            return self.get_order(order_id)
+        return None
+
+    def _status_filter(self, status: Optional[str], exclude_status: Optional[str]) -> Tuple[str, tuple]:
+        if status is not None:
+            return "WHERE status = ?", (status,)
+        if exclude_status is not None:
+            return "WHERE status != ?", (exclude_status,)
+        return "", ()
+
+    def find_orders(self, status: Optional[str] = None, exclude_status: Optional[str] = None,
+                    sort_by: Optional[str] = "created_at", descending: bool = True,
+                    offset: int = 0, limit: Optional[int] = None) -> List[Order]:
+        """Выборка заказов индексным запросом (см. Database.find_orders)"""
+        where, params = self._status_filter(status, exclude_status)
+        if sort_by in ("created_at", "user_id"):
+            order_by = f"{sort_by} {'DESC' if descending else 'ASC'}, id"
+        else:
+            order_by = "id"
+        return self._fetch_orders(where, params, order_by, limit, offset)
+
+    def count_orders(self, status: Optional[str] = None, exclude_status: Optional[str] = None) -> int:
+        where, params = self._status_filter(status, exclude_status)
+        with self._conn_lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM orders {where}", params).fetchone()[0]
+
+    # Аналитика
+    def get_product_quantities(self, since: Optional[str] = None) -> Dict[int, float]:
+        return self.get_product_sales(since[:10] if since else None)
+
+    def get_product_quantities_by_month(self) -> Dict[int, Dict[int, float]]:
+        result = {}
+        with self._conn_lock:
+            for month, product_id, quantity in self._conn.execute(
+                    f"SELECT CAST(substr(o.created_at, 6, 2) AS INTEGER) AS month, i.product_id, SUM(i.quantity) "
+                    f"FROM order_items i JOIN orders o ON o.id = i.order_id "
+                    f"WHERE o.status NOT IN ({EXCLUDED_STATUS_LIST}) GROUP BY month, i.product_id"):
+                if month:
+                    result.setdefault(month, {})[product_id] = quantity
+        return result
+
+    def get_product_sales(self, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Dict[int, float]:
+        query = (f"SELECT i.product_id, SUM(i.quantity) FROM order_items i JOIN orders o ON o.id = i.order_id "
+                 f"WHERE o.status NOT IN ({EXCLUDED_STATUS_LIST})")
+        params = []
+        if start_date is not None:
+            query += " AND o.created_at >= ?"
+            params.append(start_date)
+        if end_date is not None:
+            # Сравнение по дате: заказы в течение всего дня end_date
+            query += " AND substr(o.created_at, 1, 10) <= ?"
+            params.append(end_date)
+        query += " GROUP BY i.product_id"
+        with self._conn_lock:
+            return dict(self._conn.execute(query, params))
+
+    def get_customer_stats(self) -> Dict[int, Tuple[float, int]]:
+        with self._conn_lock:
+            return {
+                user_id: (total, count)
+                for user_id, total, count in self._conn.execute(
+                    f"SELECT user_id, SUM(total), COUNT(*) FROM orders WHERE status NOT IN ({EXCLUDED_STATUS_LIST}) GROUP BY user_id")
+            }
+
+    def get_top_customers(self, by_amount: bool = True, limit: int = 5) -> List[Tuple[int, float]]:
+        value = "SUM(total)" if by_amount else "COUNT(*)"
+        with self._conn_lock:
+            return self._conn.execute(
+                f"SELECT user_id, {value} AS value FROM orders WHERE status NOT IN ({EXCLUDED_STATUS_LIST}) "
+                f"GROUP BY user_id ORDER BY value DESC, user_id LIMIT ?", (limit,)).fetchall()
+
+    def get_popular_products(self, days: int = 30, limit: int = 5) -> List[Tuple[int, float]]:
+        since_date = window_start(datetime.now(), days).strftime("%Y-%m-%d")
+        with self._conn_lock:
+            return self._conn.execute(
+                f"SELECT i.product_id, SUM(i.quantity) AS quantity FROM order_items i "
+                f"JOIN orders o ON o.id = i.order_id JOIN products p ON p.id = i.product_id "
+                f"WHERE o.created_at >= ? AND o.status NOT IN ({EXCLUDED_STATUS_LIST}) "
+                f"GROUP BY i.product_id ORDER BY quantity DESC, i.product_id LIMIT ?", (since_date, limit)).fetchall()
+
+    def _compute_dashboard(self, limit: int) -> DashboardReport:
+        # Все периоды и сезоны - условными суммами одного запроса по позициям заказов
+        now = datetime.now()
+        columns = ["i.product_id", "SUM(i.quantity)"]
+        params = []
+        for days in POPULAR_WINDOWS:
+            columns.append("SUM(CASE WHEN o.created_at >= ? THEN i.quantity END)")
+            params.append(window_start(now, days).strftime("%Y-%m-%d"))
+        for months in SEASONS.values():
+            month_list = ", ".join(str(month) for month in months)
+            columns.append(f"SUM(CASE WHEN CAST(substr(o.created_at, 6, 2) AS INTEGER) IN ({month_list}) "
+                           f"THEN i.quantity END)")
+        product_totals = {}
+        window_totals = {days: {} for days in POPULAR_WINDOWS}
+        season_totals = {season: {} for season in SEASONS}
+        with self._conn_lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM order_items i "
+                f"JOIN orders o ON o.id = i.order_id JOIN products p ON p.id = i.product_id "
+                f"WHERE o.status NOT IN ({EXCLUDED_STATUS_LIST}) GROUP BY i.product_id", params).fetchall()
+            customers = {
+                user_id: (total, count)
+                for user_id, total, count in self._conn.execute(
+                    f"SELECT user_id, SUM(total), COUNT(*) FROM orders "
+                    f"WHERE status NOT IN ({EXCLUDED_STATUS_LIST}) AND user_id != 0 GROUP BY user_id")
+            }
+        buckets = [window_totals[days] for days in POPULAR_WINDOWS] + list(season_totals.values())
+        for product_id, total, *sums in rows:
+            product_totals[product_id] = total
+            for bucket, quantity in zip(buckets, sums):
+                if quantity is not None:
+                    bucket[product_id] = quantity
+        return DashboardReport.build(now, limit, customers, product_totals, window_totals, season_totals)
@@ -0,0 +1,58 @@
+"""
+Проверка атомарной записи файлов данных: сбой во время записи оставляет
+прежнюю версию файла без временных файлов, а поврежденный снимок при
+загрузке восстанавливается из самой свежей исправной резервной копии.
+
+Запуск: pytest test_atomic_write.py
+"""
+import os
+
+import pytest
+
+import config
+from database import _replace_atomic, read_json_file, write_json_atomic
+
+
+def test_failed_write_keeps_previous_version(tmp_path):
+    path = str(tmp_path / "products.json")
+    write_json_atomic(path, [{"id": 1}])
+
+    def write(f):
+        f.write(b'[{"id": 1}, {"id"')
+        raise OSError("нет места на диске")
+
+    with pytest.raises(OSError):
+        _replace_atomic(path, write)
+    assert read_json_file(path, list) == [{"id": 1}]
+    assert os.listdir(str(tmp_path)) == ["products.json"]
+
+
+def test_read_json_file_checks_root_type(tmp_path):
+    path = str(tmp_path / "users.json")
+    write_json_atomic(path, [])
+    with pytest.raises(ValueError):
+        read_json_file(path, dict)
+
+
+def test_corrupt_snapshot_restored_from_backup(open_db):
+    db = open_db()
+    category = db.add_category("Фрукты")
+    db.add_product("Яблоки", category.id, 120.0, "kg")
+    db.backup_data()
+    # Более новая копия тоже повреждена: берется последняя исправная
+    broken_backup = os.path.join(config.BACKUP_DIR, "99999999_999999")
+    os.makedirs(broken_backup)
+    with open(os.path.join(broken_backup, os.path.basename(config.PRODUCTS_FILE)), 'wb') as f:
+        f.write(b'{"columns": ["id"')
+
+    # Файл обрезан сбоем записи
+    with open(config.PRODUCTS_FILE, 'rb') as f:
+        content = f.read()
+    with open(config.PRODUCTS_FILE, 'wb') as f:
+        f.write(content[:len(content) // 2])
+
+    reopened = open_db()
+    assert [product.name for product in reopened.get_products()] == ["Яблоки"]
+    corrupt = [name for name in os.listdir(config.DATA_DIR) if name.startswith("products.json.corrupt-")]
+    assert len(corrupt) == 1
+    assert read_json_file(config.PRODUCTS_FILE, (list, dict))
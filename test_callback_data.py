@@ -0,0 +1,71 @@
+"""
+Проверка формата callback_data: кодирование и разбор аргументов всех типов,
+ограничение длины, кнопки без параметров и разбор кнопок прежнего формата
+в уже отправленных сообщениях.
+
+Запуск: pytest test_callback_data.py
+"""
+import pytest
+
+import callback_data
+
+
+@pytest.mark.parametrize("name, args", [
+    ("product", (0,)),
+    ("product", (35,)),
+    ("product", (2 ** 62,)),
+    ("add_to_cart", (12345, 0.25)),
+    ("add_to_cart", (1, 1000000.5)),
+    ("phone_digit", (9,)),
+    ("load_backup", ("20250526_232210",)),
+    ("mode", ("admin",)),
+])
+def test_round_trip(name, args):
+    data = callback_data.encode(name, *args)
+    assert len(data.encode('utf-8')) <= callback_data.MAX_LENGTH
+    assert callback_data.parse(data) == (name, args)
+    assert callback_data.action_of(data) == name
+    assert callback_data.args(data) == args
+
+
+def test_compact_format():
+    assert callback_data.encode("add_to_cart", 12345, 0.25) == "ca:9ix:6y"
+    assert callback_data.encode("edit_product_name", -5) == "epn:-5"
+
+
+def test_encode_errors():
+    with pytest.raises(ValueError):
+        callback_data.encode("add_to_cart", 1)
+    with pytest.raises(ValueError):
+        callback_data.encode("load_backup", "a:b")
+    with pytest.raises(ValueError):
+        callback_data.encode("load_backup", "x" * 70)
+
+
+def test_plain_buttons():
+    assert callback_data.parse("cart") == ("cart", ())
+    assert callback_data.parse("admin_orders") == ("admin_orders", ())
+    assert callback_data.parse("page_next") == ("page_next", ())
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("add_to_cart_12345_0.25", ("add_to_cart", (12345, 0.25))),
+    ("product_7", ("product", (7,))),
+    # Самый длинный префикс: не edit_product с аргументом "name_5"
+    ("edit_product_name_5", ("edit_product_name", (5,))),
+    ("edit_product_5", ("edit_product", (5,))),
+    ("confirm_delete_product_3", ("confirm_delete_product", (3,))),
+    ("delete_category_products_4", ("delete_category_products", (4,))),
+    # Имя резервной копии содержит "_"
+    ("load_backup_20250526_232210", ("load_backup", ("20250526_232210",))),
+    ("mode_customer", ("mode", ("customer",))),
+    ("page_size_20", ("page_size", (20,))),
+])
+def test_legacy_format(data, expected):
+    assert callback_data.parse(data) == expected
+
+
+@pytest.mark.parametrize("data", ["zz:1", "p:1:2", "ca:1", "product_x", "add_to_cart_1"])
+def test_malformed(data):
+    with pytest.raises(ValueError):
+        callback_data.parse(data)
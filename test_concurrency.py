@@ -0,0 +1,88 @@
+"""
+Проверка потокобезопасности базы: параллельные изменения из нескольких
+потоков получают разные id, индексы остаются согласованными, и все
+изменения попадают в файлы данных.
+
+Запуск: pytest test_concurrency.py
+"""
+import threading
+
+from models import CartItem
+
+THREADS = 8
+PER_THREAD = 25
+
+
+def run_threads(target) -> None:
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def run(number: int) -> None:
+        barrier.wait()
+        try:
+            target(number)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads), "потоки не завершились (взаимная блокировка?)"
+    assert errors == []
+
+
+def test_parallel_inserts_get_unique_ids(open_db):
+    db = open_db()
+    ids = []
+
+    def add(number: int) -> None:
+        for i in range(PER_THREAD):
+            ids.append(db.add_category(f"Категория {number}-{i}").id)
+
+    run_threads(add)
+    assert sorted(ids) == list(range(1, THREADS * PER_THREAD + 1))
+    assert len(open_db().get_categories()) == THREADS * PER_THREAD
+
+
+def test_parallel_orders(open_db):
+    db = open_db()
+    category = db.add_category("Фрукты")
+    product = db.add_product("Яблоки", category.id, 100.0, "kg")
+    orders = []
+
+    def buy(number: int) -> None:
+        user_id = 1000 + number
+        for _ in range(PER_THREAD):
+            db.update_user(user_id, cart=[CartItem(product.id, 1)])
+            order = db.create_order(user_id, "+70000000000", "Адрес")
+            orders.append(order.id)
+            db.update_order_status(order.id, "completed")
+
+    run_threads(buy)
+    assert sorted(orders) == list(range(1, THREADS * PER_THREAD + 1))
+    assert db.count_orders(status="completed") == THREADS * PER_THREAD
+    assert all(len(db.get_orders(1000 + number)) == PER_THREAD for number in range(THREADS))
+    assert db.get_customer_stats()[1000] == (100.0 * PER_THREAD, PER_THREAD)
+
+    reopened = open_db()
+    assert len(reopened.get_all_orders()) == THREADS * PER_THREAD
+    assert reopened.count_orders(status="completed") == THREADS * PER_THREAD
+
+
+def test_catalog_changes_do_not_deadlock(open_db):
+    db = open_db()
+    categories = [db.add_category(f"Категория {number}") for number in range(THREADS)]
+
+    def change(number: int) -> None:
+        category = categories[number]
+        for i in range(PER_THREAD):
+            product = db.add_product(f"Товар {i}", category.id, 10.0, "piece")
+            db.update_product(product.id, price=20.0)
+            if number % 2 and i == PER_THREAD - 1:
+                db.delete_category(category.id)
+
+    run_threads(change)
+    assert len(db.get_categories()) == THREADS // 2
+    assert len(db.get_products()) == PER_THREAD * (THREADS // 2)
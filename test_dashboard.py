@@ -0,0 +1,65 @@
+"""
+Проверка границ периодов популярности товаров: период из 7 дней
+включает сегодняшний день и 6 предыдущих, но не 7-й день назад.
+Отмененные заказы в аналитике не учитываются.
+
+Запуск: python test_dashboard.py (или pytest test_dashboard.py)
+"""
+from datetime import datetime, timedelta
+
+from analytics import SalesAggregates
+from dashboard import compute_dashboard, window_start
+from models import CartItem, Order
+
+NOW = datetime(2025, 6, 10, 15, 30)
+
+
+def make_order(order_id: int, product_id: int, created_at: datetime) -> Order:
+    return Order(id=order_id, user_id=1, items=[CartItem(product_id, 1)],
+                 status="completed", created_at=created_at.isoformat(), total=100.0)
+
+
+def test_window_start_covers_exactly_days():
+    assert window_start(NOW, 7) == datetime(2025, 6, 4)
+    assert window_start(NOW, 1) == datetime(2025, 6, 10)
+    assert (NOW.date() - window_start(NOW, 30).date()).days + 1 == 30
+
+
+def test_weekly_window_boundary():
+    sales = SalesAggregates()
+    # Товар 1 - 6 дней назад (первый день недели), товар 2 - 7 дней назад (уже вне недели)
+    sales.add_order(make_order(1, 1, datetime.combine((NOW - timedelta(days=6)).date(), datetime.min.time())))
+    sales.add_order(make_order(2, 2, (NOW - timedelta(days=7)).replace(hour=23, minute=59)))
+    report = compute_dashboard(sales, {1, 2}, now=NOW)
+
+    assert [product_id for product_id, _ in report.popular_products[7]] == [1]
+    assert {product_id for product_id, _ in report.popular_products[30]} == {1, 2}
+
+
+def test_cancelled_orders_excluded():
+    sales = SalesAggregates()
+    order = make_order(1, 1, NOW)
+    cancelled = make_order(2, 2, NOW)
+    cancelled.status = "cancelled"
+    sales.add_order(order)
+    sales.add_order(cancelled)
+    assert sales.customer_stats() == {1: (100.0, 1)}
+    assert sales.product_quantities() == {1: 1}
+
+    # Отмена вычитает заказ из сумм, возврат из отмены - прибавляет
+    order.status = "cancelled"
+    sales.change_status(order, "completed")
+    cancelled.status = "pending"
+    sales.change_status(cancelled, "cancelled")
+    assert sales.customer_stats() == {1: (100.0, 1)}
+    assert sales.product_quantities() == {2: 1}
+    report = compute_dashboard(sales, {1, 2}, now=NOW)
+    assert report.popular_products[7] == [(2, 1)]
+    assert report.top_customers_by_amount == [(1, 100.0)]
+
+
+if __name__ == "__main__":
+    test_window_start_covers_exactly_days()
+    test_weekly_window_boundary()
+    test_cancelled_orders_excluded()
+    print("OK")
@@ -0,0 +1,74 @@
+"""
+Проверка журнала изменений: записи применяются поверх снимка при загрузке,
+оборванная последняя строка пропускается, по достижении порога снимок
+перезаписывается, а журнал очищается.
+
+Запуск: pytest test_journal.py
+"""
+import os
+
+import config
+from journal import Journal
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    journal = Journal(str(tmp_path / "items.json.log"))
+    journal.append("put", 1, {"id": 1, "name": "Фрукты"})
+    journal.append("put", 2, {"id": 2, "name": "Овощи"})
+    journal.append("del", 1)
+    journal.close()
+    # Сбой во время записи: последняя строка оборвана
+    with open(journal.path, 'ab') as f:
+        f.write(b'{"op": "put", "id": 3, "da')
+
+    records = list(Journal(journal.path).replay())
+    assert [(record["op"], record["id"]) for record in records] == [("put", 1), ("put", 2), ("del", 1)]
+    assert records[1]["data"] == {"id": 2, "name": "Овощи"}
+
+
+def test_clear_removes_file(tmp_path):
+    journal = Journal(str(tmp_path / "items.json.log"))
+    journal.append("put", 1, {"id": 1})
+    journal.clear()
+    assert not journal.exists()
+    assert journal.size == 0
+
+
+def test_mutations_replayed_over_snapshot(open_db, monkeypatch):
+    monkeypatch.setattr(config, "JOURNAL_MODE", True)
+    db = open_db()
+    fruits = db.add_category("Фрукты")
+    vegetables = db.add_category("Овощи")
+    db.save_all()  # снимок с обеими категориями, журнал пуст
+    assert not os.path.exists(config.CATEGORIES_FILE + ".log")
+
+    db.update_category(fruits.id, "Ягоды")
+    db.delete_category(vegetables.id)
+    db.add_category("Зелень")
+    with open(config.CATEGORIES_FILE, 'rb') as f:
+        snapshot = f.read()
+
+    reopened = open_db()
+    assert [(category.id, category.name) for category in reopened.get_categories()] == [
+        (fruits.id, "Ягоды"), (vegetables.id + 1, "Зелень")]
+    assert reopened._journals["categories"].size == 3
+    # Изменения записаны только в журнал, снимок не перезаписывался
+    with open(config.CATEGORIES_FILE, 'rb') as f:
+        assert f.read() == snapshot
+
+
+def test_compaction_rewrites_snapshot(open_db, monkeypatch):
+    monkeypatch.setattr(config, "JOURNAL_MODE", True)
+    monkeypatch.setattr(config, "JOURNAL_COMPACT_THRESHOLD", 3)
+    db = open_db()
+    db.add_category("Фрукты")
+    db.add_category("Овощи")
+    assert not os.path.exists(config.CATEGORIES_FILE)
+    assert db._journals["categories"].size == 2
+
+    db.add_category("Зелень")
+    assert os.path.exists(config.CATEGORIES_FILE)
+    assert not os.path.exists(config.CATEGORIES_FILE + ".log")
+
+    reopened = open_db()
+    assert [category.name for category in reopened.get_categories()] == ["Фрукты", "Овощи", "Зелень"]
@@ -0,0 +1,81 @@
+"""
+Проверка потокового чтения JSON: результат не зависит от размера блока
+(разрывы строк, чисел и многобайтовых символов на границе блоков), заказы
+читаются в табличном и прежнем формате, а фоновая загрузка заказов
+завершается до первой операции с ними.
+
+Запуск: pytest test_json_stream.py
+"""
+import io
+import json
+
+import pytest
+
+import codec
+import config
+from json_stream import JsonStream, iter_object
+from models import CartItem, Order, encode_rows, iter_rows
+
+DOCUMENT = [
+    {"id": 1, "name": "Яблоки «Гала»", "price": 123.456, "tags": ["🍏", "фрукты"]},
+    {"id": 22, "name": "Молоко", "price": 1e-3, "tags": []},
+    [], {}, 1234567890, -0.5, "строка", True, None,
+]
+
+
+def stream(data: bytes, chunk_size: int) -> JsonStream:
+    return JsonStream(io.BytesIO(data), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+def test_items_independent_of_chunk_size(chunk_size):
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode('utf-8')
+    assert list(stream(data, chunk_size).items()) == DOCUMENT
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_object_pairs(chunk_size):
+    document = {"1": {"username": "анна"}, "22": {"cart": [1, 2.5]}, "333": {}}
+    data = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    assert dict(iter_object(stream(data, chunk_size))) == document
+
+
+def test_truncated_document():
+    data = json.dumps(DOCUMENT).encode('utf-8')
+    with pytest.raises(ValueError):
+        list(stream(data[:-20], 8).items())
+
+
+def make_orders(count: int):
+    return [Order(id=order_id, user_id=order_id % 3, items=[CartItem(1, 0.5), CartItem(2, 2)],
+                  status="new", created_at=f"2025-01-{order_id % 28 + 1:02d}T10:00:00",
+                  total=150.0 + order_id)
+            for order_id in range(1, count + 1)]
+
+
+@pytest.mark.parametrize("table", [True, False])
+def test_iter_rows(table):
+    orders = make_orders(5)
+    data = encode_rows(Order, orders) if table else [order.to_dict() for order in orders]
+    loaded = list(iter_rows(Order, stream(codec.dumps(data), 16)))
+    assert [order.to_dict() for order in loaded] == [order.to_dict() for order in orders]
+
+
+def test_background_load(open_db, monkeypatch):
+    db = open_db()
+    category = db.add_category("Фрукты")
+    product = db.add_product("Яблоки", category.id, 100.0, "kg")
+    for user_id in range(1, 6):
+        db.update_user(user_id, cart=[CartItem(product.id, 2)])
+        db.create_order(user_id, "+70000000000", "Адрес")
+
+    monkeypatch.setattr(config, "ORDERS_BACKGROUND_LOAD", True)
+    monkeypatch.setattr(config, "ORDERS_LOAD_PROGRESS_STEP", 2)
+    reopened = open_db()
+    assert reopened.wait_orders_loaded(timeout=10)
+    assert reopened.get_order(5).total == 200.0
+    assert reopened.count_orders() == 5
+    assert reopened.get_product_quantities() == {product.id: 10}
+    assert reopened.add_category("Овощи").id == 2
+    reopened.update_user(1, cart=[CartItem(product.id, 1)])
+    assert reopened.create_order(1, "+70000000000", "Адрес").id == 6
@@ -0,0 +1,101 @@
+"""
+Проверка архива заказов: заказы дописываются блоками в файлы месяцев без
+перезаписи прежнего содержимого, оборванный сбоем блок отрезается, а база
+находит архивные заказы по номеру и учитывает их в аналитике.
+
+Запуск: pytest test_order_archive.py
+"""
+import os
+
+import config
+from models import CartItem, Order
+from order_archive import OrderArchive
+
+
+def make_order(order_id: int, month: str = "2024-01", status: str = "completed") -> Order:
+    return Order(id=order_id, user_id=1, items=[CartItem(1, 1)], status=status,
+                 created_at=f"{month}-05T10:00:00", total=100.0)
+
+
+def test_append_keeps_existing_content(tmp_path):
+    archive = OrderArchive(str(tmp_path / "archive"))
+    archive.append([make_order(1), make_order(2), make_order(3, "2024-02")])
+    path = os.path.join(archive.directory, "orders-2024-01.jsonl.gz")
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    archive.append([make_order(4)])
+    with open(path, 'rb') as f:
+        assert f.read().startswith(before)
+    assert archive.months() == ["2024-01", "2024-02"]
+    assert [order.id for order in OrderArchive(archive.directory).iter_orders()] == [1, 2, 4, 3]
+
+
+def test_torn_member_cut_before_next_append(tmp_path):
+    archive = OrderArchive(str(tmp_path / "archive"))
+    archive.append([make_order(1), make_order(2)])
+    path = os.path.join(archive.directory, "orders-2024-01.jsonl.gz")
+    # Сбой во время дописывания: в конце файла начало блока gzip
+    with open(path, 'rb') as f:
+        content = f.read()
+    with open(path, 'ab') as f:
+        f.write(content[:len(content) // 2])
+
+    reopened = OrderArchive(archive.directory)
+    assert [order.id for order in reopened.iter_orders()] == [1, 2]
+    reopened.append([make_order(3)])
+    assert os.path.getsize(path) > len(content)
+    assert [order.id for order in OrderArchive(archive.directory).iter_orders()] == [1, 2, 3]
+
+
+def test_get_by_id(tmp_path):
+    archive = OrderArchive(str(tmp_path / "archive"))
+    archive.append([make_order(1), make_order(2, "2024-02"), make_order(3, "unknown")])
+    reopened = OrderArchive(archive.directory)
+    assert reopened.get(2).created_at.startswith("2024-02")
+    assert reopened.get(3).id == 3
+    assert reopened.get(4) is None
+
+
+def create_orders(db, count: int):
+    category = db.add_category("Фрукты")
+    product = db.add_product("Яблоки", category.id, 100.0, "kg")
+    for user_id in range(1, count + 1):
+        db.update_user(user_id, cart=[CartItem(product.id, 1)])
+        db.create_order(user_id, "+70000000000", "Адрес")
+    return product
+
+
+def test_database_falls_through_to_archive(open_db, monkeypatch):
+    db = open_db()
+    product = create_orders(db, 3)
+    for order in db.get_all_orders()[:2]:
+        order.created_at = "2024-01-05T10:00:00"
+    db.update_order_status(1, "completed")
+    db.save_all()
+
+    monkeypatch.setattr(config, "ORDERS_ARCHIVE_DAYS", 30)
+    reopened = open_db()
+    # Заказ 2 старый, но не завершен - остается рабочим
+    assert [order.id for order in reopened.get_all_orders()] == [2, 3]
+    assert os.listdir(config.ARCHIVE_DIR) == ["orders-2024-01.jsonl.gz"]
+    assert reopened.get_order(1).status == "completed"
+    assert reopened.is_order_archived(1)
+    assert not reopened.is_order_archived(2)
+    assert reopened.update_order_status(1, "new") is None
+    assert reopened.get_product_quantities() == {product.id: 3}
+
+    reopened.update_user(1, cart=[CartItem(product.id, 1)])
+    assert reopened.create_order(1, "+70000000000", "Адрес").id == 4
+    assert open_db().get_order(1).id == 1
+
+
+def test_order_in_archive_and_live_counted_once(open_db):
+    db = open_db()
+    product = create_orders(db, 2)
+    # Сбой между записью в архив и удалением из рабочих заказов
+    db._archive.append([db.get_order(1)])
+
+    reopened = open_db()
+    assert reopened.get_product_quantities() == {product.id: 2}
+    assert reopened.get_customer_stats()[1] == (100.0, 1)
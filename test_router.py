@@ -0,0 +1,113 @@
+"""
+Проверка таблицы маршрутов: выбор обработчика по состоянию и действию
+кнопки, приоритет маршрутов без состояния, проверка прав администратора
+и маршруты бота для кнопок нового и прежнего формата.
+
+Запуск: pytest test_router.py
+"""
+import pytest
+
+import callback_data
+from router import Router
+from states import BotStates
+
+ADMIN = BotStates.ADMIN_MODE.name
+CUSTOMER = BotStates.CUSTOMER_MODE.name
+
+
+class Recorder:
+    """Обработчики и проверка прав, запоминающие вызовы"""
+
+    def __init__(self, is_admin: bool = True):
+        self.is_admin = is_admin
+        self.calls = []
+
+    def handler(self, name: str):
+        return lambda bot, event: self.calls.append((name, event))
+
+    def admin_check(self, bot, event) -> bool:
+        self.calls.append(("admin_check", event))
+        return self.is_admin
+
+
+def make_router(recorder: Recorder) -> Router:
+    router = Router(recorder.admin_check, callback_data.action_of)
+    router.add(recorder.handler("any_back"), action="back_to_start")
+    router.add(recorder.handler("admin_back"), BotStates.ADMIN_MODE, action="back", admin=True)
+    router.add(recorder.handler("customer_back"), BotStates.CUSTOMER_MODE, action="back")
+    router.add(recorder.handler("product"), BotStates.CUSTOMER_MODE, action="product")
+    router.restrict(BotStates.ADMIN_MODE)
+    return router
+
+
+def test_route_by_state_and_action():
+    recorder = Recorder()
+    router = make_router(recorder)
+    assert router.dispatch(None, "event", CUSTOMER, "back")
+    assert router.dispatch(None, "event", CUSTOMER, callback_data.encode("product", 12345))
+    assert router.dispatch(None, "event", CUSTOMER, "product_12345")  # прежний формат
+    assert router.dispatch(None, "event", ADMIN, "back_to_start")
+    assert [name for name, _ in recorder.calls] == ["customer_back", "product", "product", "any_back"]
+
+
+def test_unknown_buttons():
+    recorder = Recorder()
+    router = make_router(recorder)
+    assert not router.dispatch(None, "event", CUSTOMER, "cart")
+    assert not router.dispatch(None, "event", None, "back")
+    # Данные не соответствуют действию: обработчик не вызывается
+    assert router.resolve(CUSTOMER, "p:1:2") is None
+    assert recorder.calls == []
+
+
+def test_admin_routes():
+    recorder = Recorder(is_admin=False)
+    router = make_router(recorder)
+    assert router.dispatch(None, "event", ADMIN, "back")
+    # В состоянии администратора права проверяются и для кнопок без маршрута
+    assert router.dispatch(None, "event", ADMIN, "cart")
+    assert [name for name, _ in recorder.calls] == ["admin_check", "admin_check"]
+
+    recorder.is_admin = True
+    recorder.calls.clear()
+    router.dispatch(None, "event", ADMIN, "back")
+    assert [name for name, _ in recorder.calls] == ["admin_check", "admin_back"]
+
+
+def test_duplicate_route():
+    recorder = Recorder()
+    router = make_router(recorder)
+    with pytest.raises(ValueError):
+        router.add(recorder.handler("again"), BotStates.CUSTOMER_MODE, action="back")
+
+
+def test_message_routes():
+    recorder = Recorder()
+    router = Router(recorder.admin_check)
+
+    @router.on(BotStates.SEARCH_INPUT)
+    def search(bot, message):
+        recorder.calls.append(("search", message))
+
+    assert router.dispatch(None, "текст", BotStates.SEARCH_INPUT.name)
+    assert not router.dispatch(None, "текст", CUSTOMER)
+    assert recorder.calls == [("search", "текст")]
+
+
+def test_bot_routes():
+    import handlers.customer as customer
+    import handlers.orders as orders
+    import handlers.start as start
+    import routes
+
+    def handler(state, data):
+        route = routes.callbacks.resolve(state.name if state else None, data)
+        return route.handler if route else None
+
+    assert handler(BotStates.PRODUCT_DETAIL, callback_data.encode("add_to_cart", 5, 0.25)) is customer.add_to_cart
+    assert handler(BotStates.PRODUCT_DETAIL, "add_to_cart_5_0.25") is customer.add_to_cart
+    assert handler(BotStates.ORDERS_LIST, "page_next") is orders.handle_page_navigation
+    assert handler(BotStates.ORDERS_LIST, callback_data.encode("page_size", 20)) is orders.handle_page_size_change
+    assert handler(BotStates.CART_VIEW, callback_data.encode("view_order", 7)) is orders.view_order_detail
+    assert handler(None, callback_data.encode("mode", "admin")) is start.mode_selector
+    assert routes.callbacks.resolve(BotStates.ADMIN_MODE.name, "admin_orders").admin
@@ -0,0 +1,39 @@
+"""
+Проверка счетчиков id: id удаленных записей не выдаются повторно и после
+перезапуска, а устаревший или поврежденный файл счетчиков не приводит
+к повторной выдаче id существующих записей.
+
+Запуск: pytest test_sequences.py
+"""
+import config
+from database import read_json_file, write_bytes_atomic, write_json_atomic
+
+
+def test_deleted_ids_not_reused_after_restart(open_db):
+    db = open_db()
+    category = db.add_category("Фрукты")
+    products = [db.add_product(f"Товар {i}", category.id, 10.0, "piece") for i in range(3)]
+    db.delete_product(products[-1].id)
+    db.delete_category(db.add_category("Овощи").id)
+    assert read_json_file(config.SEQUENCES_FILE, dict)["categories"] == 2
+
+    reopened = open_db()
+    assert reopened.add_category("Зелень").id == 3
+    assert reopened.add_product("Груши", category.id, 10.0, "piece").id == 4
+
+
+def test_stale_sequences_file(open_db):
+    db = open_db()
+    for name in ("Фрукты", "Овощи", "Зелень"):
+        db.add_category(name)
+    write_json_atomic(config.SEQUENCES_FILE, {"categories": 1})
+
+    assert open_db().add_category("Ягоды").id == 4
+
+
+def test_corrupt_sequences_file(open_db):
+    db = open_db()
+    db.add_category("Фрукты")
+    write_bytes_atomic(config.SEQUENCES_FILE, b'{"categories": ')
+
+    assert open_db().add_category("Овощи").id == 2
@@ -0,0 +1,138 @@
+"""
+Проверка хранения пользователей: файлы-корзины, загрузка по обращению,
+вытеснение из кэша и перенос из users.json прежних версий только по
+настройке USER_BUCKETS_MIGRATE.
+
+Запуск: pytest test_user_store.py
+"""
+import os
+import threading
+
+import config
+import database
+from database import read_json_file, write_json_atomic
+from models import User
+from user_store import UserStore
+
+
+def read_file(path, expected_type):
+    return read_json_file(path, expected_type) if os.path.exists(path) else None
+
+
+def test_bucket_files(tmp_path):
+    store = UserStore(str(tmp_path / "users"), 64, read_file, write_json_atomic)
+    assert not store.exists()
+    store.write([(1, User(id=1, username="anna").to_dict()),
+                 (65, User(id=65).to_dict()),
+                 (2, User(id=2).to_dict())])
+    assert sorted(os.listdir(store.directory)) == ["01.json", "02.json"]
+    assert sorted(read_json_file(os.path.join(store.directory, "01.json"), dict)) == ["1", "65"]
+    assert store.load(1).username == "anna"
+    assert store.load(3) is None
+
+    store.write([(65, None)])
+    assert store.load(65) is None
+    assert sorted(user.id for user in store.iter_users()) == [1, 2]
+
+    store.import_users({7: User(id=7).to_dict()})
+    assert [user.id for user in store.iter_users()] == [7]
+    assert not os.path.exists(store.directory + ".tmp")
+
+
+def test_users_loaded_on_access(open_db):
+    db = open_db()
+    db.get_user(1)
+    assert not os.path.exists(config.USERS_DIR)  # новый пользователь без изменений не сохраняется
+    db.update_user(1, username="anna")
+    db.update_user(2, username="boris")
+
+    reopened = open_db()
+    assert reopened._users == {}
+    assert reopened.get_user(2).username == "boris"
+    assert list(reopened._users) == [2]
+
+
+def test_idle_users_evicted(open_db, monkeypatch):
+    monkeypatch.setattr(config, "USER_CACHE_SIZE", 2)
+    db = open_db()
+    for user_id in (1, 2):
+        db.update_user(user_id, username=f"user{user_id}")
+    # Обращения к пользователям 1 и 2 были раньше USER_EVICTION_GRACE, но позже USER_CACHE_TTL:
+    # при переполнении кэша вытесняется самый давний
+    for user_id in (1, 2):
+        db._user_access[user_id] -= 120
+    db._user_access[1] -= 1
+
+    db.get_user(3)
+    assert sorted(db._users) == [2, 3]
+    for user_id in (2, 3):
+        db._user_access[user_id] -= 3600
+
+    # Не использовавшиеся дольше USER_CACHE_TTL вытесняются и без переполнения
+    # (проверка - не чаще раза в минуту)
+    monkeypatch.setattr(config, "USER_CACHE_SIZE", 10)
+    db.get_user(4)
+    assert sorted(db._users) == [2, 3, 4]
+    db._last_user_eviction -= 60
+    db.get_user(5)
+    assert sorted(db._users) == [4, 5]
+    assert db.get_user(1).username == "user1"  # вытесненный пользователь читается из корзины
+
+
+def test_unsaved_users_not_evicted(open_db, monkeypatch):
+    monkeypatch.setattr(config, "USER_CACHE_SIZE", 1)
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 60000)
+    db = open_db()
+    db.update_user(1, username="anna")
+    db._user_access[1] -= 3600
+
+    db.get_user(2)
+    assert 1 in db._users
+    db.flush()
+
+
+def test_eviction_with_parallel_access(open_db, monkeypatch):
+    monkeypatch.setattr(config, "USER_CACHE_SIZE", 10)
+    monkeypatch.setattr(database, "USER_EVICTION_GRACE", 0)
+    db = open_db()
+    errors = []
+
+    def access(start: int) -> None:
+        try:
+            for user_id in range(start, start + 500):
+                db.get_user(user_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=access, args=(number * 1000,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(db._users) <= 10
+
+
+def write_legacy_users():
+    write_json_atomic(config.USERS_FILE, {"1": User(id=1, username="anna").to_dict()})
+
+
+def test_legacy_users_file_kept_without_migration(open_db):
+    write_legacy_users()
+    db = open_db()
+    assert db.get_user(1).username == "anna"
+    db.update_user(2, username="boris")
+
+    assert not os.path.exists(config.USERS_DIR)
+    assert sorted(read_json_file(config.USERS_FILE, dict)) == ["1", "2"]
+
+
+def test_legacy_users_migrated_when_enabled(open_db, monkeypatch):
+    monkeypatch.setattr(config, "USER_BUCKETS_MIGRATE", True)
+    write_legacy_users()
+    db = open_db()
+
+    assert os.path.isdir(config.USERS_DIR)
+    assert not os.path.exists(config.USERS_FILE)
+    assert os.path.exists(config.USERS_FILE + ".migrated")
+    assert db.get_user(1).username == "anna"
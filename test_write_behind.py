@@ -0,0 +1,68 @@
+"""
+Проверка отложенной записи: изменения накапливаются в памяти (повторные
+изменения одной записи объединяются), записываются фоновым потоком после
+интервала WRITE_BEHIND_MS, а при остановке бота - сразу.
+
+Запуск: pytest test_write_behind.py
+"""
+import atexit
+import os
+import time
+
+import config
+from database import read_json_file
+from models import Category, decode_rows
+
+
+def read_categories():
+    return [(category.id, category.name)
+            for category in decode_rows(Category, read_json_file(config.CATEGORIES_FILE, (list, dict)))]
+
+
+def test_changes_batched_until_flush(open_db, monkeypatch):
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 60000)
+    db = open_db()
+    fruits = db.add_category("Фрукты")
+    db.update_category(fruits.id, "Ягоды")
+    db.add_category("Овощи")
+    assert not os.path.exists(config.CATEGORIES_FILE)
+    assert sorted(db._pending) == [("categories", 1), ("categories", 2)]
+
+    db.flush()
+    assert db._pending == {}
+    assert read_categories() == [(1, "Ягоды"), (2, "Овощи")]
+
+
+def test_background_thread_writes_after_interval(open_db, monkeypatch):
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 20)
+    db = open_db()
+    db.add_category("Фрукты")
+
+    deadline = time.monotonic() + 5
+    while not os.path.exists(config.CATEGORIES_FILE) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read_categories() == [(1, "Фрукты")]
+
+
+def test_pending_changes_written_on_shutdown(open_db, monkeypatch):
+    import main
+
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 60000)
+    db = open_db()
+    assert registered == [db.flush]
+
+    db.add_category("Фрукты")
+    monkeypatch.setattr(main, "db", db)
+    main.shutdown()
+    assert read_categories() == [(1, "Фрукты")]
+
+
+def test_save_all_includes_pending_changes(open_db, monkeypatch):
+    monkeypatch.setattr(config, "WRITE_BEHIND_MS", 60000)
+    db = open_db()
+    db.add_category("Фрукты")
+    db.save_all()
+    assert db._pending == {}
+    assert read_categories() == [(1, "Фрукты")]
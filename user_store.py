@@ -0,0 +1,172 @@
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from models import User
+
+
+class UserStore:
+    """
+    Хранилище пользователей в файлах-корзинах.
+
+    Пользователь с id N хранится в файле <каталог>/<N % buckets>.json
+    (словарь {user_id: данные}), поэтому чтение и изменение одного
+    пользователя затрагивает только небольшой файл своей корзины,
+    а не всю базу пользователей.
+    """
+
+    def __init__(self, directory: str, buckets: int,
+                 read_file: Callable[[str, type], Optional[Any]],
+                 write_file: Callable[[str, Any], None]):
+        self.directory = directory
+        self.buckets = buckets
+        self._read_file = read_file
+        self._write_file = write_file
+        self._locks = [threading.Lock() for _ in range(buckets)]
+        self._recover()
+
+    def _recover(self) -> None:
+        """Возврат каталога, если сбой произошел во время его замены"""
+        old = self.directory + ".old"
+        if not os.path.isdir(self.directory) and os.path.isdir(old):
+            os.replace(old, self.directory)
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def _bucket_path(self, bucket: int, directory: Optional[str] = None) -> str:
+        return os.path.join(directory or self.directory, f"{bucket:02d}.json")
+
+    def _read_bucket(self, bucket: int) -> Dict[str, Any]:
+        return self._read_file(self._bucket_path(bucket), dict) or {}
+
+    def load(self, user_id: int) -> Optional[User]:
+        """Чтение одного пользователя из файла его корзины"""
+        bucket = user_id % self.buckets
+        with self._locks[bucket]:
+            data = self._read_bucket(bucket).get(str(user_id))
+        return User.from_dict(data) if data is not None else None
+
+    def write(self, rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+        """Запись изменений (user_id, данные или None для удаления) по корзинам"""
+        by_bucket = {}
+        for user_id, data in rows:
+            by_bucket.setdefault(user_id % self.buckets, []).append((user_id, data))
+
+        os.makedirs(self.directory, exist_ok=True)
+        for bucket, changes in by_bucket.items():
+            with self._locks[bucket]:
+                users = self._read_bucket(bucket)
+                for user_id, data in changes:
+                    if data is None:
+                        users.pop(str(user_id), None)
+                    else:
+                        users[str(user_id)] = data
+                self._write_file(self._bucket_path(bucket), users)
+
+    def iter_users(self) -> Iterator[User]:
+        """Последовательный обход всех пользователей (по одной корзине в памяти)"""
+        for bucket in range(self.buckets):
+            with self._locks[bucket]:
+                users = self._read_bucket(bucket)
+            for data in users.values():
+                yield User.from_dict(data)
+
+    def import_users(self, users: Dict[int, Dict[str, Any]]) -> None:
+        """Замена всех пользователей (перенос из users.json или старой резервной копии)"""
+        by_bucket = {}
+        for user_id, data in users.items():
+            by_bucket.setdefault(int(user_id) % self.buckets, {})[str(user_id)] = data
+
+        staging = self.directory + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for bucket, data in by_bucket.items():
+            self._write_file(self._bucket_path(bucket, staging), data)
+        self._swap(staging)
+
+    def replace_from(self, source: str) -> None:
+        """Замена всех пользователей копией каталога корзин из резервной копии"""
+        staging = self.directory + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(source, staging)
+        self._swap(staging)
+
+    def copy_to(self, backup_path: str) -> None:
+        """Копирование каталога корзин в каталог резервной копии"""
+        if not self.exists():
+            return
+        target = os.path.join(backup_path, os.path.basename(self.directory))
+        os.makedirs(target, exist_ok=True)
+        for bucket in range(self.buckets):
+            path = self._bucket_path(bucket)
+            with self._locks[bucket]:
+                if os.path.exists(path):
+                    shutil.copy2(path, self._bucket_path(bucket, target))
+
+    def _swap(self, staging: str) -> None:
+        old = self.directory + ".old"
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.isdir(self.directory):
+                os.replace(self.directory, old)
+            os.replace(staging, self.directory)
+            shutil.rmtree(old, ignore_errors=True)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+
+class UserFile:
+    """
+    Пользователи в одном файле users.json (формат прежних версий бота).
+
+    Используется, пока пользователи не перенесены в файлы-корзины: файл
+    читается целиком при запуске и перезаписывается при каждом изменении,
+    поэтому прежняя версия бота по-прежнему может его прочитать.
+    """
+
+    def __init__(self, path: str, users: Dict[str, Any], write_file: Callable[[str, Any], None]):
+        self.path = path
+        self._users = users  # str(user_id) -> данные
+        self._write_file = write_file
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self, user_id: int) -> Optional[User]:
+        with self._lock:
+            data = self._users.get(str(user_id))
+        return User.from_dict(data) if data is not None else None
+
+    def write(self, rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+        """Запись изменений (user_id, данные или None для удаления) перезаписью файла"""
+        with self._lock:
+            for user_id, data in rows:
+                if data is None:
+                    self._users.pop(str(user_id), None)
+                else:
+                    self._users[str(user_id)] = data
+            self._write_file(self.path, self._users)
+
+    def iter_users(self) -> Iterator[User]:
+        with self._lock:
+            users = list(self._users.values())
+        for data in users:
+            yield User.from_dict(data)
+
+    def import_users(self, users: Dict[int, Dict[str, Any]]) -> None:
+        """Замена всех пользователей (из резервной копии прежнего формата)"""
+        with self._lock:
+            self._users = {str(user_id): data for user_id, data in users.items()}
+            self._write_file(self.path, self._users)
+
+    def copy_to(self, backup_path: str) -> None:
+        """Копирование users.json в каталог резервной копии"""
+        with self._lock:
+            if os.path.exists(self.path):
+                shutil.copy2(self.path, os.path.join(backup_path, os.path.basename(self.path)))
@@ -7,7 +7,9 @@ from datetime import datetime
 from telebot import types
 from telebot.apihelper import ApiTelegramException
 
+import callback_data
 import config
+from dashboard import SEASONS
 from database import db
 from models import Product, CartItem
 
@@ -225,97 +227,77 @@ def generate_analytics() -> Dict[str, Any]:
     """
     Генерирует аналитические данные
     """
+    # Показатели собираются из накопительных сумм продаж
+    report = db.get_dashboard(limit=10)
     analytics = {
-        "popular_products": get_popular_products(),
-        "seasonal_products": get_seasonal_products(),
-        "active_customers": get_active_customers()
+        "popular_products": _product_entries(report.popular_all_time),
+        "seasonal_products": {
+            season: _product_entries(products) for season, products in report.seasonal_products.items()
+        },
+        "active_customers": _customer_entries(report.active_customers)
     }
     return analytics
 
-def get_popular_products(limit: int = 10) -> List[Dict[str, Any]]:
+def _product_entries(products: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
     """
-    Возвращает список самых популярных товаров
+    Описания товаров из списка [(product_id, количество)] без удаленных товаров
     """
-    # Получаем все заказы и подсчитываем количество каждого товара
-    product_counts = {}
-    for order in db.get_orders():
-        for item in order.items:
-            product_id = item.product_id
-            quantity = item.quantity
-            
-            if product_id not in product_counts:
-                product_counts[product_id] = 0
-            product_counts[product_id] += quantity
-    
-    # Сортируем по популярности
-    popular_products = []
-    for product_id, count in sorted(product_counts.items(), key=lambda x: x[1], reverse=True)[:limit]:
+    entries = []
+    for product_id, count in products:
         product = db.get_product(product_id)
         if product:
-            popular_products.append({
+            entries.append({
                 "id": product.id,
                 "name": product.name,
                 "count": count,
                 "unit": product.unit
             })
+    return entries
+
+def _customer_entries(customers: List[Tuple[int, int, float]]) -> List[Dict[str, Any]]:
+    """
+    Описания покупателей из списка [(user_id, количество заказов, сумма)]
+    """
+    entries = []
+    for user_id, order_count, total_spent in customers:
+        user = db.get_user(user_id)
+        if user:
+            entries.append({
+                "id": user.id,
+                "username": user.username,
+                "order_count": order_count,
+                "total_spent": total_spent
+            })
+    return entries
+
+def get_popular_products(limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Возвращает список самых популярных товаров
+    """
+    # Количество каждого товара во всех заказах
+    product_counts = db.get_product_quantities()
     
-    return popular_products
+    # Сортируем по популярности
+    return _product_entries(sorted(product_counts.items(), key=lambda x: x[1], reverse=True)[:limit])
 
 def get_seasonal_products(limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
     """
     Возвращает список самых популярных товаров по сезонам
     """
-    # Получаем все заказы и группируем их по сезонам
-    seasons = {
-        "winter": [],  # Декабрь, Январь, Февраль
-        "spring": [],  # Март, Апрель, Май
-        "summer": [],  # Июнь, Июль, Август
-        "autumn": []   # Сентябрь, Октябрь, Ноябрь
-    }
-    
-    for order in db.get_orders():
-        try:
-            date = datetime.fromisoformat(order.created_at)
-            month = date.month
-            
-            if month in [12, 1, 2]:
-                season = "winter"
-            elif month in [3, 4, 5]:
-                season = "spring"
-            elif month in [6, 7, 8]:
-                season = "summer"
-            else:
-                season = "autumn"
-            
-            seasons[season].extend(order.items)
-        except:
-            continue
+    # Количество товаров по месяцам года группируем по сезонам
+    by_month = db.get_product_quantities_by_month()
     
     # Подсчитываем популярность товаров в каждом сезоне
     seasonal_products = {}
-    for season, items in seasons.items():
+    for season, months in SEASONS.items():
         product_counts = {}
-        for item in items:
-            product_id = item.product_id
-            quantity = item.quantity
-            
-            if product_id not in product_counts:
-                product_counts[product_id] = 0
-            product_counts[product_id] += quantity
+        for month in months:
+            for product_id, quantity in by_month.get(month, {}).items():
+                product_counts[product_id] = product_counts.get(product_id, 0) + quantity
         
         # Сортируем по популярности
-        season_products = []
-        for product_id, count in sorted(product_counts.items(), key=lambda x: x[1], reverse=True)[:limit]:
-            product = db.get_product(product_id)
-            if product:
-                season_products.append({
-                    "id": product.id,
-                    "name": product.name,
-                    "count": count,
-                    "unit": product.unit
-                })
-        
-        seasonal_products[season] = season_products
+        seasonal_products[season] = _product_entries(
+            sorted(product_counts.items(), key=lambda x: x[1], reverse=True)[:limit])
     
     return seasonal_products
 
@@ -323,36 +305,12 @@ def get_active_customers(limit: int = 10) -> List[Dict[str, Any]]:
     """
     Возвращает список самых активных покупателей
     """
-    # Подсчитываем количество заказов для каждого пользователя
-    user_orders = {}
-    for order in db.get_orders():
-        user_id = order.user_id
-        if user_id not in user_orders:
-            user_orders[user_id] = {
-                "order_count": 0,
-                "total_spent": 0.0
-            }
-        user_orders[user_id]["order_count"] += 1
-        
-        # Подсчитываем общую сумму заказов
-        for item in order.items:
-            product = db.get_product(item.product_id)
-            if product:
-                user_orders[user_id]["total_spent"] += product.price * item.quantity
+    # Количество и общая сумма заказов каждого пользователя
+    user_orders = db.get_customer_stats()
     
     # Сортируем по количеству заказов
-    active_customers = []
-    for user_id, data in sorted(user_orders.items(), key=lambda x: x[1]["order_count"], reverse=True)[:limit]:
-        user = db.get_user(user_id)
-        if user:
-            active_customers.append({
-                "id": user.id,
-                "username": user.username,
-                "order_count": data["order_count"],
-                "total_spent": data["total_spent"]
-            })
-    
-    return active_customers
+    top = sorted(user_orders.items(), key=lambda x: x[1][1], reverse=True)[:limit]
+    return _customer_entries([(user_id, count, total) for user_id, (total, count) in top])
 
 def notify_admin_about_new_order(bot, order_id: int) -> None:
     """
@@ -398,7 +356,7 @@ def notify_admin_about_new_order(bot, order_id: int) -> None:
         
         # Формируем клавиатуру с кнопкой перехода к заказу
         keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton("📋 Просмотреть заказ", callback_data=f"view_order_{order.id}"))
+        keyboard.add(types.InlineKeyboardButton("📋 Просмотреть заказ", callback_data=callback_data.encode("view_order", order.id)))
         
         # Отправляем уведомление администратору
         try: